@@ -1,6 +1,8 @@
 from .utils import *  # noqa
+from .fields import *  # noqa
 from .mixins import *  # noqa
+from .serializers import *  # noqa
 from .metaclasses import *  # noqa
-
+from .views import *  # noqa
 
 __version__ = "0.1.1"
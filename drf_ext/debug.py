@@ -0,0 +1,211 @@
+"""Development tools to find N+1 queries issued by serializers,
+both on reads (`to_representation`) and on the nested writes of
+`NestedCreateUpdateMixin`. These inspect the call stack on every
+query, so are meant for development and tests only.
+"""
+
+# mypy: ignore-errors
+
+import contextlib
+import sys
+
+from collections import Counter
+from typing import Dict, List, Tuple, Any, Optional, NamedTuple, Callable
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.fields import Field
+from rest_framework.serializers import ListSerializer
+
+from .mixins import NestedCreateUpdateMixin
+from .serializers import NestedListSerializer
+from .utils import logger
+
+
+__all__ = [
+    "NPlusOneQuery",
+    "NPlusOneError",
+    "NPlusOneDetector",
+    "NPlusOneMiddleware",
+]
+
+
+# Default number of times the same query (with different parameters)
+# can be run from the same serializer field, see `NPlusOneDetector`
+N_PLUS_ONE_THRESHOLD = 1
+
+# Methods of serializer fields which read the related objects
+_REPRESENTATION_METHODS = frozenset(("to_representation", "get_attribute"))
+
+
+class NPlusOneQuery(NamedTuple):
+    """A query run more times than allowed from the same origin."""
+
+    # Qualified name of the serializer class
+    serializer: str
+    # Dotted path of the (nested) serializer field, empty if unknown
+    path: str
+    # The SQL, with the placeholders for the parameters
+    sql: str
+    # Number of times the query is run
+    count: int
+
+    def __str__(self) -> str:
+        path = f".{self.path}" if self.path else ""
+        return f"{self.count} x {self.serializer}{path}: {self.sql}"
+
+
+class NPlusOneError(Exception):
+    """Raised by `NPlusOneDetector` on N+1 queries."""
+
+    def __init__(self, queries: List[NPlusOneQuery]) -> None:
+        self.queries = queries
+        super().__init__(
+            "N+1 queries detected:\n" + "\n".join(str(query) for query in queries)
+        )
+
+
+def _get_field_path(field: Field) -> str:
+    """Return the dotted path of the (bound) `field` from the
+    outermost serializer e.g. "user.address.tags".
+    """
+
+    names = []
+    while field is not None:
+        # The `child` of `ListSerializer`s does not have a name
+        if field.field_name:
+            names.append(field.field_name)
+        field = field.parent
+
+    return ".".join(reversed(names))
+
+
+def _get_serializer_name(serializer: Any) -> str:
+    serializer_class = serializer.__class__
+    return f"{serializer_class.__module__}.{serializer_class.__qualname__}"
+
+
+def _get_query_origin(frame: Any) -> Optional[Tuple[str, str]]:
+    """Return the (serializer name, field path) that runs the query
+    from the innermost matching `frame` of the call stack, or `None`
+    if the query is not run while serializing or saving via
+    `NestedCreateUpdateMixin`.
+    """
+
+    while frame is not None:
+        obj = frame.f_locals.get("self")
+
+        if isinstance(obj, (NestedCreateUpdateMixin, NestedListSerializer)):
+            if isinstance(obj, NestedListSerializer):
+                obj = obj.child
+
+            path = _get_field_path(obj)
+            # The nested field written by the mixin methods, if any
+            field_name = frame.f_locals.get("field_name")
+            if isinstance(field_name, str):
+                path = f"{path}.{field_name}" if path else field_name
+
+            return _get_serializer_name(obj), path
+
+        if isinstance(obj, Field) and frame.f_code.co_name in _REPRESENTATION_METHODS:
+            serializer = obj.parent
+            if isinstance(serializer, ListSerializer):
+                serializer = serializer.parent
+
+            return _get_serializer_name(serializer or obj), _get_field_path(obj)
+
+        frame = frame.f_back
+
+    return None
+
+
+class NPlusOneDetector:
+    """Context manager to find the queries that are run more than
+    `threshold` times (with different parameters e.g. PKs) from the
+    same serializer field, while serializing (`to_representation`)
+    or saving via `NestedCreateUpdateMixin`, on the databases with
+    aliases `using` (all by default). For example, in tests:
+
+        with NPlusOneDetector():
+            ClientSerializer(Client.objects.all(), many=True).data
+
+    Raises `NPlusOneError` with the offending queries on exit, unless
+    `raise_error` is `False`; the queries are available as `queries`
+    afterwards anyway. `threshold` is `DRF_EXT_N_PLUS_ONE_THRESHOLD`
+    from settings by default (1, i.e. any repeated query).
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[int] = None,
+        using: Optional[List[str]] = None,
+        raise_error: bool = True,
+    ) -> None:
+        if threshold is None:
+            threshold = getattr(
+                settings, "DRF_EXT_N_PLUS_ONE_THRESHOLD", N_PLUS_ONE_THRESHOLD
+            )
+
+        self.threshold = threshold
+        self.using = using
+        self.raise_error = raise_error
+        self.queries: List[NPlusOneQuery] = []
+
+        self._counter: Dict[Tuple[str, str, str], int] = Counter()
+        self._exit_stack = None
+
+    def _execute_wrapper(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: Dict
+    ) -> Any:
+        origin = _get_query_origin(sys._getframe(1))
+        if origin is not None:
+            self._counter[(*origin, sql)] += 1
+
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> "NPlusOneDetector":
+        self._exit_stack = contextlib.ExitStack()
+
+        aliases = self.using if self.using is not None else list(connections)
+        for alias in aliases:
+            self._exit_stack.enter_context(
+                connections[alias].execute_wrapper(self._execute_wrapper)
+            )
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._exit_stack.close()
+
+        self.queries = [
+            NPlusOneQuery(serializer, path, sql, count)
+            for (serializer, path, sql), count in self._counter.items()
+            if count > self.threshold
+        ]
+
+        if self.queries and self.raise_error and (exc_type is None):
+            raise NPlusOneError(self.queries)
+
+
+class NPlusOneMiddleware:
+    """Middleware to log (via the `drf_ext` logger) the N+1 queries of
+    the serializers (see `NPlusOneDetector`) on each request, when the
+    `DRF_EXT_N_PLUS_ONE_DETECTION` setting is `True`.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: Any) -> Any:
+        if not getattr(settings, "DRF_EXT_N_PLUS_ONE_DETECTION", False):
+            return self.get_response(request)
+
+        with NPlusOneDetector(raise_error=False) as detector:
+            response = self.get_response(request)
+
+        for query in detector.queries:
+            logger.warning(
+                "N+1 queries on %s %s: %s", request.method, request.path, query
+            )
+
+        return response
@@ -0,0 +1,123 @@
+"""Serializer fields that are used along with the serializer
+extensions of `drf_ext`.
+"""
+
+# mypy: ignore-errors
+
+import copy
+
+from typing import List, Any, TypeVar, Optional
+
+from django.core.exceptions import ValidationError as django_ValidationError
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+
+__all__ = ["BatchedManyRelatedField"]
+
+
+# Custom type hints
+DatabaseModelInstance = TypeVar("DatabaseModelInstance")  # refers to a model instance
+
+
+class BatchedManyRelatedField(ManyRelatedField):
+    """`ManyRelatedField` (i.e. `PrimaryKeyRelatedField(many=True)`)
+    that fetches the objects of all the PKs of the input list with a
+    single `filter(pk__in=...)`, instead of a `get` per PK. The objects
+    are returned in the input order, including the duplicates.
+
+    The errors are the same as of `PrimaryKeyRelatedField`, but for
+    all the invalid PKs (in the input order) instead of the first
+    one only.
+
+    The `child_relation` must be a `PrimaryKeyRelatedField`. This is
+    set by `NestedCreateUpdateMixin` (on the metaclasses) with the
+    `batch_many_related_fields` `Meta` option, see
+    `_get_batched_many_related_field`.
+    """
+
+    def _get_error(self, key: str, **kwargs) -> ErrorDetail:
+        message = self.child_relation.error_messages[key].format(**kwargs)
+        return ErrorDetail(message, code=key)
+
+    def to_internal_value(self, data: Any) -> List[DatabaseModelInstance]:
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child_relation = self.child_relation
+        queryset = child_relation.get_queryset()
+        model_pk_field = queryset.model._meta.pk
+
+        # The (converted) PKs, `None` for the invalid ones
+        items = []
+        pks = []
+        errors = []
+        for item in data:
+            if child_relation.pk_field is not None:
+                item = child_relation.pk_field.to_internal_value(item)
+            items.append(item)
+
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pk = model_pk_field.to_python(item)
+            except (TypeError, ValueError, django_ValidationError):
+                pks.append(None)
+                errors.append(
+                    self._get_error("incorrect_type", data_type=type(item).__name__)
+                )
+            else:
+                pks.append(pk)
+                # e.g. `null`, which no object has as the PK
+                errors.append(
+                    self._get_error("does_not_exist", pk_value=item)
+                    if pk is None
+                    else None
+                )
+
+        valid_pks = {pk for pk in pks if pk is not None}
+        instances = (
+            {instance.pk: instance for instance in queryset.filter(pk__in=valid_pks)}
+            if valid_pks
+            else {}
+        )
+
+        for index, (item, pk) in enumerate(zip(items, pks)):
+            if (pk is not None) and (pk not in instances):
+                errors[index] = self._get_error("does_not_exist", pk_value=item)
+
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise ValidationError(errors)
+
+        return [instances[pk] for pk in pks]
+
+
+def _get_batched_many_related_field(field: Any) -> Optional[BatchedManyRelatedField]:
+    """Return a `BatchedManyRelatedField` with the same arguments as
+    the (unbound) `field`, if it's a writable `ManyRelatedField` of a
+    `PrimaryKeyRelatedField` (without a custom `to_internal_value`),
+    otherwise `None`.
+    """
+
+    if (
+        (type(field) is not ManyRelatedField)
+        or field.read_only
+        or (not isinstance(field.child_relation, PrimaryKeyRelatedField))
+        or (
+            type(field.child_relation).to_internal_value
+            is not PrimaryKeyRelatedField.to_internal_value
+        )
+    ):
+        return None
+
+    # The child field is bound to `field` already, so a new one (with
+    # the same arguments) is used
+    kwargs = {
+        **field._kwargs,
+        "child_relation": copy.deepcopy(field._kwargs["child_relation"]),
+    }
+
+    return BatchedManyRelatedField(*field._args, **kwargs)
@@ -4,10 +4,21 @@ functionalities of serializers.
 
 # mypy: ignore-errors
 
-import copy
+import threading
+import weakref
 
 from collections.abc import Mapping
-from typing import Dict, List, Tuple, Any, TypeVar, Optional, Set, Iterable
+from typing import (
+    Dict,
+    List,
+    Tuple,
+    Any,
+    TypeVar,
+    Optional,
+    Set,
+    Iterable,
+    Callable,
+)
 
 from rest_framework.serializers import (
     SerializerMetaclass,
@@ -19,6 +30,7 @@ from rest_framework.serializers import (
 from rest_framework.exceptions import ValidationError
 
 from .mixins import NestedCreateUpdateMixin
+from .serializers import NestedListSerializer
 from .utils import update_error_dict, logger
 
 
@@ -27,6 +39,7 @@ __all__ = [
     "FieldOptionsMetaclass",
     "ExtendedSerializerMetaclass",
     "InheritableExtendedSerializerMetaclass",
+    "warm_up_serializers",
 ]
 
 
@@ -37,6 +50,84 @@ NON_FIELD_ERRORS_KEY = "__all__"
 SerializerInstance = TypeVar("SerializerInstance")  # refers to a serializer instance
 
 
+# Serializer classes (of `FieldOptionsMetaclass`) with deferred field
+# options, as class-callable (to apply the options, taking the class)
+# mapping
+_pending_field_options: "weakref.WeakKeyDictionary[type, Callable]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Guards `_pending_field_options`; re-entrant, as applying the options
+# instantiates the serializer (i.e. calls `get_fields` again)
+_field_options_lock = threading.RLock()
+
+# Serializer classes whose deferred field options are being applied
+# (by the thread holding `_field_options_lock`)
+_applying_field_options: Set[type] = set()
+
+
+def _apply_pending_field_options(serializer_cls: type) -> None:
+    """Apply the deferred field options of `serializer_cls` and of
+    its superclasses, superclasses first (like they would be applied
+    on class creation).
+
+    Once none is pending, `serializer_cls` is marked (on the class
+    itself) so that its `get_fields` does not look at the pending
+    options (or take the lock) again.
+    """
+
+    with _field_options_lock:
+        for klass in reversed(serializer_cls.__mro__):
+            apply_field_options = _pending_field_options.get(klass)
+            # Skipped on re-entry, as applying the options instantiates
+            # the serializer
+            if (apply_field_options is None) or (klass in _applying_field_options):
+                continue
+
+            _applying_field_options.add(klass)
+            try:
+                apply_field_options(klass)
+            finally:
+                _applying_field_options.discard(klass)
+
+            # Removed only once applied, so other threads wait (on the
+            # lock) for the options instead of using the fields without
+            _pending_field_options.pop(klass, None)
+
+            # The options change the fields, so the field templates
+            # (built while applying those) are stale
+            if "_field_templates" in klass.__dict__:
+                del klass._field_templates
+
+        # Options are only deferred on class creation, so none can be
+        # pending for the superclasses afterwards
+        if not any(klass in _pending_field_options for klass in serializer_cls.__mro__):
+            serializer_cls._field_options_applied = True
+
+    return None
+
+
+def warm_up_serializers(*serializer_classes: type) -> None:
+    """Apply the deferred field options (i.e. the default
+    `Meta.non_required_fields` of `FieldOptionsMetaclass`, which needs
+    all the fields to be built) of the `serializer_classes` now, or of
+    all serializer classes if none is passed.
+
+    This is otherwise done on the first use of the fields of each
+    serializer, and can be used to do that eagerly e.g. during
+    worker warmup.
+    """
+
+    if not serializer_classes:
+        with _field_options_lock:
+            serializer_classes = tuple(_pending_field_options.keys())
+
+    for serializer_cls in serializer_classes:
+        _apply_pending_field_options(serializer_cls)
+
+    return None
+
+
 def _get_meta_fields(cls_name: str, cls_attrs: Dict[str, Any]) -> Iterable:
     """Return the fields defined in the `fields` attribute
     of `Meta` class in the serializer.
@@ -57,12 +148,79 @@ def _get_meta_fields(cls_name: str, cls_attrs: Dict[str, Any]) -> Iterable:
     return meta_fields
 
 
+def _get_pk_serializer_class(serializer_cls: type) -> type:
+    """Return a subclass of the (nested) `serializer_cls` with the
+    `_pk` field added, leaving `serializer_cls` itself as-is. The
+    subclass is created once per `serializer_cls`, and reused for
+    all the declarations of it as a nested serializer.
+
+    `serializer_cls` is returned as-is if it has the `_pk` field
+    already.
+    """
+
+    # Looked up on the class itself, as the subclasses must not
+    # inherit it
+    try:
+        return serializer_cls.__dict__["_pk_serializer_class"]
+    except KeyError:
+        pass
+
+    Meta = serializer_cls.Meta
+    meta_fields = Meta.fields
+
+    if ("_pk" in serializer_cls._declared_fields) and (
+        (meta_fields == ALL_FIELDS) or ("_pk" in meta_fields)
+    ):
+        serializer_cls._pk_serializer_class = serializer_cls
+        return serializer_cls
+
+    attrs = {
+        "__module__": serializer_cls.__module__,
+        "__qualname__": serializer_cls.__qualname__,
+        "_pk": IntegerField(
+            write_only=True,
+            required=False,
+            min_value=0,
+            help_text=(
+                "This *write-only* field is used for differentiating "
+                "between `create` and `update` operations of nested "
+                "serializers. And must refer to a valid primary key "
+                "for the relevant nested serializer model to indicate "
+                "that the operation on nested serializer is an `update` "
+                "of the object referred by the given primary key. "
+                "Otherwise, a `create` operation is performed."
+            ),
+        ),
+        # When `Meta.fields` is `__all__`, the (declared) `_pk` field
+        # is added via `get_default_field_names` method
+        "Meta": type(
+            "Meta",
+            (Meta,),
+            (
+                {}
+                if meta_fields == ALL_FIELDS
+                else {"fields": tuple(meta_fields) + ("_pk",)}
+            ),
+        ),
+    }
+
+    pk_serializer_cls = type(serializer_cls)(
+        serializer_cls.__name__, (serializer_cls,), attrs
+    )
+    pk_serializer_cls._pk_serializer_class = pk_serializer_cls
+    serializer_cls._pk_serializer_class = pk_serializer_cls
+
+    return pk_serializer_cls
+
+
 class NestedCreateUpdateMetaclass(SerializerMetaclass):
     """Metaclass to:
     - transparently add `_pk` field to all nested serializers
     - provide writing capabilities for nested serializers, both while
       creating and updating (via transparently adding the `NestedCreateUpdateMixin`
       into the bases of the created serializer class).
+    - write list payloads (`many=True`) in bulk (via setting `NestedListSerializer`
+      as `Meta.list_serializer_class`, unless set already).
     """
 
     def __new__(
@@ -82,47 +240,22 @@ class NestedCreateUpdateMetaclass(SerializerMetaclass):
                     )
                     continue
 
-                # Keep the declared serializer as-is; work on a copy and
+                # Keep the declared serializer as-is; instantiate the
+                # `_pk`-augmented subclass with the same arguments and
                 # set the new one as the serializer eventually
-                serializer = copy.deepcopy(value)
-                serializer.__class__._declared_fields.update(
-                    _pk=IntegerField(
-                        write_only=True,
-                        required=False,
-                        min_value=0,
-                        help_text=(
-                            "This *write-only* field is used for differentiating "
-                            "between `create` and `update` operations of nested "
-                            "serializers. And must refer to a valid primary key "
-                            "for the relevant nested serializer model to indicate "
-                            "that the operation on nested serializer is an `update` "
-                            "of the object referred by the given primary key. "
-                            "Otherwise, a `create` operation is performed."
-                        ),
-                    )
-                )
-
-                serializer_meta_fields = serializer.Meta.fields
-
-                # When `Meta.fields` is `__all__`, the `_pk` field
-                # is added via `get_default_field_names` method
-                if serializer_meta_fields == ALL_FIELDS:
-                    get_default_field_names_orig = serializer.get_default_field_names
+                serializer_cls = _get_pk_serializer_class(value.__class__)
+                attrs[attr] = serializer_cls(*value._args, **value._kwargs)
 
-                    def get_default_field_names(*args, **kwargs):
-                        default_fields = get_default_field_names_orig(*args, **kwargs)
-                        return default_fields + ["_pk"]
-
-                    serializer.get_default_field_names = get_default_field_names
-                else:
-                    serializer.__class__.Meta.fields = tuple(serializer_meta_fields) + (
-                        "_pk",
-                    )
-
-                attrs[attr] = serializer
+        # List payloads are written in bulk, unless a list serializer
+        # is set explicitly
+        Meta = attrs["Meta"]
+        if not hasattr(Meta, "list_serializer_class"):
+            Meta.list_serializer_class = NestedListSerializer
 
         # `NestedCreateUpdateMixin` should be the first superclass
-        bases = (NestedCreateUpdateMixin,) + bases
+        # (unless inherited already)
+        if not any(issubclass(base, NestedCreateUpdateMixin) for base in bases):
+            bases = (NestedCreateUpdateMixin,) + bases
 
         return super().__new__(metacls, cls_name, bases, attrs)  # type: ignore
 
@@ -184,52 +317,87 @@ class FieldOptionsMetaclass(SerializerMetaclass):
         except AttributeError:
             extra_kwargs = Meta.extra_kwargs = {}
 
+        common_field_params = getattr(Meta, "common_field_params", {})
+        if not isinstance(common_field_params, Mapping):
+            common_field_params = {}
+
+        def set_non_required_fields(
+            cls: type,
+            non_required_fields: Iterable[str],
+            skip_fields: Set[str] = frozenset(),
+        ) -> None:
+            """Make the `non_required_fields` (and `_pk`) `required=False`,
+            except the `skip_fields`.
+            """
+
+            non_required_fields = tuple(non_required_fields) + ("_pk",)
+            for field in non_required_fields:
+                if field in skip_fields:
+                    continue
+
+                if field in cls._declared_fields:
+                    field_obj = cls._declared_fields[field]
+                    setattr(field_obj, "required", False)
+                    # `Field` class saves a reference on
+                    # `_kwargs` and use in `__deepcopy__`
+                    # (see `fields.Field.__deepcopy__`)
+                    field_obj._kwargs["required"] = False
+                else:
+                    # For explicitly declared `Meta.fields`, check
+                    # if the field exists there
+                    if (Meta.fields == ALL_FIELDS) or (field in meta_fields_set):
+                        extra_kwargs.setdefault(field, {}).update(required=False)
+
         # `non_required_fields`
         try:
             non_required_fields = Meta.non_required_fields
-        # Defaults to `get_fields`
+        # Defaults to `get_fields`, which builds all the fields; so it's
+        # deferred to the first use of the fields (see `get_fields` below)
         except AttributeError:
-            _instance = cls()
 
-            try:
-                _fields = _instance.get_fields()
-            except AttributeError:
-                raise TypeError(
-                    "`ModelSerializer` must be one the base classes."
-                ) from None
-
-            non_required_fields = tuple(_fields)
-
-        non_required_fields = tuple(non_required_fields) + ("_pk",)
-        for field in non_required_fields:
-            if field in cls._declared_fields:
-                field_obj = cls._declared_fields[field]
-                setattr(field_obj, "required", False)
-                # `Field` class saves a reference on
-                # `_kwargs` and use in `__deepcopy__`
-                # (see `fields.Field.__deepcopy__`)
-                field_obj._kwargs["required"] = False
-            else:
-                # For explicitly declared `Meta.fields`, check
-                # if the field exists there
-                if (Meta.fields == ALL_FIELDS) or (field in meta_fields_set):
-                    extra_kwargs.setdefault(field, {}).update(required=False)
+            # `cls` is passed on call, so the pending mapping does
+            # not keep it alive
+            def set_default_non_required_fields(cls: type) -> None:
+                _instance = cls()
+
+                try:
+                    _fields = _instance.get_fields()
+                except AttributeError:
+                    raise TypeError(
+                        "`ModelSerializer` must be one the base classes."
+                    ) from None
+
+                # `common_field_params` are applied already, and take
+                # precedence (like they would if applied afterwards)
+                set_non_required_fields(
+                    cls,
+                    _fields,
+                    skip_fields={
+                        field
+                        for fields, params_dict in common_field_params.items()
+                        if "required" in params_dict
+                        for field in fields
+                    },
+                )
+
+            with _field_options_lock:
+                _pending_field_options[cls] = set_default_non_required_fields
+        else:
+            set_non_required_fields(cls, non_required_fields)
 
         # `common_field_params`
-        common_field_params = getattr(Meta, "common_field_params", {})
-        if isinstance(common_field_params, Mapping):
-            for fields, params_dict in common_field_params.items():
-                for field in fields:
-                    if field in cls._declared_fields:
-                        field_obj = cls._declared_fields[field]
-                        for key, value in params_dict.items():
-                            setattr(field_obj, key, value)
-                            field_obj._kwargs[key] = value
-                    else:
-                        # For explicitly declared `Meta.fields`, check
-                        # if the field exists there
-                        if (Meta.fields == ALL_FIELDS) or (field in meta_fields_set):
-                            extra_kwargs.setdefault(field, {}).update(params_dict)
+        for fields, params_dict in common_field_params.items():
+            for field in fields:
+                if field in cls._declared_fields:
+                    field_obj = cls._declared_fields[field]
+                    for key, value in params_dict.items():
+                        setattr(field_obj, key, value)
+                        field_obj._kwargs[key] = value
+                else:
+                    # For explicitly declared `Meta.fields`, check
+                    # if the field exists there
+                    if (Meta.fields == ALL_FIELDS) or (field in meta_fields_set):
+                        extra_kwargs.setdefault(field, {}).update(params_dict)
 
         required_fields_on_create = Meta.__dict__.get(
             "required_fields_on_create", required_fields_on_create
@@ -264,6 +432,42 @@ class FieldOptionsMetaclass(SerializerMetaclass):
                 "Meta.required_fields_on_update_any"
             )
 
+        def get_required_fields_errors(obj, data: Mapping) -> Dict[str, List]:
+            """Return the errors of the `required_fields_*` checks
+            for create and update operations on the input `data`.
+            """
+
+            errors: Dict[str, List] = {}
+
+            if obj.instance or "_pk" in data:
+                required_fields = required_fields_on_update
+                required_fields_any = required_fields_on_update_any
+            else:
+                required_fields = required_fields_on_create
+                required_fields_any = required_fields_on_create_any
+
+            # `required_fields_on_create`/`required_fields_on_update`
+            for field in required_fields:
+                if field not in data:
+                    update_error_dict(errors, field, "This field is required.")
+
+            # `required_fields_on_create_any`/`required_fields_on_update_any`
+            if required_fields_any:
+                for field in required_fields_any:
+                    if field in data:
+                        break
+                else:
+                    update_error_dict(
+                        errors,
+                        NON_FIELD_ERRORS_KEY,
+                        (
+                            f'At least one of "{", ".join(required_fields_any)}" '
+                            "is required."
+                        ),
+                    )
+
+            return errors
+
         # Keep a reference to the original `is_valid` method
         is_valid_orig = getattr(cls, "is_valid", None)
 
@@ -275,36 +479,7 @@ class FieldOptionsMetaclass(SerializerMetaclass):
 
             if hasattr(obj, "initial_data"):
                 if isinstance(obj.initial_data, Mapping):
-                    data = obj.initial_data
-
-                    errors: Dict[str, List] = {}
-
-                    if obj.instance or "_pk" in data:
-                        required_fields = required_fields_on_update
-                        required_fields_any = required_fields_on_update_any
-                    else:
-                        required_fields = required_fields_on_create
-                        required_fields_any = required_fields_on_create_any
-
-                    # `required_fields_on_create`/`required_fields_on_update`
-                    for field in required_fields:
-                        if field not in data:
-                            update_error_dict(errors, field, "This field is required.")
-
-                    # `required_fields_on_create_any`/`required_fields_on_update_any`
-                    if required_fields_any:
-                        for field in required_fields_any:
-                            if field in data:
-                                break
-                        else:
-                            update_error_dict(
-                                errors,
-                                NON_FIELD_ERRORS_KEY,
-                                (
-                                    f'At least one of "{", ".join(required_fields_any)}" '
-                                    "is required."
-                                ),
-                            )
+                    errors = get_required_fields_errors(obj, obj.initial_data)
 
                     if errors:
                         if raise_exception:
@@ -313,7 +488,42 @@ class FieldOptionsMetaclass(SerializerMetaclass):
 
             return is_valid_orig(obj, raise_exception=raise_exception)
 
+        # Keep a reference to the original `to_internal_value` method
+        to_internal_value_orig = cls.to_internal_value
+
+        def to_internal_value(obj, data: Any) -> Any:
+            """Custom `to_internal_value` method to perform the
+            `required_fields_*` checks when used as a nested
+            serializer, as `is_valid` is only called on the
+            outermost serializer.
+            """
+
+            if (obj.parent is not None) and isinstance(data, Mapping):
+                errors = get_required_fields_errors(obj, data)
+
+                if errors:
+                    raise ValidationError(errors)
+
+            return to_internal_value_orig(obj, data)
+
+        # Keep a reference to the original `get_fields` method
+        get_fields_orig = cls.get_fields
+
+        def get_fields(obj) -> Dict[str, Any]:
+            """Custom `get_fields` method to apply the deferred
+            field options first (see `warm_up_serializers`).
+            """
+
+            # Looking at the class `__dict__` as the mark must not
+            # be inherited from the superclasses
+            if "_field_options_applied" not in obj.__class__.__dict__:
+                _apply_pending_field_options(obj.__class__)
+
+            return get_fields_orig(obj)
+
         cls.is_valid = is_valid
+        cls.to_internal_value = to_internal_value
+        cls.get_fields = get_fields
 
         return cls
 
@@ -4,19 +4,65 @@ functionalities of default DRF serializers.
 
 # mypy: ignore-errors
 
+import contextlib
+import copy
+import itertools
 import traceback
 
 from collections.abc import Mapping
-from typing import Dict, List, Tuple, Any, Union, TypeVar
-
-from django.db import models
-from django.core.exceptions import ValidationError as django_ValidationError
-from rest_framework.serializers import BaseSerializer
-from rest_framework.utils import model_meta
+from contextvars import ContextVar
+from typing import (
+    Dict,
+    List,
+    Tuple,
+    Any,
+    Union,
+    TypeVar,
+    Optional,
+    Set,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Callable,
+)
+
+from asgiref.sync import sync_to_async
+from django.db import models, router, connections, transaction, close_old_connections
+from django.db.models.signals import pre_save, post_save
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ValidationError as django_ValidationError,
+)
+from rest_framework.serializers import (
+    BaseSerializer,
+    ListSerializer,
+    ModelSerializer,
+    raise_errors_on_nested_writes,
+)
 from rest_framework.exceptions import ValidationError
-
-
-__all__ = ["NestedCreateUpdateMixin"]
+from rest_framework.fields import (
+    Field,
+    CharField,
+    IntegerField,
+    FloatField,
+    ReadOnlyField,
+    SkipField,
+    get_error_detail,
+    is_simple_callable,
+)
+from rest_framework.relations import PKOnlyObject, RelatedField, ManyRelatedField
+
+from .fields import _get_batched_many_related_field
+from .utils import (
+    get_field_info,
+    sync_many_to_many,
+    bulk_add_many_to_many,
+    bulk_sync_many_to_many,
+    optimize_queryset,
+)
+
+
+__all__ = ["NestedCreateUpdateMixin", "SaveStreamResult"]
 
 
 # Custom type hints
@@ -27,34 +73,758 @@ SerializerInstance = TypeVar("SerializerInstance")  # refers to a serializer ins
 
 NON_FIELD_ERRORS_KEY = "__all__"
 
+# Number of items validated and saved together by `save_stream`
+SAVE_STREAM_CHUNK_SIZE = 1000
 
-def _get_sanitized_m2m_data(
-    field_data: Dict[str, Union[str, int, List, Dict]]
-) -> Dict[str, Union[str, int, List, Dict]]:
-    """Take a serializer input field data, and return
-    valid field data from that replacing all M2M objects
-    with their PKs. For example:
 
-      {...: {...: [<Foo_1>, <Foo_2>, <Foo_3>]}} ->
-      {...: {...: [1, 2, 3]}}
+class SaveStreamResult(NamedTuple):
+    """The result of a chunk of items saved by
+    `NestedCreateUpdateMixin.save_stream`.
+    """
 
-    This handles nested data as well by recursion.
+    # Position of the first item of the chunk in the input iterable
+    offset: int
+    # Number of items in the chunk
+    size: int
+    # The saved objects (in the input order), empty on errors
+    instances: List[Any]
+    # The errors of the items (as a list, empty dicts for the valid
+    # items), or of the whole chunk (as a dict e.g. under "__all__"),
+    # empty if the chunk is saved
+    errors: Union[List[Dict[str, Any]], Dict[str, Any]]
+
+
+def _accept_validated_instances(serializer: SerializerInstance) -> SerializerInstance:
+    """Make the related fields of `serializer` (and of its nested
+    serializers) take the model instances in the data as-is, and
+    return it. This is used to validate the nested (validated) data
+    again, which has the related objects as instances already (e.g.
+    `{"tags": [<Tag_1>, <Tag_2>]}`); those are checked by the same
+    fields on the first validation, so are not fetched again by PKs.
+
+    The fields are bound to the `serializer` instance, so others are
+    not affected.
     """
 
-    valid_field_data = {}
+    for field in serializer.fields.values():
+        if isinstance(field, ManyRelatedField):
+            child_relation = field.child_relation
+
+            # The list is taken as-is, as it may not be validated per
+            # item (see `BatchedManyRelatedField`)
+            if child_relation.queryset is not None:
+
+                def to_internal_value(
+                    data: Any,
+                    model: DatabaseModel = child_relation.queryset.model,
+                    to_internal_value: Callable = field.to_internal_value,
+                ) -> Any:
+                    if (
+                        isinstance(data, list)
+                        and data
+                        and all(isinstance(item, model) for item in data)
+                    ):
+                        return list(data)
+                    return to_internal_value(data)
+
+                field.to_internal_value = to_internal_value
+
+            field = child_relation
+
+        if isinstance(field, RelatedField):
+            # Read-only
+            if field.queryset is None:
+                continue
 
-    for key, value in field_data.items():
-        if isinstance(value, list):
-            value = [
-                item.pk if isinstance(item, models.Model) else item for item in value
-            ]
-            valid_field_data[key] = value
-        if isinstance(value, dict):
-            value = _get_sanitized_m2m_data(value)
+            def to_internal_value(
+                data: Any,
+                model: DatabaseModel = field.queryset.model,
+                to_internal_value: Callable = field.to_internal_value,
+            ) -> Any:
+                if isinstance(data, model):
+                    return data
+                return to_internal_value(data)
+
+            field.to_internal_value = to_internal_value
+            continue
+
+        if isinstance(field, ListSerializer):
+            field = field.child
+        if hasattr(field, "fields"):
+            _accept_validated_instances(field)
+
+    return serializer
+
+
+def _can_bulk_create(serializer_cls: type, related_model: DatabaseModel) -> bool:
+    """Return whether the objects of a "to many" nested serializer
+    can be created via a single `bulk_create`. This requires the
+    serializer to opt-in via the `nested_bulk_create` `Meta` option,
+    and `bulk_create` must not skip any custom behavior i.e.:
+      - the serializer must not have a custom `create` method
+      - the model must not have a custom `save` method
+      - no `pre_save`/`post_save` signal receivers for the model
+      - the model must not use multi-table inheritance
+      - the database must return the PKs of bulk inserted rows
+    """
+
+    Meta = getattr(serializer_cls, "Meta", None)
+    if not getattr(Meta, "nested_bulk_create", False):
+        return False
+
+    if serializer_cls.create is not ModelSerializer.create:
+        return False
+
+    return _is_bulk_create_safe(related_model)
+
+
+def _is_bulk_create_safe(related_model: DatabaseModel) -> bool:
+    """Return whether the `related_model` objects can be created via
+    `bulk_create` without skipping any custom behavior i.e.:
+      - the model must not have a custom `save` method
+      - no `pre_save`/`post_save` signal receivers for the model
+      - the model must not use multi-table inheritance
+      - the database must return the PKs of bulk inserted rows
+    """
+
+    if related_model.save is not models.Model.save:
+        return False
+
+    if pre_save.has_listeners(related_model) or post_save.has_listeners(related_model):
+        return False
+
+    if related_model._meta.parents:
+        return False
+
+    db = router.db_for_write(related_model)
+
+    return connections[db].features.can_return_rows_from_bulk_insert
+
+
+def _can_create_level(serializer_cls: type) -> bool:
+    """Return whether the objects of a list payload of a serializer
+    (at any nesting level) can be created level by level (see
+    `NestedCreateUpdateMixin._create_level`) instead of one by one by
+    the `create` method of the serializer. This requires the serializer
+    to not have a custom `create` method (other than the one of
+    `NestedCreateUpdateMixin`, as the nested writes are done level by
+    level), and to not set `Meta.revalidate_nested_data`.
+    """
+
+    if serializer_cls.create not in (
+        ModelSerializer.create,
+        NestedCreateUpdateMixin.create,
+    ):
+        return False
+
+    return not getattr(
+        getattr(serializer_cls, "Meta", None), "revalidate_nested_data", False
+    )
+
+
+def _can_bulk_update(serializer_cls: type, related_model: DatabaseModel) -> bool:
+    """Return whether the objects of a "to many" nested serializer
+    can be updated via `bulk_update`. This requires the serializer
+    to opt-in via the `nested_bulk_update` `Meta` option, and
+    `bulk_update` must not skip any custom behavior i.e.:
+      - the serializer must not have a custom `update` method
+      - the model must not have a custom `save` method
+      - no `pre_save`/`post_save` signal receivers for the model
+    """
+
+    Meta = getattr(serializer_cls, "Meta", None)
+    if not getattr(Meta, "nested_bulk_update", False):
+        return False
+
+    if serializer_cls.update is not ModelSerializer.update:
+        return False
+
+    return _is_bulk_update_safe(related_model)
+
+
+def _is_bulk_update_safe(related_model: DatabaseModel) -> bool:
+    """Return whether the `related_model` objects can be updated via
+    `bulk_update` without skipping any custom behavior i.e.:
+      - the model must not have a custom `save` method
+      - no `pre_save`/`post_save` signal receivers for the model
+    """
+
+    if related_model.save is not models.Model.save:
+        return False
+
+    return not (
+        pre_save.has_listeners(related_model) or post_save.has_listeners(related_model)
+    )
+
+
+def _can_update_level(serializer_cls: type) -> bool:
+    """Same as `_can_create_level`, for updating the objects of a list
+    payload (referred by `_pk`) level by level (see
+    `NestedCreateUpdateMixin._update_level`) instead of one by one by
+    the `update` method of the serializer.
+    """
+
+    if serializer_cls.update not in (
+        ModelSerializer.update,
+        NestedCreateUpdateMixin.update,
+    ):
+        return False
+
+    return not getattr(
+        getattr(serializer_cls, "Meta", None), "revalidate_nested_data", False
+    )
+
+
+def _get_bulk_batch_size(serializer_cls: type) -> Optional[int]:
+    """Return the batch size for `bulk_create`/`bulk_update` of a
+    nested serializer, from the `nested_bulk_batch_size` `Meta`
+    option (`None` i.e. a single batch if the database allows, by
+    default).
+    """
+
+    return getattr(
+        getattr(serializer_cls, "Meta", None), "nested_bulk_batch_size", None
+    )
+
+
+def _can_save_changed_fields(model: DatabaseModel) -> bool:
+    """Return whether only the changed fields of the `model`
+    objects can be saved on update i.e. `save` can be called with
+    `update_fields`, or skipped if nothing is changed. This requires:
+      - the model must not have a custom `save` method
+      - no `pre_save` signal receivers for the model
+
+    as both can change any field before saving.
+    """
+
+    return (model.save is models.Model.save) and (not pre_save.has_listeners(model))
+
+
+def _set_changed_attrs(
+    instance: DatabaseModelInstance, data: Dict[str, Any]
+) -> Optional[Set[str]]:
+    """Set the values in `data` as attributes of `instance`, and
+    return the names of the (concrete) fields whose values changed.
+    The values of relation fields are compared by their `<field>_id`
+    attribute, so the related objects are not loaded; fields that
+    are deferred on `instance` are considered changed.
+
+    Return `None` if `instance` needs a full-row save i.e. `data`
+    has a key that is not a model field (e.g. a property), the PK,
+    or a non-concrete field other than reverse relations.
+    """
+
+    opts = instance._meta
+    deferred_fields = instance.get_deferred_fields()
+
+    changed_fields = set()
+    full_save = False
+
+    for attr_name, value in data.items():
+        try:
+            field = opts.get_field(attr_name)
+        except FieldDoesNotExist:
+            field = None
+
+        if (field is None) or field.primary_key:
+            full_save = True
+        elif field.concrete:
+            attname = field.attname
+            if attname in deferred_fields:
+                changed_fields.add(field.name)
+            else:
+                old_value = getattr(instance, attname)
+                setattr(instance, attr_name, value)
+                if getattr(instance, attname) != old_value:
+                    changed_fields.add(field.name)
+                continue
+        # Reverse relations are not saved with the `instance`
+        elif not isinstance(field, models.ForeignObjectRel):
+            full_save = True
+
+        setattr(instance, attr_name, value)
+
+    return None if full_save else changed_fields
+
+
+def _save_changed_fields(instance: DatabaseModelInstance, data: Dict[str, Any]) -> None:
+    """Set the values in `data` as attributes of `instance` and save
+    it with `update_fields` being the changed fields (plus the
+    `auto_now` fields), or skip saving if nothing is changed (unless
+    the model has `post_save` signal receivers, which are expecting
+    the save).
+
+    Falls back to a full-row save when needed (see
+    `_can_save_changed_fields` and `_set_changed_attrs`).
+    """
+
+    model = instance.__class__
+
+    if not _can_save_changed_fields(model):
+        for attr_name, value in data.items():
+            setattr(instance, attr_name, value)
+        instance.save()
+        return None
+
+    changed_fields = _set_changed_attrs(instance, data)
+
+    if changed_fields is None:
+        instance.save()
+    elif changed_fields:
+        changed_fields.update(field.name for field in _get_auto_now_fields(model))
+        instance.save(update_fields=sorted(changed_fields))
+    # Nothing is changed, but the receivers still get the (full) save
+    elif post_save.has_listeners(model):
+        instance.save()
+
+    return None
+
+
+def _get_auto_now_fields(model: DatabaseModel) -> List[models.Field]:
+    """Return the concrete fields of the `model` that are set on every
+    save (i.e. with `auto_now`), so they need to be saved along with
+    the changed fields.
+    """
+
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+    ]
+
+
+def _get_only_fields(
+    serializer: SerializerInstance, model: DatabaseModel
+) -> Optional[Tuple[str, ...]]:
+    """Return the names of the concrete `model` fields needed by the
+    fields of a nested `serializer`, to narrow the fetching of the
+    `_pk` objects via `only`.
+
+    Return `None` (i.e. load all fields) if any field has a source
+    that is not a model field (e.g. `SerializerMethodField` or a
+    property), as that can need any field, or if the serializer has
+    a custom `update` method.
+    """
+
+    if serializer.__class__.update not in (
+        ModelSerializer.update,
+        NestedCreateUpdateMixin.update,
+    ):
+        return None
+
+    opts = model._meta
+    concrete_fields = {field.name for field in opts.concrete_fields}
+    relations = get_field_info(model).relations
+
+    field_names = {opts.pk.name}
+    for field_name, field in serializer.fields.items():
+        if field_name == "_pk":
+            continue
+
+        if not field.source_attrs:
+            return None
+
+        source = field.source_attrs[0]
+        if source == "pk":
+            continue
+        elif source in concrete_fields:
+            field_names.add(source)
+        # "To many" and reverse relations only need the PK
+        elif source not in relations:
+            return None
+
+    return tuple(sorted(field_names))
+
+
+def _get_error_detail(
+    exc: Union[ValidationError, django_ValidationError],
+) -> Dict[str, Any]:
+    """Return the error detail of the `exc` as a dict (errors that
+    are not specific to any field are put under `NON_FIELD_ERRORS_KEY`).
+    """
+
+    detail = exc.detail if isinstance(exc, ValidationError) else get_error_detail(exc)
+
+    if isinstance(detail, Mapping):
+        return detail
+    return {NON_FIELD_ERRORS_KEY: detail}
+
+
+def _merge_positional_errors(
+    errors: Dict[int, Dict[str, Any]], new_errors: Dict[int, Dict[str, Any]]
+) -> None:
+    """Merge the `new_errors` into `errors`, both being dicts with
+    the positions of the items (in a list payload) as keys and the
+    error dicts of the items as values.
+    """
+
+    for position, detail in new_errors.items():
+        errors.setdefault(position, {}).update(detail)
+
+    return None
+
+
+def _get_positional_validation_error(
+    errors: Dict[int, Dict[str, Any]], size: int
+) -> ValidationError:
+    """Return a `ValidationError` for a list payload of `size` items
+    i.e. with a list of error dicts (empty for the valid items), from
+    the `errors` dict with the positions of the invalid items as keys.
+    """
+
+    return ValidationError([errors.get(position, {}) for position in range(size)])
+
+
+def _is_positional_errors(errors: Any, size: int) -> bool:
+    """Return whether `errors` are the errors of a list payload of
+    `size` items i.e. a list of error dicts, one per item.
+    """
+
+    return (
+        isinstance(errors, list)
+        and (len(errors) == size)
+        and all(isinstance(error, Mapping) for error in errors)
+    )
+
+
+def _to_async(func: Callable, thread_sensitive: bool = True) -> Callable:
+    """Return the async version of the (sync) `func`, run via
+    `sync_to_async`, as the whole nested write must be run inside a
+    single transaction (which Django does not support in async code).
+
+    With `thread_sensitive` (default), `func` is run in the main
+    thread (shared by all the sync code of the process, like the
+    async ORM methods of Django are). Otherwise, it's run in a thread
+    pool so that many writes can run in parallel; each thread uses
+    its own database connections, which are handled like on requests
+    (see `close_old_connections`).
+    """
+
+    if thread_sensitive:
+        return sync_to_async(func)
+
+    def _func(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(_func, thread_sensitive=False)
+
+
+def _is_async_thread_sensitive(serializer_cls: type) -> bool:
+    """Return whether the async writes of the serializer run in the
+    main thread (see `_to_async`). This is controlled by the
+    `async_thread_sensitive` `Meta` option (`True` by default).
+    """
+
+    return getattr(
+        getattr(serializer_cls, "Meta", None), "async_thread_sensitive", True
+    )
+
+
+# `to_representation` of the primitive fields, with the conversion
+# that can be done inline
+_INLINE_CONVERSIONS = {
+    CharField.to_representation: str,
+    IntegerField.to_representation: int,
+    FloatField.to_representation: float,
+    ReadOnlyField.to_representation: None,
+}
+
+
+def _compile_representation(serializer: SerializerInstance) -> Callable:
+    """Return a function that does the same as `to_representation` of
+    the `serializer` (`Serializer.to_representation`) for an object,
+    with the work that does not depend on the object done upfront:
+    the readable fields are looked up, the attributes are read
+    directly (by `getattr`) unless a field has a custom
+    `get_attribute`, and the primitive conversions (e.g. `str` for
+    `CharField`) are inlined.
+
+    The fields are bound to the serializer instance, so this must be
+    done per instance (e.g. once for the child serializer of a list).
+    """
+
+    entries = []
+    for field in serializer._readable_fields:
+        # Attributes are read by the field itself (via `get_attribute`)
+        # if `None`
+        source_attrs = (
+            tuple(field.source_attrs)
+            if type(field).get_attribute is Field.get_attribute
+            else None
+        )
+        to_representation = type(field).to_representation
+        try:
+            convert = _INLINE_CONVERSIONS[to_representation]
+        except KeyError:
+            convert = field.to_representation
+        entries.append((field.field_name, field, source_attrs, convert))
+
+    missing = object()
+
+    def _to_representation(instance: Any) -> Dict[str, Any]:
+        ret = {}
+
+        for field_name, field, source_attrs, convert in entries:
+            attribute = missing
+            if source_attrs is not None:
+                # Errors (e.g. a missing attribute) and callables (e.g.
+                # methods) are left to the field
+                try:
+                    attribute = instance
+                    for attr in source_attrs:
+                        attribute = getattr(attribute, attr)
+                        if callable(attribute) and is_simple_callable(attribute):
+                            attribute = missing
+                            break
+                except Exception:
+                    attribute = missing
+
+            if attribute is missing:
+                try:
+                    attribute = field.get_attribute(instance)
+                except SkipField:
+                    continue
+
+            check_for_none = (
+                attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            )
+            if check_for_none is None:
+                ret[field_name] = None
+            elif convert is None:
+                ret[field_name] = attribute
+            else:
+                ret[field_name] = convert(attribute)
+
+        return ret
+
+    return _to_representation
+
+
+class _ResolvedNestedData:
+    """The nested data of a nested save, resolved before the first
+    write (see `NestedCreateUpdateMixin._resolving_nested_data`).
+    """
+
+    __slots__ = ("instances", "serializers", "related_pks")
+
+    def __init__(self) -> None:
+        # Identity map of the objects of the save i.e. model -> PK ->
+        # the (only) object of the row
+        self.instances: Dict[DatabaseModel, Dict[Any, DatabaseModelInstance]] = {}
+        # `id` of nested data -> the nested serializer validated it
+        # again (with `Meta.revalidate_nested_data`)
+        self.serializers: Dict[int, SerializerInstance] = {}
+        # (model, PK) of the updated objects -> source of "to one"
+        # relation -> PK of the related object, as fetched to check
+        # the nested data (see `_check_related_objects`)
+        self.related_pks: Dict[Tuple[DatabaseModel, Any], Dict[str, Any]] = {}
+
+    def add_instance(self, instance: DatabaseModelInstance) -> DatabaseModelInstance:
+        """Add `instance` to the identity map and return it, or return
+        the object of the same row if added already.
+        """
 
-        valid_field_data[key] = value
+        if instance.pk is None:
+            return instance
 
-    return valid_field_data
+        return self.instances.setdefault(instance.__class__, {}).setdefault(
+            instance.pk, instance
+        )
+
+    def add_data_instances(self, data: Any) -> None:
+        """Add the objects in the (nested) validated `data` (e.g. of
+        the related fields) to the identity map, replacing those with
+        the objects of the same rows added already, if any. The data
+        is changed in place, only where an object is replaced.
+        """
+
+        if isinstance(data, Mapping):
+            items = data.items()
+        elif isinstance(data, list):
+            items = enumerate(data)
+        else:
+            return None
+
+        for key, value in items:
+            if isinstance(value, models.Model):
+                instance = self.add_instance(value)
+                if instance is not value:
+                    data[key] = instance
+            else:
+                self.add_data_instances(value)
+
+        return None
+
+
+# The resolved nested data of the current nested save, `None` outside
+# of nested saves
+_resolved_nested_data: ContextVar[Optional[_ResolvedNestedData]] = ContextVar(
+    "drf_ext_resolved_nested_data", default=None
+)
+
+
+class _NestedRelation:
+    """A writable relation field of a serializer, as compiled
+    in `_NestedWritePlan`.
+    """
+
+    __slots__ = (
+        "field_name",
+        "source",
+        "nested",
+        "to_many",
+        "reverse",
+        "model_field",
+        "related_model",
+        "serializer_class",
+        "only_fields",
+    )
+
+    def __init__(
+        self,
+        field_name: str,
+        source: str,
+        nested: bool,
+        to_many: bool,
+        reverse: bool,
+        model_field: Union[models.Field, models.ForeignObjectRel],
+        related_model: DatabaseModel,
+        serializer_class: Optional[type],
+        only_fields: Optional[Tuple[str, ...]],
+    ) -> None:
+        self.field_name = field_name
+        self.source = source
+        # Whether the field is a nested serializer
+        self.nested = nested
+        self.to_many = to_many
+        self.reverse = reverse
+        # The model field, or the relation object (e.g. `OneToOneRel`)
+        # for reverse relations
+        self.model_field = model_field
+        self.related_model = related_model
+        # The (child) serializer class of nested serializers
+        self.serializer_class = serializer_class
+        # The fields to fetch the `_pk` objects of nested serializers
+        # with (`None` for all fields)
+        self.only_fields = only_fields
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, name):
+            raise AttributeError(f"{self.__class__.__name__} is immutable.")
+        super().__setattr__(name, value)
+
+
+class _NestedWritePlan:
+    """The writable relation fields of a serializer, compiled once
+    (on first use) per serializer class and set of writable relation
+    fields, so that the nested writes only need to look at the
+    relation fields present in the validated data.
+    """
+
+    __slots__ = ("relations", "has_nested")
+
+    def __init__(self, relations: Tuple[_NestedRelation, ...]) -> None:
+        self.relations = relations
+        self.has_nested = any(relation.nested for relation in relations)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, name):
+            raise AttributeError(f"{self.__class__.__name__} is immutable.")
+        super().__setattr__(name, value)
+
+    @classmethod
+    def from_serializer(cls, serializer: SerializerInstance) -> "_NestedWritePlan":
+        """Compile the plan from the writable fields of the
+        `serializer` instance.
+        """
+
+        model = serializer.Meta.model
+        info = get_field_info(model)
+
+        # `RelationInfo.model_field` is `None` for reverse relations
+        reverse_relations = {
+            relation.get_accessor_name(): relation
+            for relation in model._meta.related_objects
+        }
+
+        relations = []
+        for field in serializer._writable_fields:
+            source = field.source
+
+            if source not in info.relations:
+                continue
+
+            relation_info = info.relations[source]
+            nested = isinstance(field, BaseSerializer)
+
+            # "To many" serializers are instantiated transparently
+            # as `ListSerializer`, with the `child` attribute
+            # pointing to the real serializer
+            if nested:
+                child = field.child if hasattr(field, "child") else field
+                serializer_class = child.__class__
+                only_fields = _get_only_fields(child, relation_info.related_model)
+            else:
+                serializer_class = None
+                only_fields = None
+
+            relations.append(
+                _NestedRelation(
+                    field.field_name,
+                    source,
+                    nested,
+                    relation_info.to_many,
+                    relation_info.reverse,
+                    relation_info.model_field or reverse_relations.get(source),
+                    relation_info.related_model,
+                    serializer_class,
+                    only_fields,
+                )
+            )
+
+        return cls(tuple(relations))
+
+
+def _get_write_plan_key(serializer: SerializerInstance) -> Tuple:
+    """Return the key of the `_NestedWritePlan` of the `serializer`
+    instance i.e. the names and sources of its writable relation
+    fields, with the (child) serializer class and its field names for
+    the nested serializers (which the plan is compiled from).
+    """
+
+    relations = get_field_info(serializer.Meta.model).relations
+
+    key = []
+    for field in serializer._writable_fields:
+        if field.source not in relations:
+            continue
+
+        if isinstance(field, BaseSerializer):
+            child = field.child if hasattr(field, "child") else field
+            key.append(
+                (field.field_name, field.source, child.__class__, tuple(child.fields))
+            )
+        else:
+            key.append((field.field_name, field.source, None, ()))
+
+    return tuple(key)
+
+
+def _get_nested_serializer(
+    serializer: SerializerInstance, relation: _NestedRelation
+) -> SerializerInstance:
+    """Return the (bound) nested serializer of the `relation` of the
+    `serializer` instance i.e. the `child` of "to many" ones, whose
+    fields are built already (on validation).
+    """
+
+    field = serializer.fields[relation.field_name]
+
+    return field.child if hasattr(field, "child") else field
 
 
 class NestedCreateUpdateMixin:
@@ -107,277 +877,1692 @@ class NestedCreateUpdateMixin:
 
         return exc.__class__(nested_field_error)
 
-    @staticmethod
-    def _handle_single_instance_data(
-        related_model: DatabaseModel,
-        field_obj: SerializerInstance,
-        field_data: Dict[str, Any],
-    ) -> Tuple[bool, DatabaseModelInstance]:
-        """Take the related model and field data for an instance,
-        and return whether the instance is created and the instance
-        itself (None in case the `_pk` is passed but the object
-        does not exist.
+    def _get_nested_write_plan(self) -> _NestedWritePlan:
+        """Return the `_NestedWritePlan` of the serializer, compiling it
+        on first use.
 
-        The valid (nested) input data (and `instance` in case of
-        `update` -- depending on the existence and validity of
-        `_pk`) are passed to the nested serializer class. Then
-        `is_valid` and `save` are called on the serializer instance.
+        The plans are kept on the serializer class per set of writable
+        relation fields (see `_get_write_plan_key`), as the fields can
+        depend on the instance e.g. on `context`.
         """
 
-        created = True
-        instance = None
+        cls = self.__class__
 
-        # Existence of `_pk` means the object already exists,
-        # so we should only update the instance data
+        # Looking at the class `__dict__` as the plans must not
+        # be inherited from the superclasses
         try:
-            _pk = field_data.pop("_pk")
-        # No `_pk` key, so create the instance
+            plans = cls.__dict__["_nested_write_plans"]
         except KeyError:
-            # "To many" serializers are instantiated transparently
-            # as `ListSerializer`, with the `child` attribute
-            # pointing to the real serializer
-            serializer = field_obj.child if hasattr(field_obj, "child") else field_obj
-            serializer_cls = serializer.__class__
+            plans = {}
+            cls._nested_write_plans = plans
 
-            # Convert all M2M objects to their PKs
-            # It can also be done by overriding
-            # `ListSerializer.to_internal_value` but that would
-            # require to use the metaclass. As we want to keep
-            # this mixin public, doing the normalization here.
-            valid_field_data = _get_sanitized_m2m_data(field_data)
+        key = _get_write_plan_key(self)
+        try:
+            return plans[key]
+        except KeyError:
+            plan = _NestedWritePlan.from_serializer(self)
+            plans[key] = plan
+            return plan
 
-            serializer = serializer_cls(data=valid_field_data)
-            serializer.is_valid(raise_exception=True)
-            instance = serializer.save()
-        else:
-            created = False
-            try:
-                instance = related_model._default_manager.get(pk=_pk)
-            except related_model.DoesNotExist:
-                raise ValidationError(
-                    {
-                        NON_FIELD_ERRORS_KEY: [
-                            f"No such {related_model.__name__} object "
-                            f"with primary key {_pk} exists."
-                        ]
-                    }
-                ) from None
-            else:
-                valid_field_data = _get_sanitized_m2m_data(field_data)
+    def _build_fields(self) -> Dict[str, Any]:
+        """Build and return the (unbound) fields of the serializer.
 
-                serializer = field_obj.__class__(instance, data=valid_field_data)
-                serializer.is_valid(raise_exception=True)
-                instance = serializer.save()
+        With the `batch_many_related_fields` `Meta` option (`False` by
+        default), the many-related PK fields (e.g. `tags: [1, 2, 3]`)
+        are replaced with `BatchedManyRelatedField`s, which fetch the
+        objects of all the PKs with a single query on validation.
+        """
 
-        return created, instance
+        fields = super().get_fields()
 
-    def _get_related_field_data(
-        self, info: model_meta.RelationInfo, validated_data: Dict[str, Any]
-    ) -> Tuple[Dict[str, Union[List[int], int]]]:
-        """Return a tuple of two dicts: one for 'to_one` relations
-        and one for `to_many` relations. The keys are the field
-        names and values are integers (PKs). For example:
+        if getattr(getattr(self, "Meta", None), "batch_many_related_fields", False):
+            for field_name, field in fields.items():
+                batched_field = _get_batched_many_related_field(field)
+                if batched_field is not None:
+                    fields[field_name] = batched_field
 
-        related_to_one_fields_data = {'related_field_1': 7}
-        related_to_many_fields_data = {'related_field_2': [2, 3]}
+        return fields
 
-        The instance are created first from the validated field
-        data (if needed) to get the PK.
+    def get_fields(self) -> Dict[str, Any]:
+        """Return the (unbound) fields of the serializer.
+
+        With the `cache_field_templates` `Meta` option (`False` by
+        default), the fields are built once per serializer class and
+        kept as templates, which are then copied for each instance
+        (e.g. of the nested serializers, per nested item) instead of
+        building the fields again. So the fields must not depend on
+        the instance e.g. on `context`.
         """
 
-        # Get related field data
-        related_to_one_fields_data = {}
-        related_to_many_fields_data = {}
+        Meta = getattr(self, "Meta", None)
+        if not getattr(Meta, "cache_field_templates", False):
+            return self._build_fields()
 
-        # Track newly created instances so that we can remove
-        # them for any error
-        # TODO: *NOTE:* Any updated instances can't be rolled back (for now)
-        created_instances = set()
+        cls = self.__class__
 
+        # Looking at the class `__dict__` as the templates must not
+        # be inherited from the superclasses
         try:
-            for field in self._writable_fields:
-                field_name = field.source
-
-                if (field_name in validated_data) and (field_name in info.relations):
+            templates = cls.__dict__["_field_templates"]
+        except KeyError:
+            templates = self._build_fields()
+            cls._field_templates = templates
+
+        # Each field is re-instantiated with (a copy of) its arguments,
+        # see `Field.__deepcopy__`
+        return copy.deepcopy(templates)
+
+    def to_representation(self, instance: Any) -> Dict[str, Any]:
+        """Return the primitive representation of `instance`.
+
+        With the `fast_representation` `Meta` option (`False` by
+        default), this is done by a function compiled (on first use)
+        per serializer instance, which gives the same output as
+        `Serializer.to_representation` with less work per object (see
+        `_compile_representation`); for list responses, it's compiled
+        once for the child serializer and used for all the objects.
+        """
 
-                    relation_info = info.relations[field_name]
-                    related_model = relation_info.related_model
+        Meta = getattr(self, "Meta", None)
+        if (not getattr(Meta, "fast_representation", False)) or isinstance(
+            instance, Mapping
+        ):
+            return super().to_representation(instance)
 
-                    field_data = validated_data.pop(field_name)
+        try:
+            to_representation = self.__dict__["_compiled_representation"]
+        except KeyError:
+            to_representation = _compile_representation(self)
+            self._compiled_representation = to_representation
 
-                    if relation_info.to_many:
-                        if isinstance(field, BaseSerializer):
-                            for single_field_data in field_data:
+        return to_representation(instance)
 
-                                try:
-                                    (
-                                        created,
-                                        instance,
-                                    ) = self._handle_single_instance_data(
-                                        related_model, field, single_field_data
-                                    )
-                                except (ValidationError, django_ValidationError) as e:
-                                    # TODO: aggregate all ValidationErrors
-                                    # and send at once
-                                    raise self._get_nested_validation_error(
-                                        field_name, e
-                                    )
+    @staticmethod
+    def _get_nested_pks(
+        field_data: Union[Dict[str, Any], List[Dict[str, Any]]], to_many: bool
+    ) -> List[Any]:
+        """Return the `_pk` values present in the (validated) data
+        of a nested serializer field. For "to many" fields, the data
+        is a list of dicts and the `_pk` of each dict is considered.
+        """
 
-                                if instance:
-                                    if created:
-                                        created_instances.add(instance)
-                                    related_to_many_fields_data.setdefault(
-                                        field_name, []
-                                    ).append(instance)
+        items = field_data if to_many else (field_data,)
 
-                        else:
-                            related_to_many_fields_data[field_name] = field_data
-                    else:
-                        if isinstance(field, BaseSerializer):
-
-                            try:
-                                created, instance = self._handle_single_instance_data(
-                                    related_model, field, field_data
-                                )
-                            except (ValidationError, django_ValidationError) as e:
-                                raise self._get_nested_validation_error(field_name, e)
-
-                            if instance:
-                                if created:
-                                    created_instances.add(instance)
-                                related_to_one_fields_data[field_name] = instance
-                        else:
-                            related_to_one_fields_data[field_name] = field_data
-        except Exception:
-            for instance in created_instances:
-                instance.delete()
-            raise
+        return [
+            item["_pk"] for item in items if isinstance(item, Mapping) and "_pk" in item
+        ]
 
-        return related_to_one_fields_data, related_to_many_fields_data
+    def _fetch_nested_instances(
+        self, validated_data: Dict[str, Any]
+    ) -> Dict[DatabaseModel, Dict[Any, DatabaseModelInstance]]:
+        """Gather the `_pk`s of all nested serializer data in
+        `validated_data`, grouped by the related model, and fetch
+        the objects in a single query per related model.
 
-    def create(self, validated_data: Dict[str, Any]) -> DatabaseModelInstance:
-        """Overriden `create` method to handle nested serializer
-        writes. The existence of `_pk` field on field data means
-        an update of the nested instance is desired, otherwise the
-        nested instance is created first from the passed data for
-        the field.
+        Returns a dict with the related models as keys and dicts of
+        PK-instance mapping (as returned by `in_bulk`) as values.
         """
 
-        ModelClass = self.Meta.model
+        pks_by_model: Dict[DatabaseModel, set] = {}
+        only_fields_by_model: Dict[DatabaseModel, Optional[set]] = {}
 
-        info = model_meta.get_field_info(ModelClass)
+        for relation in self._get_nested_write_plan().relations:
+            if relation.nested and (relation.source in validated_data):
+                related_model = relation.related_model
+                pks = self._get_nested_pks(
+                    validated_data[relation.source], relation.to_many
+                )
+                if not pks:
+                    continue
 
-        # fmt: off
-        related_to_one_fields_data, related_to_many_fields_data = (
-            self._get_related_field_data(
-                info, validated_data
-            )
-        )
-        # fmt: on
+                pks_by_model.setdefault(related_model, set()).update(pks)
 
-        validated_data.update(related_to_one_fields_data)
+                # Only the fields needed by all the nested serializers
+                # of the related model are fetched
+                only_fields = only_fields_by_model.setdefault(related_model, set())
+                if (only_fields is None) or (relation.only_fields is None):
+                    only_fields_by_model[related_model] = None
+                else:
+                    only_fields.update(relation.only_fields)
 
-        try:
-            instance = ModelClass._default_manager.create(**validated_data)
-        except TypeError:
-            tb = traceback.format_exc()
-            msg = (
-                "Got a `TypeError` when calling `%s.%s.create()`. "
-                "This may be because you have a writable field on the "
-                "serializer class that is not a valid argument to "
-                "`%s.%s.create()`. You may need to make the field "
-                "read-only, or override the %s.create() method to handle "
-                "this correctly.\nOriginal exception was:\n %s"
-                % (
-                    ModelClass.__name__,
-                    ModelClass._default_manager.name,
-                    ModelClass.__name__,
-                    ModelClass._default_manager.name,
-                    self.__class__.__name__,
-                    tb,
-                )
+        return {
+            related_model: self._get_instances(
+                related_model, pks, only_fields_by_model[related_model]
             )
-            raise TypeError(msg)
+            for related_model, pks in pks_by_model.items()
+        }
 
-        # Save many-to-many relationships after the instance is created.
-        for field_name, value in related_to_many_fields_data.items():
-            field = getattr(instance, field_name)
-            field.set(value)
+    @staticmethod
+    def _get_instances(
+        related_model: DatabaseModel,
+        pks: Iterable[Any],
+        only_fields: Optional[Iterable[str]] = None,
+    ) -> Dict[Any, DatabaseModelInstance]:
+        """Return the `related_model` objects referred by `pks` as a
+        PK-instance mapping (as returned by `in_bulk`). The objects
+        already resolved in the current nested save are reused, and
+        the rest are fetched in a single query, with `only_fields`
+        (if passed).
+        """
 
-        return instance
+        resolved = _resolved_nested_data.get()
+        if resolved is None:
+            cached = {}
+        else:
+            cached = resolved.instances.setdefault(related_model, {})
 
-    def update(
-        self, instance: DatabaseModelInstance, validated_data: Dict[str, Any]
-    ) -> DatabaseModelInstance:
-        """Overriden `update` method to handle nested serializer
-        writes. The existence of `_pk` field on field data means
-        an update of the nested instance is desired, otherwise the
-        nested instance is created first from the passed data for
-        the field.
+        instances = {}
+        missing_pks = []
+        for pk in pks:
+            try:
+                instances[pk] = cached[pk]
+            except KeyError:
+                missing_pks.append(pk)
+
+        if missing_pks:
+            queryset = related_model._default_manager.all()
+            if only_fields is not None:
+                queryset = queryset.only(*only_fields)
+
+            fetched = queryset.in_bulk(missing_pks)
+            cached.update(fetched)
+            instances.update(fetched)
+
+        return instances
+
+    def _revalidate_nested_data(self) -> bool:
+        """Return whether the nested data should be validated again
+        by the nested serializers before saving. This is controlled
+        by the `revalidate_nested_data` `Meta` option (`False` by
+        default).
+
+        The nested data is already validated by `is_valid` of this
+        serializer, so by default it's saved directly from the
+        validated data.
         """
 
-        info = model_meta.get_field_info(instance)
+        return getattr(self.Meta, "revalidate_nested_data", False)
 
-        # Check whether the nested field data is correct e.g.
-        # user can try to update a nested object they are not
-        # related to by providing the `_pk` for that.
-        for field_name, field_relation in info.relations.items():
+    @staticmethod
+    def _get_nested_instance(
+        related_model: DatabaseModel,
+        _pk: Any,
+        instances: Optional[Dict[Any, DatabaseModelInstance]] = None,
+    ) -> DatabaseModelInstance:
+        """Return the `related_model` object referred by `_pk` from the
+        already fetched `instances` (PK-instance mapping), or fetch it
+        if `instances` is not passed. Raise `ValidationError` if the
+        object does not exist.
+        """
 
-            # TODO: The to-many relation data are passed as-is as they
-            # will be "set" (like fresh creation). Look into this later.
-            if field_relation.to_many:
+        try:
+            if instances is None:
+                return related_model._default_manager.get(pk=_pk)
+            return instances[_pk]
+        except (related_model.DoesNotExist, KeyError):
+            raise ValidationError(
+                {
+                    NON_FIELD_ERRORS_KEY: [
+                        f"No such {related_model.__name__} object "
+                        f"with primary key {_pk} exists."
+                    ]
+                }
+            ) from None
+
+    def _handle_single_instance_data(
+        self,
+        related_model: DatabaseModel,
+        serializer: SerializerInstance,
+        field_data: Dict[str, Any],
+        instances: Optional[Dict[Any, DatabaseModelInstance]] = None,
+    ) -> Tuple[bool, DatabaseModelInstance]:
+        """Take the related model, (bound) nested serializer and field
+        data for an instance, and return whether the instance is
+        created and the instance itself (None in case the `_pk` is
+        passed but the object does not exist.
+
+        The validated (nested) data (and `instance` in case of
+        `update` -- depending on the existence and validity of
+        `_pk`) are passed to the `create`/`update` method of the
+        nested serializer (a new one with the `instance` for custom
+        `update` methods). If `Meta.revalidate_nested_data` is set,
+        the data is passed as input data to the nested serializer
+        instead, and `is_valid` and `save` are called on it.
+
+        `instances` is the PK-instance mapping of already fetched
+        `related_model` objects (see `_fetch_nested_instances`); when
+        not passed, the object referred by `_pk` is fetched here.
+        """
+
+        created = True
+        instance = None
+
+        serializer_cls = serializer.__class__
+        revalidate = self._revalidate_nested_data()
+
+        # Existence of `_pk` means the object already exists,
+        # so we should only update the instance data
+        try:
+            _pk = field_data.pop("_pk")
+        # No `_pk` key, so create the instance
+        except KeyError:
+            if revalidate:
+                serializer = self._get_revalidated_serializer(
+                    serializer_cls, None, field_data
+                )
+                instance = serializer.save()
+            else:
+                instance = serializer.create(field_data)
+        else:
+            created = False
+            instance = self._get_nested_instance(related_model, _pk, instances)
+
+            if revalidate:
+                serializer = self._get_revalidated_serializer(
+                    serializer_cls, instance, field_data
+                )
+                instance = serializer.save()
+            elif serializer_cls.update is ModelSerializer.update:
+                instance = self._update_instance(serializer, instance, field_data)
+            elif serializer_cls.update is NestedCreateUpdateMixin.update:
+                instance = serializer.update(instance, field_data)
+            else:
+                serializer = serializer_cls(instance, context=self.context)
+                instance = serializer.update(instance, field_data)
+
+        return created, instance
+
+    def _get_validated_items_data(
+        self,
+        serializer_cls: type,
+        items: List[Tuple[Optional[DatabaseModelInstance], Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Take a list of (instance, validated data) tuples (instance
+        being `None` for creation) of a nested serializer, and return
+        the validated data of each as a new dict. If
+        `Meta.revalidate_nested_data` is set, the data are validated
+        again by `serializer_cls`.
+        """
+
+        if not self._revalidate_nested_data():
+            return [dict(field_data) for _, field_data in items]
+
+        return [
+            dict(
+                self._get_revalidated_serializer(
+                    serializer_cls, instance, field_data
+                ).validated_data
+            )
+            for instance, field_data in items
+        ]
+
+    def _get_revalidated_serializer(
+        self,
+        serializer_cls: type,
+        instance: Optional[DatabaseModelInstance],
+        field_data: Dict[str, Any],
+    ) -> SerializerInstance:
+        """Return the `serializer_cls` serializer with the nested
+        `field_data` (of `instance`, `None` for creation) validated
+        again (see `_revalidate_nested_data`). The serializer that
+        validated it on resolving the nested data (see `_resolve_level`)
+        is reused, if any.
+        """
+
+        resolved = _resolved_nested_data.get()
+        if resolved is not None:
+            try:
+                return resolved.serializers.pop(id(field_data))
+            except KeyError:
+                pass
+
+        # The related objects are passed as instances, as validated
+        serializer = _accept_validated_instances(
+            serializer_cls(instance, data=field_data, context=self.context)
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def _bulk_create_instances(
+        self,
+        related_model: DatabaseModel,
+        serializer_cls: type,
+        items_data: List[Dict[str, Any]],
+    ) -> List[DatabaseModelInstance]:
+        """Create the objects from the (nested) validated data with a
+        single `bulk_create` and return them in the input order. If
+        `Meta.revalidate_nested_data` is set, all the data are
+        validated again first.
+
+        The many-to-many relations are set afterwards on each created
+        object, like `ModelSerializer.create` does.
+        """
+
+        validated_items_data = self._get_validated_items_data(
+            serializer_cls, [(None, field_data) for field_data in items_data]
+        )
+
+        info = get_field_info(related_model)
+
+        objs = []
+        many_to_many_data = []
+        for validated_data in validated_items_data:
+            many_to_many = {
+                field_name: validated_data.pop(field_name)
+                for field_name, relation_info in info.relations.items()
+                if relation_info.to_many and (field_name in validated_data)
+            }
+            many_to_many_data.append(many_to_many)
+            objs.append(related_model(**validated_data))
+
+        objs = related_model._default_manager.bulk_create(
+            objs, batch_size=_get_bulk_batch_size(serializer_cls)
+        )
+
+        for obj, many_to_many in zip(objs, many_to_many_data):
+            for field_name, value in many_to_many.items():
+                sync_many_to_many(obj, field_name, value, created=True)
+
+        return objs
+
+    def _bulk_update_instances(
+        self,
+        related_model: DatabaseModel,
+        serializer_cls: type,
+        items: List[Tuple[DatabaseModelInstance, Dict[str, Any]]],
+    ) -> None:
+        """Take a list of (instance, validated data) tuples, apply the
+        changes to the instances in memory and save them with
+        `bulk_update` on the union of the changed fields. If
+        `Meta.revalidate_nested_data` is set, all the data are
+        validated again first.
+
+        The many-to-many relations are set afterwards on each object,
+        like `ModelSerializer.update` does.
+        """
+
+        validated_items_data = self._get_validated_items_data(serializer_cls, items)
+
+        info = get_field_info(related_model)
+
+        objs = []
+        bulk_objs = []
+        many_to_many_data = []
+        update_fields = set()
+        for (instance, _), validated_data in zip(items, validated_items_data):
+            many_to_many = {
+                field_name: validated_data.pop(field_name)
+                for field_name, relation_info in info.relations.items()
+                if relation_info.to_many and (field_name in validated_data)
+            }
+            many_to_many_data.append(many_to_many)
+
+            objs.append(instance)
+
+            # Only the changed fields are updated, and unchanged objects
+            # are skipped; `bulk_update` can only save concrete fields
+            # so anything else (e.g. a property setter) needs a regular
+            # `save`
+            changed_fields = _set_changed_attrs(instance, validated_data)
+            if changed_fields is None:
+                instance.save()
+            elif changed_fields:
+                bulk_objs.append(instance)
+                update_fields.update(changed_fields)
+
+        if bulk_objs and update_fields:
+            # `bulk_update` does not call `pre_save` of the fields
+            for field in _get_auto_now_fields(related_model):
+                for instance in bulk_objs:
+                    field.pre_save(instance, add=False)
+                update_fields.add(field.name)
+
+            related_model._default_manager.bulk_update(
+                bulk_objs,
+                fields=sorted(update_fields),
+                batch_size=_get_bulk_batch_size(serializer_cls),
+            )
+
+        for obj, many_to_many in zip(objs, many_to_many_data):
+            for field_name, value in many_to_many.items():
+                sync_many_to_many(obj, field_name, value)
+
+    def _get_related_field_data(
+        self, validated_data: Dict[str, Any]
+    ) -> Tuple[Dict[str, Union[List[int], int]]]:
+        """Return a tuple of two dicts: one for 'to_one` relations
+        and one for `to_many` relations. The keys are the field
+        names and values are integers (PKs). For example:
+
+        related_to_one_fields_data = {'related_field_1': 7}
+        related_to_many_fields_data = {'related_field_2': [2, 3]}
+
+        The instance are created first from the validated field
+        data (if needed) to get the PK.
+        """
+
+        # Get related field data
+        related_to_one_fields_data = {}
+        related_to_many_fields_data = {}
+
+        # Objects referred by the `_pk`s of all nested data,
+        # fetched in one query per related model
+        nested_instances = self._fetch_nested_instances(validated_data)
+
+        for relation in self._get_nested_write_plan().relations:
+            field_name = relation.source
+
+            if field_name not in validated_data:
                 continue
 
-            if field_name in validated_data:
-                field_data = validated_data[field_name]
+            related_model = relation.related_model
+            serializer_cls = relation.serializer_class
+
+            field_data = validated_data.pop(field_name)
+
+            if not relation.nested:
+                if relation.to_many:
+                    related_to_many_fields_data[field_name] = field_data
+                else:
+                    related_to_one_fields_data[field_name] = field_data
+
+            elif relation.to_many:
+                bulk_create = _can_bulk_create(serializer_cls, related_model)
+                bulk_update = _can_bulk_update(serializer_cls, related_model)
+
+                # Objects to be created in bulk are put as
+                # `None` placeholders to keep the input order
+                instances = []
+                items_to_create = []
+                items_to_update = []
+
+                for single_field_data in field_data:
+
+                    if "_pk" not in single_field_data:
+                        if bulk_create:
+                            items_to_create.append((len(instances), single_field_data))
+                            instances.append(None)
+                            continue
+
+                    elif bulk_update:
+                        try:
+                            instance = self._get_nested_instance(
+                                related_model,
+                                single_field_data.pop("_pk"),
+                                nested_instances.get(related_model, {}),
+                            )
+                        except ValidationError as e:
+                            raise self._get_nested_validation_error(field_name, e)
 
-                if not isinstance(field_data, Mapping):
+                        items_to_update.append((instance, single_field_data))
+                        instances.append(instance)
+                        continue
+
+                    try:
+                        _, instance = self._handle_single_instance_data(
+                            related_model,
+                            _get_nested_serializer(self, relation),
+                            single_field_data,
+                            nested_instances.get(related_model, {}),
+                        )
+                    except (ValidationError, django_ValidationError) as e:
+                        # All the errors of the nested data are raised at
+                        # once before the writes (see `_resolve_level`),
+                        # so this is only for the errors of the writes
+                        raise self._get_nested_validation_error(field_name, e)
+
+                    instances.append(instance)
+
+                if items_to_update:
+                    try:
+                        self._bulk_update_instances(
+                            related_model, serializer_cls, items_to_update
+                        )
+                    except (ValidationError, django_ValidationError) as e:
+                        raise self._get_nested_validation_error(field_name, e)
+
+                if items_to_create:
+                    try:
+                        bulk_created = self._bulk_create_instances(
+                            related_model,
+                            serializer_cls,
+                            [data for _, data in items_to_create],
+                        )
+                    except (ValidationError, django_ValidationError) as e:
+                        raise self._get_nested_validation_error(field_name, e)
+
+                    for (position, _), instance in zip(items_to_create, bulk_created):
+                        instances[position] = instance
+
+                instances = [instance for instance in instances if instance]
+                if instances:
+                    related_to_many_fields_data[field_name] = instances
+
+            else:
+                try:
+                    _, instance = self._handle_single_instance_data(
+                        related_model,
+                        _get_nested_serializer(self, relation),
+                        field_data,
+                        nested_instances.get(related_model, {}),
+                    )
+                except (ValidationError, django_ValidationError) as e:
+                    raise self._get_nested_validation_error(field_name, e)
+
+                if instance:
+                    related_to_one_fields_data[field_name] = instance
+
+        return related_to_one_fields_data, related_to_many_fields_data
+
+    @staticmethod
+    def _get_related_pks_list(
+        instances: List[DatabaseModelInstance], relations: List[_NestedRelation]
+    ) -> List[Dict[str, Any]]:
+        """Return a dict per object of `instances` (of the same model),
+        in the same order, with the sources of the "to one" `relations`
+        as keys and the PKs of the objects related to the object as
+        values (`None` if there is no related object).
+
+        This avoids loading the related objects: forward relations
+        are looked up via the local `<field>_id` attribute, and
+        reverse relations via the already cached related object (e.g.
+        by `select_related`) or a single `values_list` query per
+        related model for all the `instances`.
+        """
+
+        related_pks_list = [{} for _ in instances]
+        # Related model -> reverse relations -> positions of the instances
+        reverse_relations_by_model: Dict[
+            DatabaseModel, Dict[_NestedRelation, List[int]]
+        ] = {}
+
+        for position, instance in enumerate(instances):
+            related_pks = related_pks_list[position]
+
+            for relation in relations:
+                model_field = relation.model_field
+
+                if not relation.reverse:
+                    if model_field.target_field.primary_key:
+                        related_pk = getattr(instance, model_field.attname)
+                    else:
+                        # `to_field` is not the PK, need the object for that
+                        related_obj = getattr(instance, relation.source, None)
+                        related_pk = related_obj.pk if related_obj is not None else None
+                    related_pks[relation.source] = related_pk
+                elif model_field.is_cached(instance):
+                    related_obj = model_field.get_cached_value(instance)
+                    related_pks[relation.source] = (
+                        related_obj.pk if related_obj is not None else None
+                    )
+                else:
+                    related_pks[relation.source] = None
+                    reverse_relations_by_model.setdefault(
+                        relation.related_model, {}
+                    ).setdefault(relation, []).append(position)
+
+        for related_model, reverse_relations in reverse_relations_by_model.items():
+            attnames = [
+                relation.model_field.field.attname for relation in reverse_relations
+            ]
+            # PK -> positions of the instances, per relation
+            positions_list = [
+                {instances[position].pk: position for position in positions}
+                for positions in reverse_relations.values()
+            ]
+
+            query = models.Q()
+            for attname, positions in zip(attnames, positions_list):
+                query |= models.Q(**{f"{attname}__in": list(positions)})
+
+            rows = related_model._default_manager.filter(query).values_list(
+                "pk", *attnames
+            )
+            for related_pk, *pks in rows:
+                for relation, positions, pk in zip(
+                    reverse_relations, positions_list, pks
+                ):
+                    if pk in positions:
+                        related_pks_list[positions[pk]][relation.source] = related_pk
+
+        return related_pks_list
+
+    @staticmethod
+    def _check_related_pks(
+        relations: List[_NestedRelation],
+        validated_data: Dict[str, Any],
+        related_pks: Dict[str, Any],
+    ) -> None:
+        """Check whether the nested data of the "to one" `relations`
+        refer to the objects already related (`related_pks`, as
+        returned by `_get_related_pks_list`) via `_pk`, if any, and raise
+        `ValidationError` otherwise e.g. user can try to update a
+        nested object they are not related to by providing the
+        `_pk` for that.
+        """
+
+        for relation in relations:
+            field_name = relation.source
+            field_data = validated_data[field_name]
+            related_pk = related_pks[field_name]
+
+            if related_pk is not None:
+                try:
+                    field_data_pk = field_data["_pk"]
+                except KeyError:
+                    # TODO: Should allow for creating new related object?
+                    raise ValidationError(
+                        {field_name: [("Related object already exists.")]}
+                    )
+                else:
+                    if related_pk != field_data_pk:
+                        raise ValidationError(
+                            {
+                                field_name: [
+                                    (
+                                        "No such "
+                                        f"{relation.related_model.__name__} "
+                                        "object with primary key "
+                                        f"{field_data_pk} exists."
+                                    )
+                                ]
+                            }
+                        )
+
+        return None
+
+    def _check_related_objects(
+        self,
+        items: List[Tuple[DatabaseModelInstance, Dict[str, Any]]],
+        relations: List[_NestedRelation],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Check the nested data of the "to one" `relations` of the
+        updated objects, taking a list of (instance, validated data)
+        tuples, via `_check_related_pks`.
+
+        Only the objects whose data carry any of the `relations` are
+        checked. The related PKs are fetched for all of those at once
+        (see `_get_related_pks_list`), and only once per nested save
+        (they are kept in the resolved nested data).
+
+        Returns the errors as a dict with the positions of the invalid
+        items as keys.
+        """
+
+        resolved = _resolved_nested_data.get()
+        known_related_pks = resolved.related_pks if resolved is not None else {}
+
+        # (position, instance, data, relations of the data)
+        items_to_check = []
+        # (instance, related PKs, relations to fetch the related PKs of)
+        missing = []
+        for position, (instance, data) in enumerate(items):
+            item_relations = [
+                relation
+                for relation in relations
+                if isinstance(data.get(relation.source), Mapping)
+            ]
+            if not item_relations:
+                continue
+
+            items_to_check.append((position, instance, data, item_relations))
+
+            related_pks = known_related_pks.setdefault(
+                (instance.__class__, instance.pk), {}
+            )
+            missing_relations = [
+                relation
+                for relation in item_relations
+                if relation.source not in related_pks
+            ]
+            if missing_relations:
+                missing.append((instance, related_pks, missing_relations))
+
+        if missing:
+            missing_relations = [
+                relation
+                for relation in relations
+                if any(relation in item_relations for _, _, item_relations in missing)
+            ]
+            related_pks_list = self._get_related_pks_list(
+                [instance for instance, _, _ in missing], missing_relations
+            )
+            for (_, related_pks, _), fetched in zip(missing, related_pks_list):
+                for source, related_pk in fetched.items():
+                    related_pks.setdefault(source, related_pk)
+
+        errors = {}
+        for position, instance, data, item_relations in items_to_check:
+            try:
+                self._check_related_pks(
+                    item_relations,
+                    data,
+                    known_related_pks[(instance.__class__, instance.pk)],
+                )
+            except ValidationError as e:
+                errors[position] = _get_error_detail(e)
+
+        return errors
+
+    def _resolve_level(
+        self,
+        serializer: SerializerInstance,
+        items: List[Tuple[Optional[DatabaseModelInstance], Dict[str, Any]]],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Resolve the nested data of a level of a payload without
+        writing anything, taking a list of (instance, validated data)
+        tuples (instance being `None` for creation) of the (bound)
+        `serializer`, level by level (recursively):
+          - the objects referred by the `_pk`s of the nested data of all
+            items are fetched in one query per related model (and kept
+            for the writes, see `_get_instances`), and must exist
+          - the nested "to one" data of the updated objects must refer
+            to the already related objects (if any) via `_pk`; the
+            related objects are cached on the objects, so that this is
+            not queried again on the writes
+          - the nested data are validated again by the nested
+            serializers if `Meta.revalidate_nested_data` is set
+
+        Returns the errors as a dict with the positions of the invalid
+        items as keys, like the errors of the payload on validation.
+        """
+
+        errors = {}
+
+        serializer_cls = serializer.__class__
+        plan = NestedCreateUpdateMixin._get_nested_write_plan(serializer)
+        relations = [
+            relation
+            for relation in plan.relations
+            if relation.nested and any(relation.source in data for _, data in items)
+        ]
+        if not relations:
+            return errors
+
+        revalidate = getattr(
+            getattr(serializer_cls, "Meta", None), "revalidate_nested_data", False
+        )
+
+        # The checks of `update`; the related objects of reverse relations
+        # are cached (after fetching) as (relation, instance, related PK)
+        reverse_related_pks = []
+        to_one_relations = [
+            relation
+            for relation in relations
+            if not relation.to_many
+            and serializer_cls.update
+            in (ModelSerializer.update, NestedCreateUpdateMixin.update)
+        ]
+        updated_items = [
+            (position, instance, data)
+            for position, (instance, data) in enumerate(items)
+            if instance is not None
+        ]
+        if to_one_relations and updated_items:
+            check_errors = self._check_related_objects(
+                [(instance, data) for _, instance, data in updated_items],
+                to_one_relations,
+            )
+            known_related_pks = _resolved_nested_data.get().related_pks
+
+            for check_position, (position, instance, data) in enumerate(updated_items):
+                if check_position in check_errors:
+                    errors[position] = check_errors[check_position]
                     continue
 
-                related_obj = getattr(instance, field_name, None)
+                related_pks = known_related_pks.get((instance.__class__, instance.pk))
+                if not related_pks:
+                    continue
+
+                reverse_related_pks.extend(
+                    (relation, instance, related_pks[relation.source])
+                    for relation in to_one_relations
+                    if relation.reverse
+                    and isinstance(data.get(relation.source), Mapping)
+                    and not relation.model_field.is_cached(instance)
+                )
 
+        # (relation, position, index in "to many" data, nested data)
+        flat_items = []
+        pks_by_model: Dict[DatabaseModel, set] = {}
+        only_fields_by_model: Dict[DatabaseModel, Optional[set]] = {}
+
+        for relation in relations:
+            related_model = relation.related_model
+
+            for position, (_, data) in enumerate(items):
+                if (relation.source not in data) or (position in errors):
+                    continue
+
+                field_data = data[relation.source]
+                if relation.to_many:
+                    nested_items = [
+                        (sub_index, item)
+                        for sub_index, item in enumerate(field_data)
+                        if isinstance(item, Mapping)
+                    ]
+                elif isinstance(field_data, Mapping):
+                    nested_items = [(None, field_data)]
+                else:
+                    continue
+
+                for sub_index, item in nested_items:
+                    flat_items.append((relation, position, sub_index, item))
+                    if "_pk" in item:
+                        pks_by_model.setdefault(related_model, set()).add(item["_pk"])
+
+            only_fields = only_fields_by_model.setdefault(related_model, set())
+            if (only_fields is None) or (relation.only_fields is None):
+                only_fields_by_model[related_model] = None
+            else:
+                only_fields.update(relation.only_fields)
+
+        nested_instances = {
+            related_model: self._get_instances(
+                related_model, pks, only_fields_by_model[related_model]
+            )
+            for related_model, pks in pks_by_model.items()
+        }
+
+        # The related PKs are the same as the `_pk`s, so those are fetched
+        for relation, instance, related_pk in reverse_related_pks:
+            if related_pk is None:
+                relation.model_field.set_cached_value(instance, None)
+            else:
+                related_obj = nested_instances[relation.related_model].get(related_pk)
                 if related_obj is not None:
+                    relation.model_field.set_cached_value(instance, related_obj)
+
+        for relation in relations:
+            field_name = relation.source
+            related_model = relation.related_model
+            serializer_class = relation.serializer_class
+
+            relation_items = [item for item in flat_items if item[0] is relation]
+
+            nested_errors = {}
+            nested_items = []
+            for nested_index, (_, _, _, item) in enumerate(relation_items):
+                data = dict(item)
+                instance = None
+
+                if "_pk" in data:
                     try:
-                        field_data_pk = field_data["_pk"]
-                    except KeyError:
-                        # TODO: Should allow for creating new related object?
-                        raise ValidationError(
-                            {field_name: [("Related object already exists.")]}
+                        instance = self._get_nested_instance(
+                            related_model,
+                            data.pop("_pk"),
+                            nested_instances.get(related_model, {}),
                         )
-                    else:
-                        if related_obj.pk != field_data_pk:
-                            raise ValidationError(
-                                {
-                                    field_name: [
-                                        (
-                                            "No such "
-                                            f"{related_obj.__class__.__name__} "
-                                            "object with primary key "
-                                            f"{field_data_pk} exists."
-                                        )
-                                    ]
-                                }
-                            )
+                    except ValidationError as e:
+                        nested_errors[nested_index] = _get_error_detail(e)
+                        continue
+
+                if revalidate:
+                    revalidated = _accept_validated_instances(
+                        serializer_class(instance, data=data, context=self.context)
+                    )
+                    if not revalidated.is_valid():
+                        nested_errors[nested_index] = revalidated.errors
+                        continue
+                    # Reused on the writes
+                    _resolved_nested_data.get().serializers[id(item)] = revalidated
+
+                nested_items.append((nested_index, instance, data))
+
+            level_errors = self._resolve_level(
+                _get_nested_serializer(serializer, relation),
+                [(instance, data) for _, instance, data in nested_items],
+            )
+            for level_position, detail in level_errors.items():
+                nested_errors[nested_items[level_position][0]] = detail
+
+            for nested_index, detail in nested_errors.items():
+                _, position, sub_index, _ = relation_items[nested_index]
+                item_errors = errors.setdefault(position, {})
+                if relation.to_many:
+                    item_errors.setdefault(
+                        field_name, [{} for _ in items[position][1][field_name]]
+                    )[sub_index] = detail
+                else:
+                    item_errors[field_name] = detail
+
+        return errors
+
+    @contextlib.contextmanager
+    def _resolving_nested_data(
+        self,
+        serializer: SerializerInstance,
+        items: List[Tuple[Optional[DatabaseModelInstance], Dict[str, Any]]],
+        many: bool = False,
+    ) -> Iterator[None]:
+        """Context manager for the writes of a nested save, which
+        resolves (and checks) the whole nested data `items` (see
+        `_resolve_level`) before the first write, so that an invalid
+        payload is rejected without writing (and rolling back)
+        anything. All the errors are raised at once, as a list (one
+        per item) if `many` is set.
+
+        Nested saves inside this (i.e. by the nested serializers) use
+        the objects resolved here, and are not resolved again. The
+        objects are kept in an identity map for the whole save, so that
+        each row (e.g. referred by a related field of the data and by
+        a `_pk`) is loaded once, and changes to it are seen everywhere.
+        """
+
+        if _resolved_nested_data.get() is not None:
+            yield
+            return
+
+        resolved = _ResolvedNestedData()
+        # The saved objects first, so that the nested data refer to those
+        for instance, _ in items:
+            if instance is not None:
+                resolved.add_instance(instance)
+        for _, data in items:
+            resolved.add_data_instances(data)
+
+        token = _resolved_nested_data.set(resolved)
+        try:
+            errors = self._resolve_level(serializer, items)
+            if errors:
+                if many:
+                    raise _get_positional_validation_error(errors, len(items))
+                raise ValidationError(errors[0])
+
+            yield
+        finally:
+            _resolved_nested_data.reset(token)
+
+    @staticmethod
+    def _update_instance(
+        serializer: SerializerInstance,
+        instance: DatabaseModelInstance,
+        validated_data: Dict[str, Any],
+    ) -> DatabaseModelInstance:
+        """Same as `ModelSerializer.update` for the `serializer`, but
+        only the changed fields of `instance` are saved (and nothing
+        if none is changed), see `_save_changed_fields`.
+        """
+
+        raise_errors_on_nested_writes("update", serializer, validated_data)
+        info = get_field_info(instance.__class__)
+
+        many_to_many = {
+            field_name: validated_data.pop(field_name)
+            for field_name, relation_info in info.relations.items()
+            if relation_info.to_many and (field_name in validated_data)
+        }
+
+        _save_changed_fields(instance, validated_data)
+
+        for field_name, value in many_to_many.items():
+            sync_many_to_many(instance, field_name, value)
+
+        return instance
+
+    def _write_nested_level(
+        self,
+        relation: _NestedRelation,
+        serializer: SerializerInstance,
+        positions: List[int],
+        field_data: List[Any],
+    ) -> Tuple[List[Any], Dict[int, Dict[str, Any]]]:
+        """Create (or update, for the ones with `_pk`) the objects of
+        the nested serializer `relation` for a level of a list payload,
+        `serializer` being the (bound) nested serializer.
+        `field_data` contains the nested data of the items at
+        `positions` of the level: a dict (or `None`) for "to one"
+        relations, and a list of dicts for "to many" relations.
+
+        All the new objects are created via `_create_level`, and the
+        objects referred by `_pk` are fetched in one query and updated
+        via `_update_level`.
+
+        Returns a tuple of the objects (in the same shape as
+        `field_data`), and the errors as a dict with the `positions`
+        as keys.
+        """
+
+        related_model = relation.related_model
+        field_name = relation.source
+
+        # (index in `field_data`, index in "to many" data, nested data)
+        flat_items = []
+        for index, data in enumerate(field_data):
+            if relation.to_many:
+                flat_items.extend(
+                    (index, sub_index, item) for sub_index, item in enumerate(data)
+                )
+            elif isinstance(data, Mapping):
+                flat_items.append((index, None, data))
+
+        results = [None] * len(flat_items)
+        flat_errors = {}
+
+        update_indexes = []
+        items_to_update = []
+        create_indexes = []
+        items_to_create = []
+
+        nested_instances = self._get_instances(
+            related_model,
+            [item["_pk"] for _, _, item in flat_items if "_pk" in item],
+            relation.only_fields,
+        )
+        for flat_index, (_, _, item) in enumerate(flat_items):
+            if "_pk" not in item:
+                create_indexes.append(flat_index)
+                items_to_create.append(item)
+                continue
+
+            data = dict(item)
+            try:
+                instance = self._get_nested_instance(
+                    related_model, data.pop("_pk"), nested_instances
+                )
+            except ValidationError as e:
+                flat_errors[flat_index] = _get_error_detail(e)
+            else:
+                update_indexes.append(flat_index)
+                items_to_update.append((instance, data))
+
+        for indexes, write, write_items in (
+            (update_indexes, self._update_level, items_to_update),
+            (create_indexes, self._create_level, items_to_create),
+        ):
+            if not write_items:
+                continue
+
+            try:
+                instances = write(serializer, related_model, write_items)
+            except ValidationError as e:
+                for flat_index, detail in zip(indexes, e.detail):
+                    if detail:
+                        flat_errors[flat_index] = detail
+            else:
+                for flat_index, instance in zip(indexes, instances):
+                    results[flat_index] = instance
+
+        errors = {}
+        for flat_index, detail in flat_errors.items():
+            index, sub_index, _ = flat_items[flat_index]
+            if relation.to_many:
+                field_errors = errors.setdefault(
+                    positions[index],
+                    {field_name: [{} for _ in field_data[index]]},
+                )
+                field_errors[field_name][sub_index] = detail
+            else:
+                errors[positions[index]] = {field_name: detail}
+
+        if relation.to_many:
+            objs = [[] for _ in field_data]
+            for (index, _, _), instance in zip(flat_items, results):
+                objs[index].append(instance)
+        else:
+            objs = [None] * len(field_data)
+            for (index, _, _), instance in zip(flat_items, results):
+                objs[index] = instance
+
+        return objs, errors
+
+    def _update_level(
+        self,
+        serializer: SerializerInstance,
+        related_model: DatabaseModel,
+        items: List[Tuple[DatabaseModelInstance, Dict[str, Any]]],
+    ) -> List[DatabaseModelInstance]:
+        """Update the objects of a level of a list payload, taking a list
+        of (instance, validated data) tuples of the (bound) `serializer`,
+        level by level:
+          - the objects of the nested serializers of all items are
+            created/updated first, level by level (recursively); the
+            objects of reverse relations are created referring to the
+            updated objects
+          - then the changed fields of all objects are saved via a
+            single `bulk_update`
+          - then the many-to-many relations of all items are synced
+            together (see `bulk_sync_many_to_many`)
+
+        Like `update`, the nested "to one" data must refer to the already
+        related objects (if any) via `_pk`. The objects of a level are
+        saved one by one if they can not be updated via `bulk_update`
+        (see `_is_bulk_update_safe`), and the items are updated one by
+        one by the `update` method of the serializer if it can not be
+        done level by level (see `_can_update_level`).
+
+        Raises `ValidationError` with the errors of the items (as a list)
+        if any.
+        """
+
+        size = len(items)
+        errors = {}
+        serializer_cls = serializer.__class__
+
+        if not _can_update_level(serializer_cls):
+            instances = []
+            for position, (instance, data) in enumerate(items):
+                serializer = serializer_cls(instance, context=self.context)
+                try:
+                    instance = serializer.update(instance, dict(data))
+                except (ValidationError, django_ValidationError) as e:
+                    errors[position] = _get_error_detail(e)
+                instances.append(instance)
+
+            if errors:
+                raise _get_positional_validation_error(errors, size)
+
+            return instances
+
+        instances = [instance for instance, _ in items]
+        items = [dict(data) for _, data in items]
+
+        plan = NestedCreateUpdateMixin._get_nested_write_plan(serializer)
+
+        to_one_relations = [
+            relation
+            for relation in plan.relations
+            if relation.nested and not relation.to_many
+        ]
+        if to_one_relations:
+            # Checked on resolving already, so not fetched again
+            errors = self._check_related_objects(
+                list(zip(instances, items)), to_one_relations
+            )
+            if errors:
+                raise _get_positional_validation_error(errors, size)
+
+        many_to_many_data = []
+
+        for relation in plan.relations:
+            field_name = relation.source
+
+            if not (relation.nested or relation.to_many):
+                continue
+
+            positions = [
+                position for position, data in enumerate(items) if field_name in data
+            ]
+            if not positions:
+                continue
+
+            field_data = [items[position].pop(field_name) for position in positions]
+
+            if not relation.nested:
+                many_to_many_data.append((field_name, positions, field_data))
+                continue
+
+            reverse = relation.reverse and not isinstance(
+                relation.model_field, models.ManyToManyRel
+            )
+
+            # Refer to the updated objects
+            if reverse:
+                fk_name = relation.model_field.field.name
+                if relation.to_many:
+                    field_data = [
+                        [{**item, fk_name: instances[position]} for item in data]
+                        for position, data in zip(positions, field_data)
+                    ]
+                else:
+                    field_data = [
+                        (
+                            {**data, fk_name: instances[position]}
+                            if isinstance(data, Mapping)
+                            else data
+                        )
+                        for position, data in zip(positions, field_data)
+                    ]
+
+            objs, relation_errors = self._write_nested_level(
+                relation,
+                _get_nested_serializer(serializer, relation),
+                positions,
+                field_data,
+            )
+            _merge_positional_errors(errors, relation_errors)
+
+            if relation.to_many:
+                many_to_many_data.append((field_name, positions, objs))
+            elif reverse:
+                # Cache the "one to one" related objects, as on assignment
+                for position, obj in zip(positions, objs):
+                    if obj is not None:
+                        relation.model_field.set_cached_value(instances[position], obj)
+            else:
+                for position, obj in zip(positions, objs):
+                    items[position][field_name] = obj
+
+        if errors:
+            raise _get_positional_validation_error(errors, size)
+
+        if _is_bulk_update_safe(related_model):
+            bulk_objs = []
+            update_fields = set()
+
+            for instance, data in zip(instances, items):
+                # `bulk_update` can only save concrete fields, so anything
+                # else (e.g. a property setter) needs a regular `save`
+                changed_fields = _set_changed_attrs(instance, data)
+                if changed_fields is None:
+                    instance.save()
+                elif changed_fields:
+                    bulk_objs.append(instance)
+                    update_fields.update(changed_fields)
+
+            if bulk_objs:
+                # `bulk_update` does not call `pre_save` of the fields
+                for field in _get_auto_now_fields(related_model):
+                    for instance in bulk_objs:
+                        field.pre_save(instance, add=False)
+                    update_fields.add(field.name)
+
+                related_model._default_manager.bulk_update(
+                    bulk_objs,
+                    fields=sorted(update_fields),
+                    batch_size=_get_bulk_batch_size(serializer_cls),
+                )
+        else:
+            for instance, data in zip(instances, items):
+                _save_changed_fields(instance, data)
+
+        for field_name, positions, objs_list in many_to_many_data:
+            bulk_sync_many_to_many(
+                [instances[position] for position in positions], field_name, objs_list
+            )
+
+        return instances
+
+    def _create_level(
+        self,
+        serializer: SerializerInstance,
+        related_model: DatabaseModel,
+        items: List[Dict[str, Any]],
+    ) -> List[DatabaseModelInstance]:
+        """Create the objects of a level of a list payload i.e. the
+        validated data `items` of the (bound) `serializer`, level by
+        level:
+          - the objects of the forward "to one" nested serializers (and
+            "to many" ones for many-to-many relations) of all items are
+            created first, level by level (recursively)
+          - then the objects of all items are created via a single
+            `bulk_create`
+          - then the objects of the reverse nested serializers, referring
+            to the created objects, are created level by level
+          - then the many-to-many relations of all items are added via a
+            single `bulk_create` of the `through` model rows
+
+        So the number of queries depends on the depth of the payload,
+        not on the number of objects. The objects of a level are saved
+        one by one if they can not be created via `bulk_create` (see
+        `_is_bulk_create_safe`), and the items are created one by one
+        by the `create` method of the serializer if it can not be done
+        level by level (see `_can_create_level`).
+
+        Raises `ValidationError` with the errors of the items (as a list)
+        if any.
+        """
+
+        size = len(items)
+        errors = {}
+        serializer_cls = serializer.__class__
+
+        if not _can_create_level(serializer_cls):
+            instances = []
+            for position, data in enumerate(items):
+                try:
+                    instances.append(serializer.create(dict(data)))
+                except (ValidationError, django_ValidationError) as e:
+                    errors[position] = _get_error_detail(e)
+
+            if errors:
+                raise _get_positional_validation_error(errors, size)
+
+            return instances
+
+        items = [dict(data) for data in items]
+
+        # Written after the objects are created, as they refer to those
+        reverse_relations_data = []
+        many_to_many_data = []
+
+        plan = NestedCreateUpdateMixin._get_nested_write_plan(serializer)
+
+        for relation in plan.relations:
+            field_name = relation.source
+
+            if not (relation.nested or relation.to_many):
+                continue
+
+            positions = [
+                position for position, data in enumerate(items) if field_name in data
+            ]
+            if not positions:
+                continue
+
+            field_data = [items[position].pop(field_name) for position in positions]
+
+            if not relation.nested:
+                many_to_many_data.append((field_name, positions, field_data))
+            elif relation.reverse and not isinstance(
+                relation.model_field, models.ManyToManyRel
+            ):
+                reverse_relations_data.append((relation, positions, field_data))
+            else:
+                objs, relation_errors = self._write_nested_level(
+                    relation,
+                    _get_nested_serializer(serializer, relation),
+                    positions,
+                    field_data,
+                )
+                _merge_positional_errors(errors, relation_errors)
+
+                if relation.to_many:
+                    many_to_many_data.append((field_name, positions, objs))
+                else:
+                    for position, obj in zip(positions, objs):
+                        items[position][field_name] = obj
 
-        # fmt: off
-        related_to_one_fields_data, related_to_many_fields_data = (
-            self._get_related_field_data(
-                info, validated_data
+        if errors:
+            raise _get_positional_validation_error(errors, size)
+
+        if _is_bulk_create_safe(related_model):
+            instances = related_model._default_manager.bulk_create(
+                [related_model(**data) for data in items],
+                batch_size=_get_bulk_batch_size(serializer_cls),
             )
+        else:
+            instances = [
+                related_model._default_manager.create(**data) for data in items
+            ]
+
+        for relation, positions, field_data in reverse_relations_data:
+            fk_name = relation.model_field.field.name
+
+            # Refer to the created objects
+            if relation.to_many:
+                field_data = [
+                    [{**item, fk_name: instances[position]} for item in data]
+                    for position, data in zip(positions, field_data)
+                ]
+            else:
+                field_data = [
+                    (
+                        {**data, fk_name: instances[position]}
+                        if isinstance(data, Mapping)
+                        else data
+                    )
+                    for position, data in zip(positions, field_data)
+                ]
+
+            objs, relation_errors = self._write_nested_level(
+                relation,
+                _get_nested_serializer(serializer, relation),
+                positions,
+                field_data,
+            )
+            _merge_positional_errors(errors, relation_errors)
+
+            # Cache the "one to one" related objects, as on assignment
+            if not relation.to_many:
+                for position, obj in zip(positions, objs):
+                    if obj is not None:
+                        relation.model_field.set_cached_value(instances[position], obj)
+
+        if errors:
+            raise _get_positional_validation_error(errors, size)
+
+        for field_name, positions, objs_list in many_to_many_data:
+            bulk_add_many_to_many(
+                [instances[position] for position in positions], field_name, objs_list
+            )
+
+        return instances
+
+    async def acreate(self, validated_data: Dict[str, Any]) -> DatabaseModelInstance:
+        """Async version of `create`, see `asave`."""
+
+        thread_sensitive = _is_async_thread_sensitive(self.__class__)
+        return await _to_async(self.create, thread_sensitive)(validated_data)
+
+    async def aupdate(
+        self, instance: DatabaseModelInstance, validated_data: Dict[str, Any]
+    ) -> DatabaseModelInstance:
+        """Async version of `update`, see `asave`."""
+
+        thread_sensitive = _is_async_thread_sensitive(self.__class__)
+        return await _to_async(self.update, thread_sensitive)(instance, validated_data)
+
+    async def asave(self, **kwargs) -> DatabaseModelInstance:
+        """Async version of `save`, for async views e.g.:
+
+            serializer.is_valid(raise_exception=True)
+            instance = await serializer.asave()
+
+        The whole (nested) write is run in a single call of
+        `sync_to_async`, so it's still done in a transaction, with
+        the number of queries not depending on the nested objects
+        (as far as possible). Set `Meta.async_thread_sensitive` to
+        `False` to run the writes in a thread pool instead of the
+        main thread, so that many of those can run in parallel.
+        """
+
+        thread_sensitive = _is_async_thread_sensitive(self.__class__)
+        return await _to_async(self.save, thread_sensitive)(**kwargs)
+
+    @classmethod
+    def optimize_queryset(cls, queryset: Any = None) -> Any:
+        """Return the `queryset` (all the objects of the model by
+        default) with the lookups needed to serialize the objects via
+        this serializer (following the nested serializers) applied, see
+        `drf_ext.utils.optimize_queryset`.
+        """
+
+        return optimize_queryset(cls, queryset)
+
+    @classmethod
+    def save_stream(
+        cls,
+        iterable: Iterable[Any],
+        chunk_size: int = SAVE_STREAM_CHUNK_SIZE,
+        instance: Any = None,
+        context: Optional[Dict[str, Any]] = None,
+        partial: bool = False,
+        **kwargs,
+    ) -> Iterator[SaveStreamResult]:
+        """Validate and save the input data items of the (possibly very
+        large or lazy e.g. a generator) `iterable` in chunks of
+        `chunk_size` items, and yield a `SaveStreamResult` per chunk.
+
+        Each chunk is validated and saved as a list payload (i.e. via
+        the list serializer, `many=True`) in its own transaction, so
+        the nested writes are done in bulk (see `NestedListSerializer`)
+        and only a chunk is held in memory at a time. A chunk with any
+        invalid item is not saved at all; the errors are returned and
+        the rest of the chunks are still saved. For updates, pass the
+        objects that can be updated (e.g. a queryset) as `instance`.
+
+        `kwargs` are passed to `save` of the list serializer e.g.
+        `save_stream(items, owner=request.user)`.
+        """
+
+        # Checked here, as the chunks are only saved on iteration
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}.")
+
+        return cls._save_stream(
+            iterable, chunk_size, instance, context, partial, **kwargs
         )
-        # fmt: on
 
-        validated_data.update(related_to_one_fields_data)
+    @classmethod
+    def _save_stream(
+        cls,
+        iterable: Iterable[Any],
+        chunk_size: int,
+        instance: Any,
+        context: Optional[Dict[str, Any]],
+        partial: bool,
+        **kwargs,
+    ) -> Iterator[SaveStreamResult]:
+        """Generator of `save_stream`."""
+
+        ModelClass = cls.Meta.model
+        iterator = iter(iterable)
+
+        for offset in itertools.count(0, chunk_size):
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                break
+
+            if hasattr(getattr(cls, "Meta", None), "list_serializer_class"):
+                serializer = cls(
+                    instance, data=chunk, many=True, partial=partial, context=context
+                )
+            else:
+                # Without the metaclasses, which set it as the list serializer
+                from .serializers import NestedListSerializer
+
+                serializer = NestedListSerializer(
+                    instance,
+                    data=chunk,
+                    partial=partial,
+                    context=context,
+                    child=cls(partial=partial, context=context),
+                )
 
-        for attr_name, value in validated_data.items():
-            setattr(instance, attr_name, value)
-        instance.save()
+            instances = []
+            errors = []
+            try:
+                with transaction.atomic(using=router.db_for_write(ModelClass)):
+                    if serializer.is_valid():
+                        instances = serializer.save(**kwargs)
+                    else:
+                        errors = serializer.errors
+            except ValidationError as e:
+                errors = e.detail
+
+            # Errors that are not of the items (e.g. raised by `save`) are
+            # of the whole chunk
+            if errors and not _is_positional_errors(errors, len(chunk)):
+                if not isinstance(errors, Mapping):
+                    errors = {NON_FIELD_ERRORS_KEY: errors}
+
+            yield SaveStreamResult(offset, len(chunk), instances, errors)
+
+    def create(self, validated_data: Dict[str, Any]) -> DatabaseModelInstance:
+        """Overriden `create` method to handle nested serializer
+        writes. The existence of `_pk` field on field data means
+        an update of the nested instance is desired, otherwise the
+        nested instance is created first from the passed data for
+        the field.
+        """
+
+        # Serializers without nested serializer fields don't need
+        # anything more than what `ModelSerializer` does
+        if not self._get_nested_write_plan().has_nested:
+            return super().create(validated_data)
+
+        ModelClass = self.Meta.model
+
+        # The whole nested data is resolved before the first write, and
+        # nested writes are done inside a (nested) transaction, so that
+        # any error rolls back all the writes done so far
+        with self._resolving_nested_data(
+            self, [(None, validated_data)]
+        ), transaction.atomic(using=router.db_for_write(ModelClass)):
+            # fmt: off
+            related_to_one_fields_data, related_to_many_fields_data = (
+                self._get_related_field_data(validated_data)
+            )
+            # fmt: on
+
+            validated_data.update(related_to_one_fields_data)
+
+            try:
+                instance = ModelClass._default_manager.create(**validated_data)
+            except TypeError:
+                tb = traceback.format_exc()
+                msg = (
+                    "Got a `TypeError` when calling `%s.%s.create()`. "
+                    "This may be because you have a writable field on the "
+                    "serializer class that is not a valid argument to "
+                    "`%s.%s.create()`. You may need to make the field "
+                    "read-only, or override the %s.create() method to handle "
+                    "this correctly.\nOriginal exception was:\n %s"
+                    % (
+                        ModelClass.__name__,
+                        ModelClass._default_manager.name,
+                        ModelClass.__name__,
+                        ModelClass._default_manager.name,
+                        self.__class__.__name__,
+                        tb,
+                    )
+                )
+                raise TypeError(msg)
+
+            # Save many-to-many relationships after the instance is created.
+            for field_name, value in related_to_many_fields_data.items():
+                sync_many_to_many(instance, field_name, value, created=True)
+
+        return instance
+
+    def update(
+        self, instance: DatabaseModelInstance, validated_data: Dict[str, Any]
+    ) -> DatabaseModelInstance:
+        """Overriden `update` method to handle nested serializer
+        writes. The existence of `_pk` field on field data means
+        an update of the nested instance is desired, otherwise the
+        nested instance is created first from the passed data for
+        the field.
+        """
+
+        plan = self._get_nested_write_plan()
+
+        # Serializers without nested serializer fields don't need
+        # anything more than what `ModelSerializer` does
+        if not plan.has_nested:
+            return self._update_instance(self, instance, validated_data)
+
+        # The whole nested data is resolved before the first write, and
+        # nested writes are done inside a (nested) transaction, so that
+        # any error rolls back all the writes done so far
+        with self._resolving_nested_data(
+            self, [(instance, validated_data)]
+        ), transaction.atomic(
+            using=router.db_for_write(instance.__class__, instance=instance)
+        ):
+            # Check whether the nested field data is correct e.g.
+            # user can try to update a nested object they are not
+            # related to by providing the `_pk` for that (the related
+            # PKs are already fetched on resolving).
+            # TODO: The to-many relation data are passed as-is as they
+            # will be "set" (like fresh creation). Look into this later.
+            relations = [
+                relation
+                for relation in plan.relations
+                if relation.nested and (not relation.to_many)
+            ]
+
+            errors = self._check_related_objects(
+                [(instance, validated_data)], relations
+            )
+            if errors:
+                raise ValidationError(errors[0])
+
+            # fmt: off
+            related_to_one_fields_data, related_to_many_fields_data = (
+                self._get_related_field_data(validated_data)
+            )
+            # fmt: on
+
+            validated_data.update(related_to_one_fields_data)
+
+            _save_changed_fields(instance, validated_data)
 
-        # Note that many-to-many fields are set after updating instance.
-        # Setting m2m fields triggers signals which could potentially change
-        # updated instance and we do not want it to collide with .update()
-        for field_name, value in related_to_many_fields_data.items():
-            field = getattr(instance, field_name)
-            field.set(value)
+            # Note that many-to-many fields are set after updating instance.
+            # Setting m2m fields triggers signals which could potentially change
+            # updated instance and we do not want it to collide with .update()
+            for field_name, value in related_to_many_fields_data.items():
+                sync_many_to_many(instance, field_name, value)
 
         return instance
@@ -0,0 +1,21 @@
+"""Pytest fixtures of `drf_ext`, enable with (in the root `conftest.py`):
+
+pytest_plugins = ["drf_ext.pytest_plugin"]
+"""
+
+from typing import Iterator
+
+import pytest
+
+from .debug import NPlusOneDetector
+
+
+@pytest.fixture
+def n_plus_one() -> Iterator[NPlusOneDetector]:
+    """Fail the test on the N+1 queries of the serializers, via
+    `NPlusOneDetector` with the default threshold. The detector is
+    yielded, so the queries found can be inspected as `queries`.
+    """
+
+    with NPlusOneDetector() as detector:
+        yield detector
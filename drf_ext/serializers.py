@@ -0,0 +1,230 @@
+"""Serializers that are used along with the serializer
+extensions of `drf_ext`.
+"""
+
+# mypy: ignore-errors
+
+import copy
+
+from collections.abc import Mapping
+from typing import Dict, List, Iterable, Any, TypeVar
+
+from django.db import models, router, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import Field, IntegerField, empty
+from rest_framework.serializers import ListSerializer
+
+from .mixins import (
+    NestedCreateUpdateMixin,
+    _get_error_detail,
+    _get_positional_validation_error,
+    _to_async,
+    _is_async_thread_sensitive,
+)
+
+
+__all__ = ["NestedListSerializer"]
+
+
+# Custom type hints
+DatabaseModelInstance = TypeVar("DatabaseModelInstance")  # refers to a model instance
+
+
+class NestedListSerializer(ListSerializer):
+    """`ListSerializer` to write list payloads (i.e. `many=True`) of
+    serializers using `NestedCreateUpdateMixin` in bulk.
+
+    On `create`, the objects of all items are created level by level:
+    the nested objects of all items are created first via one
+    `bulk_create` per level, then the objects of all items via one
+    `bulk_create`, then the many-to-many relations of all items via
+    one `bulk_create` of the `through` model rows (see
+    `NestedCreateUpdateMixin._create_level`). So the number of queries
+    does not depend on the number of items.
+
+    On `update`, each item must refer to an object of the `instance`
+    (a queryset, manager or list of objects) via `_pk`; all the objects
+    are fetched via a single query on validation, and updated level by
+    level like on `create` (see `NestedCreateUpdateMixin._update_level`),
+    saving the changed fields via one `bulk_update` per level. For
+    example:
+
+        serializer = UserSerializer(
+            User.objects.filter(is_active=True), data=data, many=True
+        )
+
+    The errors are returned per item i.e. as a list, like on validation.
+
+    This is set as the `Meta.list_serializer_class` of serializers
+    created by `NestedCreateUpdateMetaclass` (and the metaclasses
+    based on it), unless set explicitly.
+    """
+
+    def create(
+        self, validated_data: List[Dict[str, Any]]
+    ) -> List[DatabaseModelInstance]:
+        child = self.child
+
+        if not isinstance(child, NestedCreateUpdateMixin):
+            return super().create(validated_data)
+
+        ModelClass = child.Meta.model
+
+        # The whole nested data is resolved before the first write, and
+        # any error rolls back all the writes done so far
+        with child._resolving_nested_data(
+            child, [(None, data) for data in validated_data], many=True
+        ), transaction.atomic(using=router.db_for_write(ModelClass)):
+            return child._create_level(child, ModelClass, validated_data)
+
+    def _get_targets(self, pks: Iterable[Any]) -> Dict[Any, DatabaseModelInstance]:
+        """Return the objects of `instance` referred by the `pks`, as a
+        PK-instance mapping (fetched in a single query if `instance`
+        is a queryset or manager).
+        """
+
+        instance = self.instance
+        if isinstance(instance, models.Manager):
+            instance = instance.all()
+
+        if isinstance(instance, models.QuerySet):
+            return instance.in_bulk(list(pks))
+
+        pks = set(pks)
+        return {obj.pk: obj for obj in instance if obj.pk in pks}
+
+    def _get_unknown_pk_error(self, _pk: Any) -> List[str]:
+        """Return the error of a `_pk` that refers to no object of
+        `instance`.
+        """
+
+        return [
+            f"No such {self.child.Meta.model.__name__} object "
+            f"with primary key {_pk} exists."
+        ]
+
+    def to_internal_value(self, data: Any) -> List[Dict[str, Any]]:
+        """Same as `ListSerializer.to_internal_value`, but on update,
+        the `_pk`s of the items are validated first and the objects
+        referred by those are fetched in a single query (so the child
+        serializer validates each item against its object).
+        """
+
+        if (self.instance is None) or (not isinstance(data, list)):
+            return super().to_internal_value(data)
+
+        # `_pk` is required for the items, even if the child serializer
+        # has an optional `_pk` field
+        pk_field = self.child.fields.get("_pk")
+        if pk_field is None:
+            self._pk_field = IntegerField()
+        else:
+            self._pk_field = copy.deepcopy(pk_field)
+            self._pk_field.required = True
+
+        pks = []
+        for item in data:
+            if isinstance(item, Mapping) and ("_pk" in item):
+                try:
+                    pks.append(self._pk_field.run_validation(item["_pk"]))
+                except ValidationError:
+                    pass
+
+        self._targets = self._get_targets(pks)
+
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data: Any) -> Dict[str, Any]:
+        """Same as `ListSerializer.run_child_validation`, but on update,
+        validate the `_pk` of the item too (required, and must refer to
+        an object of `instance`), and set the object referred by it as
+        the `instance` of the child serializer while validating the
+        item.
+        """
+
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        errors = {}
+        _pk = target = None
+
+        try:
+            _pk = self._pk_field.run_validation(
+                data.get("_pk", empty) if isinstance(data, Mapping) else empty
+            )
+        except ValidationError as e:
+            errors["_pk"] = e.detail
+        else:
+            target = self._targets.get(_pk)
+            if target is None:
+                # The item can not be validated without the object
+                raise ValidationError({"_pk": self._get_unknown_pk_error(_pk)})
+
+        instance, self.child.instance = self.child.instance, target
+        try:
+            validated_data = super().run_child_validation(data)
+        except ValidationError as e:
+            errors.update(_get_error_detail(e))
+        finally:
+            self.child.instance = instance
+
+        if errors:
+            raise ValidationError(errors)
+
+        validated_data["_pk"] = _pk
+        return validated_data
+
+    def update(
+        self, instance: Any, validated_data: List[Dict[str, Any]]
+    ) -> List[DatabaseModelInstance]:
+        child = self.child
+
+        if not isinstance(child, NestedCreateUpdateMixin):
+            return super().update(instance, validated_data)
+
+        ModelClass = child.Meta.model
+
+        pks = [data.get("_pk") for data in validated_data]
+        try:
+            targets = self._targets
+        except AttributeError:
+            targets = self._get_targets(pk for pk in pks if pk is not None)
+
+        items = []
+        errors = {}
+        seen_pks = set()
+        for position, (data, _pk) in enumerate(zip(validated_data, pks)):
+            if _pk is None:
+                errors[position] = {"_pk": [Field.default_error_messages["required"]]}
+                continue
+
+            if _pk in seen_pks:
+                errors[position] = {"_pk": [f"Duplicate primary key {_pk}."]}
+                continue
+            seen_pks.add(_pk)
+
+            try:
+                target = targets[_pk]
+            except KeyError:
+                errors[position] = {"_pk": self._get_unknown_pk_error(_pk)}
+                continue
+
+            data = dict(data)
+            data.pop("_pk")
+            items.append((target, data))
+
+        if errors:
+            raise _get_positional_validation_error(errors, len(validated_data))
+
+        # The whole nested data is resolved before the first write, and
+        # any error rolls back all the writes done so far
+        with child._resolving_nested_data(child, items, many=True), transaction.atomic(
+            using=router.db_for_write(ModelClass)
+        ):
+            return child._update_level(child, ModelClass, items)
+
+    async def asave(self, **kwargs) -> List[DatabaseModelInstance]:
+        """Async version of `save`, see `NestedCreateUpdateMixin.asave`."""
+
+        thread_sensitive = _is_async_thread_sensitive(self.child.__class__)
+        return await _to_async(self.save, thread_sensitive)(**kwargs)
@@ -1,19 +1,35 @@
 """All standalone utilities."""
 
+import functools
 import logging
 
-from typing import Dict, List, TypeVar, Union, Iterable
+from typing import Dict, List, Tuple, TypeVar, Union, Iterable, Optional, Any
 
-from rest_framework.serializers import BaseSerializer
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, router, transaction
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.signals import class_prepared, m2m_changed
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.utils import model_meta
 
 
 __all__ = [
     "update_error_dict",
     "exc_dict_has_keys",
     "get_request_user_on_serializer",
+    "get_field_info",
+    "sync_many_to_many",
+    "bulk_add_many_to_many",
+    "bulk_sync_many_to_many",
+    "optimize_queryset",
 ]
 
 
+# Number of primary keys handled per query by `sync_many_to_many`
+M2M_SYNC_CHUNK_SIZE = 500
+
+
 # Default logger for `drf_ext`
 logger = logging.getLogger("drf_ext")
 logger.setLevel(logging.DEBUG)
@@ -27,6 +43,12 @@ logger.addHandler(handler)
 FieldName = TypeVar("FieldName")
 # Refers to a `User` (`AUTH_USER_MODEL` or `AnonymousUser`) instance
 User = TypeVar("User")
+# Refers to a model
+DatabaseModel = TypeVar("DatabaseModel")
+# Refers to a model instance
+DatabaseModelInstance = TypeVar("DatabaseModelInstance")
+# Refers to a queryset
+QuerySet = TypeVar("QuerySet")
 
 
 def update_error_dict(
@@ -92,3 +114,547 @@ def get_request_user_on_serializer(serializer_instance: BaseSerializer) -> User:
         ) from None
 
     return request.user
+
+
+@functools.lru_cache(maxsize=None)
+def get_field_info(model: DatabaseModel) -> model_meta.FieldInfo:
+    """Return the `FieldInfo` of the `model` class (as returned
+    by `rest_framework.utils.model_meta.get_field_info`), computed
+    once per model class for the whole process.
+
+    The returned `FieldInfo` is shared, so it must not be modified.
+
+    The cache can be cleared via `get_field_info.cache_clear()` e.g.
+    in tests. It's also cleared whenever a new model class is prepared
+    (e.g. on app registry reloads).
+    """
+
+    return model_meta.get_field_info(model)
+
+
+def _clear_field_info_cache(sender: DatabaseModel, **kwargs) -> None:
+    """`class_prepared` signal receiver to clear the cache of
+    `get_field_info`.
+    """
+
+    get_field_info.cache_clear()
+
+
+class_prepared.connect(_clear_field_info_cache, dispatch_uid="drf_ext.get_field_info")
+
+
+def _chunked(items: List[Any], chunk_size: int) -> Iterable[List[Any]]:
+    """Yield successive `chunk_size` sized chunks from `items`."""
+
+    for start in range(0, len(items), chunk_size):
+        yield items[start : start + chunk_size]
+
+
+def _can_sync_many_to_many(manager: Any) -> bool:
+    """Return whether the relations of the related `manager` can be
+    written directly as the rows of the `through` model i.e. it's a
+    (non-symmetrical) many-to-many relation with an auto-created
+    `through` model, and there are no `m2m_changed` receivers for
+    the `through` model (as no `m2m_changed` signals are sent).
+    """
+
+    through = getattr(manager, "through", None)
+
+    return not (
+        (through is None)
+        or (not through._meta.auto_created)
+        or getattr(manager, "symmetrical", False)
+        or m2m_changed.has_listeners(through)
+    )
+
+
+def _get_target_values(manager: Any, objs: Iterable[Any]) -> List[Any]:
+    """Return the PKs (or `to_field` values) of the target objects
+    `objs` (model instances or PKs) of the many-to-many related
+    `manager`, without duplicates and in input order.
+    """
+
+    target_field = manager.target_field
+
+    return list(
+        dict.fromkeys(
+            (
+                target_field.get_foreign_related_value(obj)[0]
+                if isinstance(obj, manager.model)
+                else target_field.get_prep_value(obj)
+            )
+            for obj in objs
+        )
+    )
+
+
+def sync_many_to_many(
+    instance: DatabaseModelInstance,
+    field_name: str,
+    objs: Iterable[Any],
+    created: bool = False,
+    chunk_size: int = M2M_SYNC_CHUNK_SIZE,
+) -> None:
+    """Set the related objects of the many-to-many relation `field_name`
+    of `instance` to `objs` (model instances or PKs), like the `set`
+    method of related managers does, but:
+      - the existing relations are read from the prefetched objects (if
+        any), and not read at all if `created` is `True` i.e. the
+        `instance` is just created
+      - nothing is written if the relations are unchanged
+      - the new relations are inserted via `bulk_create` (with
+        `ignore_conflicts=True`) and the stale ones are removed via
+        a single `DELETE`, both per `chunk_size` PKs
+
+    This falls back to the `set` method of the related manager for
+    relations other than many-to-many with an auto-created `through`
+    model (e.g. reverse foreign keys), symmetrical relations, and if
+    there are `m2m_changed` receivers for the `through` model (as
+    no `m2m_changed` signals are sent).
+    """
+
+    manager = getattr(instance, field_name)
+
+    if not _can_sync_many_to_many(manager):
+        manager.set(objs)
+        return None
+
+    through = manager.through
+    target_field = manager.target_field
+    source_attname = manager.source_field.attname
+    target_attname = target_field.attname
+    source_value = manager.related_val[0]
+
+    target_values = _get_target_values(manager, objs)
+
+    db = router.db_for_write(through, instance=instance)
+    through_manager = through._base_manager.using(db)
+
+    existing_values = set()
+    stale_values = []
+
+    if not created:
+        prefetch_cache = getattr(instance, "_prefetched_objects_cache", {})
+
+        try:
+            existing_rows = (
+                target_field.get_foreign_related_value(related_obj)[0]
+                for related_obj in prefetch_cache[manager.prefetch_cache_name]
+            )
+        except KeyError:
+            existing_rows = (
+                through_manager.filter(**{source_attname: source_value})
+                .values_list(target_attname, flat=True)
+                .iterator(chunk_size=chunk_size)
+            )
+
+        target_values_set = set(target_values)
+        for value in existing_rows:
+            if value in target_values_set:
+                existing_values.add(value)
+            else:
+                stale_values.append(value)
+
+    new_values = [value for value in target_values if value not in existing_values]
+
+    if not (new_values or stale_values):
+        return None
+
+    with transaction.atomic(using=db, savepoint=False):
+        for values in _chunked(stale_values, chunk_size):
+            through_manager.filter(
+                **{source_attname: source_value, f"{target_attname}__in": values}
+            ).delete()
+
+        through_manager.bulk_create(
+            [
+                through(**{source_attname: source_value, target_attname: value})
+                for value in new_values
+            ],
+            batch_size=chunk_size,
+            ignore_conflicts=True,
+        )
+
+    manager._remove_prefetched_objects()
+
+    return None
+
+
+def bulk_add_many_to_many(
+    instances: List[DatabaseModelInstance],
+    field_name: str,
+    objs_list: List[Iterable[Any]],
+    chunk_size: int = M2M_SYNC_CHUNK_SIZE,
+) -> None:
+    """Add the related objects `objs_list` (an iterable of model
+    instances or PKs per instance) to the many-to-many relation
+    `field_name` of the newly created `instances` (of the same model),
+    by inserting the `through` model rows of all of them via a single
+    `bulk_create` (with `ignore_conflicts=True`) per `chunk_size` rows.
+
+    This falls back to `sync_many_to_many` for each instance when the
+    rows can not be written directly (see `sync_many_to_many`).
+    """
+
+    if not instances:
+        return None
+
+    manager = getattr(instances[0], field_name)
+
+    if not _can_sync_many_to_many(manager):
+        for instance, objs in zip(instances, objs_list):
+            sync_many_to_many(instance, field_name, objs, created=True)
+        return None
+
+    through = manager.through
+    source_field = manager.source_field
+    source_attname = source_field.attname
+    target_attname = manager.target_field.attname
+
+    rows = [
+        through(
+            **{
+                source_attname: source_field.get_foreign_related_value(instance)[0],
+                target_attname: value,
+            }
+        )
+        for instance, objs in zip(instances, objs_list)
+        for value in _get_target_values(manager, objs)
+    ]
+
+    if rows:
+        db = router.db_for_write(through, instance=instances[0])
+        with transaction.atomic(using=db, savepoint=False):
+            through._base_manager.using(db).bulk_create(
+                rows, batch_size=chunk_size, ignore_conflicts=True
+            )
+
+    return None
+
+
+def bulk_sync_many_to_many(
+    instances: List[DatabaseModelInstance],
+    field_name: str,
+    objs_list: List[Iterable[Any]],
+    chunk_size: int = M2M_SYNC_CHUNK_SIZE,
+) -> None:
+    """Same as `sync_many_to_many` for the existing `instances` (of the
+    same model), with `objs_list` being an iterable of model instances
+    or PKs per instance, but the relations of all of them are synced
+    together i.e. the existing relations are read via a single query,
+    the stale ones are removed via a single `DELETE` and the new ones
+    are inserted via a single `bulk_create`, all per `chunk_size` rows.
+
+    This falls back to `sync_many_to_many` for each instance when the
+    rows can not be written directly (see `sync_many_to_many`).
+    """
+
+    if not instances:
+        return None
+
+    manager = getattr(instances[0], field_name)
+
+    if not _can_sync_many_to_many(manager):
+        for instance, objs in zip(instances, objs_list):
+            sync_many_to_many(instance, field_name, objs)
+        return None
+
+    through = manager.through
+    source_field = manager.source_field
+    source_attname = source_field.attname
+    target_attname = manager.target_field.attname
+
+    source_values = [
+        source_field.get_foreign_related_value(instance)[0] for instance in instances
+    ]
+
+    db = router.db_for_write(through, instance=instances[0])
+    through_manager = through._base_manager.using(db)
+
+    # Source value -> {target value: PK of the `through` model row}
+    existing_rows: Dict[Any, Dict[Any, Any]] = {}
+    for values in _chunked(list(dict.fromkeys(source_values)), chunk_size):
+        rows = through_manager.filter(**{f"{source_attname}__in": values}).values_list(
+            "pk", source_attname, target_attname
+        )
+        for pk, source_value, target_value in rows:
+            existing_rows.setdefault(source_value, {})[target_value] = pk
+
+    stale_pks = []
+    new_values_list = []
+    for source_value, objs in zip(source_values, objs_list):
+        target_values = _get_target_values(manager, objs)
+        rows = existing_rows.get(source_value, {})
+
+        target_values_set = set(target_values)
+        stale_pks.extend(
+            pk for value, pk in rows.items() if value not in target_values_set
+        )
+        new_values_list.append([value for value in target_values if value not in rows])
+
+    if not (stale_pks or any(new_values_list)):
+        return None
+
+    with transaction.atomic(using=db, savepoint=False):
+        for pks in _chunked(stale_pks, chunk_size):
+            through_manager.filter(pk__in=pks).delete()
+
+        bulk_add_many_to_many(instances, field_name, new_values_list, chunk_size)
+
+    for instance in instances:
+        getattr(instance, field_name)._remove_prefetched_objects()
+
+    return None
+
+
+class _ReadPlan:
+    """The lookups to read the objects serialized by a serializer
+    class with, as compiled by `_compile_read_plan`.
+    """
+
+    __slots__ = ("select_related", "prefetches", "only")
+
+    def __init__(
+        self,
+        select_related: Tuple[str, ...],
+        prefetches: Tuple[Tuple[str, DatabaseModel, "_ReadPlan"], ...],
+        only: Optional[Tuple[str, ...]],
+    ) -> None:
+        self.select_related = select_related
+        # (lookup, related model, plan of the related objects)
+        self.prefetches = prefetches
+        # `None` for all fields
+        self.only = only
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        """Return the `queryset` with the lookups applied. The lookups
+        of the `queryset` itself are kept: the relations joined or
+        prefetched by those are loaded too, and the prefetches of the
+        plan that are prefetched by those already are skipped.
+        """
+
+        only = self.only
+        existing_select_related = queryset.query.select_related
+        existing_prefetches = [
+            getattr(lookup, "prefetch_to", lookup)
+            for lookup in queryset._prefetch_related_lookups
+        ]
+
+        # All the relations are joined, which needs all the fields
+        if existing_select_related is True:
+            only = None
+        elif only is not None:
+            only = {
+                *only,
+                *_get_select_related_paths(existing_select_related or {}),
+                *(
+                    path
+                    for lookup in existing_prefetches
+                    for path in _get_to_one_paths(queryset.model, lookup)
+                ),
+            }
+
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+
+        prefetches = [
+            (lookup, related_model, plan)
+            for lookup, related_model, plan in self.prefetches
+            if not any(
+                (existing == lookup) or existing.startswith(f"{lookup}{LOOKUP_SEP}")
+                for existing in existing_prefetches
+            )
+        ]
+        if prefetches:
+            queryset = queryset.prefetch_related(
+                *(
+                    models.Prefetch(
+                        lookup,
+                        queryset=plan.apply(related_model._default_manager.all()),
+                    )
+                    for lookup, related_model, plan in prefetches
+                )
+            )
+
+        if only is not None:
+            queryset = queryset.only(*sorted(only))
+
+        return queryset
+
+
+def _get_select_related_paths(
+    select_related: Dict[str, Any], prefix: str = ""
+) -> List[str]:
+    """Return the paths of the relations in the `select_related` of a
+    query (a nested dict e.g. `{"user": {"address": {}}}`), e.g.
+    `["user", "user__address"]`.
+    """
+
+    paths = []
+    for name, nested in select_related.items():
+        path = f"{prefix}{name}"
+        paths.append(path)
+        paths.extend(_get_select_related_paths(nested, f"{path}{LOOKUP_SEP}"))
+
+    return paths
+
+
+def _get_to_one_paths(model: DatabaseModel, lookup: str) -> List[str]:
+    """Return the paths of the "to one" relations (from `model`) that
+    the prefetch `lookup` goes through before the first "to many" one,
+    e.g. `["user"]` for "user__groups".
+    """
+
+    paths = []
+    for name in lookup.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            break
+
+        if (not field.is_relation) or field.many_to_many or field.one_to_many:
+            break
+
+        paths.append(f"{paths[-1]}{LOOKUP_SEP}{name}" if paths else name)
+        model = field.related_model
+
+    return paths
+
+
+def _compile_read_plan(
+    serializer: BaseSerializer, model: DatabaseModel, extra_fields: Iterable[str] = ()
+) -> _ReadPlan:
+    """Compile the `_ReadPlan` of the readable fields of the `serializer`
+    instance (of `model`), following the nested serializers: "to one"
+    relations are joined via `select_related` (recursively), and "to
+    many" ones are prefetched (with their own plans). `extra_fields`
+    are loaded along with the fields needed by the serializer.
+    """
+
+    select_related = []
+    prefetches = []
+    only = set()
+
+    def _walk(serializer, model, prefix, level_fields):
+        opts = model._meta
+        concrete_fields = {field.name for field in opts.concrete_fields}
+        relations = get_field_info(model).relations
+        reverse_relations = {
+            relation.get_accessor_name(): relation for relation in opts.related_objects
+        }
+
+        level_only = {opts.pk.name, *level_fields}
+        all_fields = False
+
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+
+            # e.g. `SerializerMethodField` (source is "*"), or a source
+            # spanning relations
+            if len(field.source_attrs) != 1:
+                all_fields = True
+                continue
+
+            source = field.source_attrs[0]
+            if source == "pk":
+                continue
+
+            if source not in relations:
+                if source in concrete_fields:
+                    level_only.add(source)
+                else:
+                    # e.g. a property, which can need any field
+                    all_fields = True
+                continue
+
+            relation_info = relations[source]
+            related_model = relation_info.related_model
+            lookup = f"{prefix}{source}"
+
+            if not (relation_info.reverse or relation_info.to_many):
+                level_only.add(source)
+
+            # The field on the related model referring to this one, which is
+            # needed to match the prefetched (or joined) related objects
+            remote_fields = ()
+            reverse_relation = reverse_relations.get(source)
+            if (reverse_relation is not None) and not isinstance(
+                reverse_relation, models.ManyToManyRel
+            ):
+                remote_fields = (reverse_relation.field.name,)
+
+            if isinstance(field, ListSerializer):
+                prefetches.append(
+                    (
+                        lookup,
+                        related_model,
+                        _compile_read_plan(field.child, related_model, remote_fields),
+                    )
+                )
+            elif isinstance(field, ManyRelatedField):
+                child_relation = field.child_relation
+                plan = _ReadPlan((), (), None)
+                if child_relation.use_pk_only_optimization():
+                    plan = _ReadPlan(
+                        (),
+                        (),
+                        (related_model._meta.pk.name, *remote_fields),
+                    )
+                prefetches.append((lookup, related_model, plan))
+            elif isinstance(field, BaseSerializer):
+                select_related.append(lookup)
+                _walk(field, related_model, f"{lookup}__", remote_fields)
+            elif isinstance(field, RelatedField):
+                # Only the PK is needed, which is on this model (for
+                # forward relations) or available after joining
+                if relation_info.reverse or not field.use_pk_only_optimization():
+                    select_related.append(lookup)
+                    only.update(
+                        f"{lookup}__{related_field.name}"
+                        for related_field in related_model._meta.concrete_fields
+                    )
+            else:
+                all_fields = True
+
+        if all_fields:
+            level_only.update(concrete_fields)
+
+        only.update(f"{prefix}{field_name}" for field_name in level_only)
+
+    _walk(serializer, model, "", extra_fields)
+
+    return _ReadPlan(tuple(select_related), tuple(prefetches), tuple(sorted(only)))
+
+
+def optimize_queryset(
+    serializer_class: type, queryset: Optional[QuerySet] = None
+) -> QuerySet:
+    """Return the `queryset` (all the objects of the serializer model
+    by default) with the `select_related`, `prefetch_related` and `only`
+    lookups needed to serialize the objects with `serializer_class`
+    (i.e. following the nested serializers), so that serializing any
+    number of objects needs a constant number of queries: one, plus
+    one per (nested) "to many" relation.
+
+    The lookups are computed once per serializer class (from the fields
+    of a serializer instance without context). All the fields of a
+    model are loaded if any of its serializer fields has a source that
+    is not a model field or relation (e.g. `SerializerMethodField` or
+    a property), as that can need any field.
+    """
+
+    model = serializer_class.Meta.model
+
+    if queryset is None:
+        queryset = model._default_manager.all()
+
+    # Looking at the class `__dict__` as the plan must not
+    # be inherited from the superclasses
+    try:
+        plan = serializer_class.__dict__["_read_plan"]
+    except KeyError:
+        plan = _compile_read_plan(serializer_class(), model)
+        serializer_class._read_plan = plan
+
+    return plan.apply(queryset)
@@ -0,0 +1,34 @@
+"""View mixins that are used along with the serializer
+extensions of `drf_ext`.
+"""
+
+# mypy: ignore-errors
+
+from typing import TypeVar
+
+from .utils import optimize_queryset
+
+
+__all__ = ["OptimizedQuerySetMixin"]
+
+
+# Custom type hints
+QuerySet = TypeVar("QuerySet")  # refers to a queryset
+
+
+class OptimizedQuerySetMixin:
+    """Mixin for generic views (e.g. `ListAPIView`, `ModelViewSet`)
+    to apply the `select_related`/`prefetch_related`/`only` lookups
+    needed by the serializer class of the view (following the nested
+    serializers) to the queryset, see `drf_ext.utils.optimize_queryset`.
+    For example:
+
+        class ClientListView(OptimizedQuerySetMixin, generics.ListAPIView):
+            queryset = Client.objects.all()
+            serializer_class = ClientSerializer
+
+    So listing any number of objects runs a constant number of queries.
+    """
+
+    def get_queryset(self) -> QuerySet:
+        return optimize_queryset(self.get_serializer_class(), super().get_queryset())
@@ -0,0 +1,6 @@
+"""Benchmarks for the nested writes, see `__main__`."""
+
+import os
+
+# The committed results that the future ones are compared against
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
@@ -0,0 +1,113 @@
+"""Benchmark the nested writes on the `sample_app` models.
+
+Records the number of queries, wall time and peak memory of saving
+nested payloads of different depth, to-many width and M2M fan-out,
+on an in-memory SQLite database. For example:
+
+    tests$ PYTHONPATH=.. python -m benchmarks --compare benchmarks/baseline.json
+
+Pass `--output benchmarks/baseline.json` to update the baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+
+import django
+
+from . import BASELINE
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks", description="Benchmark the nested writes."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per scenario (default: 5)."
+    )
+    parser.add_argument(
+        "--output", help="Write the results (JSON) to this file instead of stdout."
+    )
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=BASELINE,
+        help=(
+            "Compare the results against this baseline file (default: "
+            "benchmarks/baseline.json), exit with 1 on regressions."
+        ),
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=1.0,
+        help="Allowed wall time increase as a fraction (default: 1.0).",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed peak memory increase as a fraction (default: 0.5).",
+    )
+    return parser
+
+
+def main() -> int:
+    args = _get_parser().parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sample_project.settings")
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    import rest_framework
+
+    from .scenarios import run_scenarios, compare_results
+
+    # Queries are only recorded with `DEBUG`
+    settings.DEBUG = True
+    setup_test_environment(debug=True)
+    # In-memory SQLite database
+    connection.creation.create_test_db(verbosity=0)
+
+    results = run_scenarios(args.repeat)
+
+    output = json.dumps(
+        {
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "djangorestframework": rest_framework.VERSION,
+                "database": f"{connection.vendor} {connection.Database.sqlite_version}",
+            },
+            "scenarios": results,
+        },
+        indent=2,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["scenarios"]
+
+        regressions = compare_results(
+            results, baseline, args.time_tolerance, args.memory_tolerance
+        )
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
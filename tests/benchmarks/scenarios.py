@@ -0,0 +1,253 @@
+"""Nested write scenarios on the `sample_app` models, and the
+measuring of those.
+
+Django must be set up before importing this module (see
+`benchmarks.__main__`).
+"""
+
+import statistics
+import time
+import tracemalloc
+
+from itertools import product
+from typing import Dict, List, Any, NamedTuple
+
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from drf_ext import NestedCreateUpdateMetaclass
+
+from sample_app.models import Address, Client, Tag
+
+
+class TagSerializer(serializers.ModelSerializer):
+
+    # `NestedCreateUpdateMetaclass` does not add the `_pk`
+    # field to "to many" nested serializers
+    _pk = serializers.IntegerField(write_only=True, required=False)
+
+    class Meta:
+        model = Tag
+        fields = ("pk", "_pk", "name")
+
+
+class AddressSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    tags = TagSerializer(many=True, required=False)
+
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+
+
+class UserSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    address = AddressSerializer()
+
+    class Meta:
+        model = User
+        fields = ("pk", "username", "password", "address")
+
+
+class ClientSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    user = UserSerializer()
+
+    class Meta:
+        model = Client
+        fields = ("pk", "user")
+
+
+# Outermost serializer per payload depth
+SERIALIZERS = {
+    1: AddressSerializer,
+    2: UserSerializer,
+    3: ClientSerializer,
+}
+
+OPERATIONS = ("create", "update")
+DEPTHS = tuple(SERIALIZERS)
+# Number of new nested `Tag`s per `Address`
+WIDTHS = (1, 10, 50)
+# Number of existing `Tag`s (referred by `_pk`) per `Address`
+FAN_OUTS = (0, 10, 50)
+
+
+class Scenario(NamedTuple):
+    operation: str
+    depth: int
+    width: int
+    fan_out: int
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.operation}-depth_{self.depth}-"
+            f"width_{self.width}-fan_out_{self.fan_out}"
+        )
+
+
+class Result(NamedTuple):
+    # Number of queries of a single run
+    queries: int
+    # Median wall time of all runs, in milliseconds
+    time_ms: float
+    # Peak memory allocated (as traced by `tracemalloc`) by a
+    # single run, in KiB
+    peak_memory_kib: float
+
+
+def get_scenarios() -> List[Scenario]:
+    """Return all the scenarios i.e. all combinations of
+    operation, payload depth, to-many width and M2M fan-out.
+    """
+
+    return [
+        Scenario(*params) for params in product(OPERATIONS, DEPTHS, WIDTHS, FAN_OUTS)
+    ]
+
+
+def _get_serializer(scenario: Scenario) -> serializers.ModelSerializer:
+    """Create the objects needed by the `scenario`, and return the
+    outermost serializer with the payload (validated) to be saved.
+    """
+
+    existing_tags = Tag.objects.bulk_create(
+        [Tag(name=f"old_{num}") for num in range(scenario.fan_out)]
+    )
+
+    tags_data = [dict(name=f"new_{num}") for num in range(scenario.width)]
+    tags_data += [dict(_pk=tag.pk, name=f"upd_{tag.pk}") for tag in existing_tags]
+
+    data = dict(state="CA", zip_code="12345", tags=tags_data)
+    if scenario.depth >= 2:
+        data = dict(username="username", password="password", address=data)
+    if scenario.depth >= 3:
+        data = dict(user=data)
+
+    instance = None
+    if scenario.operation == "update":
+        user = User.objects.create(username="old_username", password="password")
+        address = Address.objects.create(user=user, state="NY", zip_code="67890")
+        address.tags.set(existing_tags)
+        client = Client.objects.create(user=user)
+
+        if scenario.depth == 1:
+            instance = address
+        elif scenario.depth == 2:
+            instance = user
+            data["address"]["_pk"] = address.pk
+        else:
+            instance = client
+            data["user"]["_pk"] = user.pk
+            data["user"]["address"]["_pk"] = address.pk
+
+    serializer = SERIALIZERS[scenario.depth](instance, data=data)
+    serializer.is_valid(raise_exception=True)
+
+    return serializer
+
+
+def run_scenario(scenario: Scenario, repeat: int = 5) -> Result:
+    """Run the `scenario` `repeat` times and return the measurements
+    of saving the serializer; the setup (including validation) is
+    not measured. Each run is rolled back, so the database is left
+    as-is.
+    """
+
+    queries = []
+    times = []
+    peak_memories = []
+
+    for _ in range(repeat):
+        with transaction.atomic():
+            serializer = _get_serializer(scenario)
+
+            # The query log is bounded, which breaks the counting
+            reset_queries()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                serializer.save()
+                times.append(time.perf_counter() - start)
+            queries.append(len(ctx.captured_queries))
+
+            transaction.set_rollback(True)
+
+        # Memory is traced on a separate run, as tracing slows
+        # down everything
+        with transaction.atomic():
+            serializer = _get_serializer(scenario)
+
+            tracemalloc.start()
+            try:
+                serializer.save()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peak_memories.append(peak)
+
+            transaction.set_rollback(True)
+
+    return Result(
+        queries=max(queries),
+        time_ms=round(statistics.median(times) * 1000, 3),
+        peak_memory_kib=round(max(peak_memories) / 1024, 1),
+    )
+
+
+def run_scenarios(repeat: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Run all the scenarios and return the results as a dict with
+    the scenario names as keys.
+    """
+
+    return {
+        scenario.name: run_scenario(scenario, repeat)._asdict()
+        for scenario in get_scenarios()
+    }
+
+
+def compare_results(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    time_tolerance: float = 1.0,
+    memory_tolerance: float = 0.5,
+) -> List[str]:
+    """Compare the `results` against the `baseline` (both as returned
+    by `run_scenarios`), and return the regressions as messages.
+
+    Query counts are compared strictly, while wall time and peak
+    memory can exceed the baseline by the `time_tolerance` and
+    `memory_tolerance` fractions respectively (as they depend on the
+    machine).
+    """
+
+    regressions = []
+
+    for name, result in results.items():
+        try:
+            base = baseline[name]
+        except KeyError:
+            continue
+
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, " f"baseline {base['queries']}"
+            )
+
+        if result["time_ms"] > base["time_ms"] * (1 + time_tolerance):
+            regressions.append(
+                f"{name}: {result['time_ms']} ms, baseline {base['time_ms']} ms"
+            )
+
+        if result["peak_memory_kib"] > base["peak_memory_kib"] * (1 + memory_tolerance):
+            regressions.append(
+                f"{name}: {result['peak_memory_kib']} KiB peak memory, "
+                f"baseline {base['peak_memory_kib']} KiB"
+            )
+
+    return regressions
@@ -0,0 +1,30 @@
+"""Guard the nested write benchmarks against the committed baseline,
+with the same checks as `python -m benchmarks --compare`.
+"""
+
+import json
+
+import pytest
+
+from . import BASELINE
+from .scenarios import get_scenarios, run_scenario, compare_results
+
+with open(BASELINE) as f:
+    baseline = json.load(f)["scenarios"]
+
+
+# The bigger scenarios only add more of the same queries
+@pytest.mark.parametrize(
+    "scenario",
+    [
+        scenario
+        for scenario in get_scenarios()
+        if (scenario.width <= 10) and (scenario.fan_out <= 10)
+    ],
+    ids=lambda scenario: scenario.name,
+)
+def test_does_not_regress_from_baseline(db, scenario):
+    result = run_scenario(scenario)
+
+    # Query counts, wall time and peak memory
+    assert not compare_results({scenario.name: result._asdict()}, baseline)
@@ -0,0 +1,3 @@
+"""Root pytest configuration."""
+
+pytest_plugins = ["drf_ext.pytest_plugin"]
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from rest_framework import serializers
+
+from drf_ext import NestedCreateUpdateMetaclass
+
+from .models import Client
+
+
+class UserSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    class Meta:
+        model = User
+        fields = ("pk", "username", "password")
+
+
+class ClientSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    user = UserSerializer()
+
+    class Meta:
+        model = Client
+        fields = ("pk", "user")
+
+        # The writes of `asave` are run in a thread pool
+        async_thread_sensitive = False
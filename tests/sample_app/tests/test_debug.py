@@ -0,0 +1,87 @@
+"""Tests for stuffs inside drf_ext.debug"""
+
+import logging
+
+import pytest
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from drf_ext import optimize_queryset
+from drf_ext.debug import NPlusOneDetector, NPlusOneError, NPlusOneMiddleware
+
+from sample_app.models import Client
+from .factories import ClientFactory
+from .test_serializers import ClientSerializer as NestedClientSerializer
+from .test_utils import ClientSerializer
+
+
+class TestNPlusOneDetector:
+    def test_representation(self, tags):
+        for client in ClientFactory.create_batch(3):
+            client.user.address.tags.set(tags[:2])
+
+        with pytest.raises(NPlusOneError) as exc_info:
+            with NPlusOneDetector():
+                ClientSerializer(Client.objects.all(), many=True).data
+
+        queries = {query.path: query for query in exc_info.value.queries}
+        assert queries["user"].count == 3
+        assert queries["user"].serializer.endswith("test_utils.ClientSerializer")
+        assert queries["user.address.tags"].count == 3
+        assert queries["user.address.tags"].serializer.endswith(
+            "test_utils.AddressSerializer"
+        )
+
+        # Under the threshold
+        with NPlusOneDetector(threshold=3) as detector:
+            ClientSerializer(Client.objects.all(), many=True).data
+        assert not detector.queries
+
+    def test_optimized_representation(self, tags, n_plus_one):
+        for client in ClientFactory.create_batch(3):
+            client.user.address.tags.set(tags[:2])
+
+        queryset = optimize_queryset(ClientSerializer, Client.objects.all())
+        assert len(ClientSerializer(queryset, many=True).data) == 3
+
+    def test_save(self, tag):
+        data = [
+            dict(
+                user=dict(
+                    username=f"user_{num}",
+                    password="password",
+                    address=dict(state="CA", zip_code=f"{num:05}"),
+                )
+            )
+            for num in range(3)
+        ]
+        serializer = NestedClientSerializer(data=data, many=True)
+        assert serializer.is_valid(raise_exception=True)
+
+        # `User`s are saved one by one as the model has a custom `save`
+        with NPlusOneDetector(raise_error=False) as detector:
+            serializer.save()
+
+        assert Client.objects.count() == 3
+        assert any(
+            query.count == 3 and query.sql.startswith("INSERT")
+            for query in detector.queries
+        )
+
+    def test_middleware(self, client, caplog):
+        def _get_response(request):
+            ClientSerializer(Client.objects.all(), many=True).data
+            return HttpResponse()
+
+        ClientFactory.create()
+        middleware = NPlusOneMiddleware(_get_response)
+        request = RequestFactory().get("/clients/")
+
+        with caplog.at_level(logging.WARNING, logger="drf_ext"):
+            middleware(request)
+            assert not caplog.records
+
+            with override_settings(DRF_EXT_N_PLUS_ONE_DETECTION=True):
+                middleware(request)
+            assert "N+1 queries on GET /clients/" in caplog.text
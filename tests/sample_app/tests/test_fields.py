@@ -0,0 +1,102 @@
+"""Tests for stuffs inside drf_ext.fields"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from drf_ext.fields import BatchedManyRelatedField
+from drf_ext.metaclasses import NestedCreateUpdateMetaclass
+
+from sample_app.models import Address, Tag
+from .factories import TagFactory
+
+
+class AddressSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+
+        batch_many_related_fields = True
+
+
+class RevalidatingAddressSerializer(AddressSerializer):
+    class Meta(AddressSerializer.Meta):
+        revalidate_nested_data = True
+
+
+class TestBatchedManyRelatedField:
+    def test_is_set_with_meta_option(self):
+        assert isinstance(AddressSerializer().fields["tags"], BatchedManyRelatedField)
+
+        class Serializer(AddressSerializer):
+            class Meta(AddressSerializer.Meta):
+                batch_many_related_fields = False
+
+        assert not isinstance(Serializer().fields["tags"], BatchedManyRelatedField)
+
+    def test_pks_are_fetched_in_one_query(self, db):
+        tags = TagFactory.create_batch(200)
+        tags_pk = [tag.pk for tag in reversed(tags)] + [tags[0].pk]
+
+        serializer = AddressSerializer(
+            data=dict(state="CA", zip_code="12345", tags=tags_pk)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            assert serializer.is_valid(raise_exception=True)
+
+        assert len(ctx.captured_queries) == 1
+        # In the input order, with the duplicates
+        assert [tag.pk for tag in serializer.validated_data["tags"]] == tags_pk
+
+        address = serializer.save()
+        assert address.tags.count() == 200
+
+    def test_errors(self, tag):
+        serializer = AddressSerializer(
+            data=dict(state="CA", zip_code="12345", tags=[0, tag.pk, "foo", -1, True])
+        )
+        assert not serializer.is_valid()
+
+        assert serializer.errors["tags"] == [
+            'Invalid pk "0" - object does not exist.',
+            "Incorrect type. Expected pk value, received str.",
+            'Invalid pk "-1" - object does not exist.',
+            "Incorrect type. Expected pk value, received bool.",
+        ]
+
+        serializer = AddressSerializer(
+            data=dict(state="CA", zip_code="12345", tags=[None, tag.pk])
+        )
+        assert not serializer.is_valid()
+        assert serializer.errors["tags"] == [
+            'Invalid pk "None" - object does not exist.'
+        ]
+
+        serializer = AddressSerializer(
+            data=dict(state="CA", zip_code="12345", tags="foo")
+        )
+        assert not serializer.is_valid()
+        assert "tags" in serializer.errors
+
+    def test_with_nested_data_revalidation(self, tags):
+        class UserSerializer(
+            serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+        ):
+            address = RevalidatingAddressSerializer()
+
+            class Meta:
+                model = Address.user.field.related_model
+                fields = ("pk", "username", "password", "address")
+
+                revalidate_nested_data = True
+
+        address_data = dict(state="CA", zip_code="12345", tags=[tag.pk for tag in tags])
+        serializer = UserSerializer(
+            data=dict(username="username", password="password", address=address_data)
+        )
+        assert serializer.is_valid(raise_exception=True)
+
+        user = serializer.save()
+        assert list(user.address.tags.all()) == list(Tag.objects.order_by("pk"))
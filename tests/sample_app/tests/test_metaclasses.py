@@ -1,5 +1,8 @@
 """Tests for all metaclasses."""
 
+import threading
+import time
+
 import pytest
 
 from django.contrib.auth.models import User
@@ -7,15 +10,19 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.utils import model_meta
 
+import drf_ext.metaclasses
 from drf_ext.metaclasses import (
     NestedCreateUpdateMetaclass,
     FieldOptionsMetaclass,
     ExtendedSerializerMetaclass,
     InheritableExtendedSerializerMetaclass,
+    warm_up_serializers,
     _get_meta_fields,
+    _pending_field_options,
     NON_FIELD_ERRORS_KEY,
 )
 
+from drf_ext.mixins import NestedCreateUpdateMixin
 from drf_ext.utils import exc_dict_has_keys
 
 from sample_app.models import Address, Client
@@ -155,16 +162,71 @@ class TestNestedCreateUpdateMetaclass:
                 model = User
                 fields = ("address",)
 
-        assert (
-            UserSerializer._declared_fields["address"].__class__.Meta.fields
-            == AddressSerializer.Meta.fields
+        # A subclass with `_pk` is used; `AddressSerializer` is left as-is
+        assert isinstance(UserSerializer._declared_fields["address"], AddressSerializer)
+        assert UserSerializer._declared_fields["address"].Meta.fields == (
+            "state",
+            "zip_code",
+            "_pk",
         )
-        assert (
-            UserSerializer._declared_fields["address"].Meta.fields
-            == AddressSerializer.Meta.fields
-        )
-        assert "_pk" in UserSerializer._declared_fields["address"].Meta.fields
-        assert "_pk" in AddressSerializer().fields
+        assert "_pk" in UserSerializer._declared_fields["address"].fields
+        assert AddressSerializer.Meta.fields == ("state", "zip_code")
+        assert "_pk" not in AddressSerializer().fields
+
+    def test_nested_serializer_subclass_is_created_once(self):
+        class AddressSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Address
+                fields = ("state", "zip_code")
+
+        class UserSerializer(
+            serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+        ):
+            address = AddressSerializer(required=False)
+
+            class Meta:
+                model = User
+                fields = ("address",)
+
+        class ClientUserSerializer(
+            serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+        ):
+            address = AddressSerializer()
+
+            class Meta:
+                model = User
+                fields = ("address",)
+
+        user_address = UserSerializer._declared_fields["address"]
+        client_user_address = ClientUserSerializer._declared_fields["address"]
+
+        assert user_address.__class__ is client_user_address.__class__
+        assert user_address.__class__.__name__ == "AddressSerializer"
+        # Declared arguments are kept
+        assert not user_address.required
+        assert client_user_address.required
+        assert user_address.Meta.fields == ("state", "zip_code", "_pk")
+
+    def test_subclass_of_serializer_with_metaclass(self):
+        class AddressSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Address
+                fields = ("state", "zip_code")
+
+        class UserSerializer(
+            serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+        ):
+            address = AddressSerializer()
+
+            class Meta:
+                model = User
+                fields = ("address",)
+
+        class SubUserSerializer(UserSerializer):
+            class Meta(UserSerializer.Meta):
+                pass
+
+        assert SubUserSerializer.__mro__.count(NestedCreateUpdateMixin) == 1
 
     def test_depth_1_nested_serializer_valid_data_on_create(self, db):
         address_data = dict(state="CA", zip_code="12345")
@@ -290,6 +352,33 @@ class TestFieldOptionsMetaclass:
         serializer = AddressSerializer(data={"state": "CA"})
         assert serializer.is_valid(raise_exception=False)
 
+    def test_required_fields_on_create_for_nested_serializer(self, db):
+        class AddressSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+                read_only_fields = ("pk",)
+
+                required_fields_on_create = ("zip_code",)
+
+        class UserSerializer(
+            serializers.ModelSerializer, metaclass=ExtendedSerializerMetaclass
+        ):
+            address = AddressSerializer()
+
+            class Meta:
+                model = User
+                fields = ("username", "address")
+
+        data = dict(username="username", address=dict(state="CA"))
+        serializer = UserSerializer(data=data)
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.is_valid(raise_exception=True)
+        assert exc_dict_has_keys(exc_info.value, "address")
+        assert "zip_code" in exc_info.value.detail["address"]
+
     def test_same_required_field_in_update_and_update_any(self):
         with pytest.raises(ValueError) as exc_info:
 
@@ -482,6 +571,164 @@ class TestFieldOptionsMetaclass:
         with pytest.raises(KeyError):
             assert extra_kwargs["zip_code"]
 
+    def test_non_required_fields_default_is_deferred(self, monkeypatch):
+        calls = []
+        get_fields_orig = serializers.ModelSerializer.get_fields
+
+        def get_fields(self):
+            calls.append(self.__class__.__name__)
+            return get_fields_orig(self)
+
+        monkeypatch.setattr(serializers.ModelSerializer, "get_fields", get_fields)
+
+        class AddressSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+
+        # Nothing is built on class creation
+        assert calls == []
+        assert "state" not in AddressSerializer.Meta.extra_kwargs
+
+        serializer = AddressSerializer(data={})
+        assert serializer.is_valid(raise_exception=True)
+        assert not AddressSerializer.Meta.extra_kwargs["state"]["required"]
+
+        # Only once (plus for the `serializer` fields)
+        calls.clear()
+        assert AddressSerializer(data={}).is_valid(raise_exception=True)
+        assert calls == ["AddressSerializer"]
+
+    def test_warm_up_serializers(self):
+        class AddressSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+
+        class ClientSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Client
+                fields = ("pk", "user")
+
+        warm_up_serializers(AddressSerializer)
+        assert not AddressSerializer.Meta.extra_kwargs["zip_code"]["required"]
+        assert "user" not in ClientSerializer.Meta.extra_kwargs
+
+        # All the pending serializers
+        warm_up_serializers()
+        assert not ClientSerializer.Meta.extra_kwargs["user"]["required"]
+
+    def test_deferred_non_required_fields_across_threads(self):
+        class AddressSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+
+        apply_field_options = _pending_field_options[AddressSerializer]
+        applying, proceed = threading.Event(), threading.Event()
+
+        def _apply_field_options(cls):
+            applying.set()
+            proceed.wait(timeout=5)
+            apply_field_options(cls)
+
+        _pending_field_options[AddressSerializer] = _apply_field_options
+
+        required = []
+        warm_up = threading.Thread(
+            target=warm_up_serializers, args=(AddressSerializer,)
+        )
+        get_fields = threading.Thread(
+            target=lambda: required.append(
+                AddressSerializer().get_fields()["zip_code"].required
+            )
+        )
+
+        warm_up.start()
+        assert applying.wait(timeout=5)
+        get_fields.start()
+        time.sleep(0.1)
+        proceed.set()
+        warm_up.join()
+        get_fields.join()
+
+        # The other thread waits for the options to be applied
+        assert required == [False]
+        assert AddressSerializer not in _pending_field_options
+
+    def test_applied_field_options_are_not_looked_up_again(self, monkeypatch):
+        class PendingSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+
+        class AddressSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+                non_required_fields = ("state",)
+
+        class Lock:
+            def __init__(self):
+                self.lock = threading.RLock()
+                self.count = 0
+
+            def __enter__(self):
+                self.count += 1
+                return self.lock.__enter__()
+
+            def __exit__(self, *args):
+                return self.lock.__exit__(*args)
+
+        lock = Lock()
+        monkeypatch.setattr(drf_ext.metaclasses, "_field_options_lock", lock)
+
+        for _ in range(3):
+            AddressSerializer().get_fields()
+
+        # Only on the first use, while the other serializer is pending
+        assert lock.count == 1
+        assert PendingSerializer in _pending_field_options
+
+        for _ in range(3):
+            PendingSerializer().get_fields()
+
+        # Once more, plus once on applying (which builds the fields)
+        assert lock.count == 3
+        assert PendingSerializer not in _pending_field_options
+
+    def test_deferred_non_required_fields_with_common_field_params(self):
+        class AddressSerializer(
+            serializers.ModelSerializer, metaclass=FieldOptionsMetaclass
+        ):
+            state = serializers.CharField()
+
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+
+                common_field_params = {
+                    ("state", "zip_code"): {"required": True},
+                }
+
+        serializer = AddressSerializer(data={})
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.is_valid(raise_exception=True)
+        # `common_field_params` take precedence
+        assert exc_dict_has_keys(exc_info.value, ("state", "zip_code"))
+
 
 class TestExtendedSerializerMetaclass:
     def test_types(self):
@@ -495,6 +742,19 @@ class TestExtendedSerializerMetaclass:
         assert isinstance(Serializer, NestedCreateUpdateMetaclass)
         assert isinstance(Serializer, FieldOptionsMetaclass)
 
+    def test_field_templates_with_deferred_non_required_fields(self):
+        class Serializer(
+            serializers.ModelSerializer, metaclass=ExtendedSerializerMetaclass
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code")
+                cache_field_templates = True
+
+        # The templates are built after applying the options
+        assert Serializer(data={}).is_valid(raise_exception=True)
+        assert not Serializer().fields["state"].required
+
 
 class TestInheritableExtendedSerializerMetaclass:
     def test_declared_fields(self):
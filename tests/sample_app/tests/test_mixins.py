@@ -1,16 +1,25 @@
 """Test all mixins."""
 
+import json
+import threading
+
 import pytest
 
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+import drf_ext.mixins
 from drf_ext.mixins import NestedCreateUpdateMixin
 from drf_ext.utils import exc_dict_has_keys
 
-from sample_app.models import Address, Client
-from .factories import UserFactory, ClientFactory
+from sample_app.models import Address, Client, Tag
+from .factories import AddressFactory, UserFactory, ClientFactory
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -45,6 +54,116 @@ class ClientSerializer(NestedCreateUpdateMixin, serializers.ModelSerializer):
         fields = ("pk", "user")
 
 
+class RevalidatingUserSerializer(UserSerializer):
+    class Meta(UserSerializer.Meta):
+        revalidate_nested_data = True
+
+
+class RevalidatingClientSerializer(ClientSerializer):
+    class Meta(ClientSerializer.Meta):
+        revalidate_nested_data = True
+
+
+class TagSerializer(serializers.ModelSerializer):
+
+    _pk = serializers.IntegerField(write_only=True, required=False)
+
+    class Meta:
+        model = Tag
+        fields = ("pk", "_pk", "name")
+        read_only_fields = ("pk",)
+
+
+class AddressWithTagsSerializer(NestedCreateUpdateMixin, serializers.ModelSerializer):
+    tags = TagSerializer(many=True, required=False)
+
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+        read_only_fields = ("pk",)
+
+
+class BulkTagSerializer(TagSerializer):
+    class Meta(TagSerializer.Meta):
+        nested_bulk_create = True
+        nested_bulk_update = True
+
+
+class AddressWithBulkTagsSerializer(
+    NestedCreateUpdateMixin, serializers.ModelSerializer
+):
+    tags = BulkTagSerializer(many=True, required=False)
+
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+        read_only_fields = ("pk",)
+
+
+class BatchedBulkTagSerializer(TagSerializer):
+    class Meta(TagSerializer.Meta):
+        nested_bulk_update = True
+        nested_bulk_batch_size = 2
+
+
+class AddressWithBatchedBulkTagsSerializer(
+    NestedCreateUpdateMixin, serializers.ModelSerializer
+):
+    tags = BatchedBulkTagSerializer(many=True, required=False)
+
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+        read_only_fields = ("pk",)
+
+
+async def _post_via_asgi(path, data):
+    """POST the `data` (as JSON) to the `path` via the ASGI application
+    of `sample_project`, and return the status and content.
+    """
+
+    from sample_project.asgi import application
+
+    communicator = ApplicationCommunicator(
+        application,
+        {
+            "type": "http",
+            "method": "POST",
+            "path": path,
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"content-type", b"application/json"),
+            ],
+        },
+    )
+    await communicator.send_input(
+        {"type": "http.request", "body": json.dumps(data).encode()}
+    )
+
+    start = await communicator.receive_output(timeout=5)
+    body = await communicator.receive_output(timeout=5)
+    await communicator.wait()
+
+    return start["status"], body["body"]
+
+
+def _get_update_queries(captured_queries, table):
+    return [
+        query["sql"]
+        for query in captured_queries
+        if query["sql"].startswith(f'UPDATE "{table}"')
+    ]
+
+
+def _get_insert_queries(captured_queries, table):
+    return [
+        query["sql"]
+        for query in captured_queries
+        if query["sql"].startswith(f'INSERT INTO "{table}"')
+    ]
+
+
 class TestNestedCreateUpdateMixin:
     def test_depth_1_nested_serializer_valid_data_on_create(self, db):
         address_data = dict(state="CA", zip_code="12345")
@@ -98,7 +217,7 @@ class TestNestedCreateUpdateMixin:
         user_data = dict(username="username", password="password")
         user_data.update(address=address_data)
 
-        serializer = UserSerializer(data=user_data)
+        serializer = RevalidatingUserSerializer(data=user_data)
         assert serializer.is_valid(raise_exception=True)
 
         serializer.validated_data["address"].pop("zip_code")  # remove `zip_code`
@@ -123,7 +242,7 @@ class TestNestedCreateUpdateMixin:
         user_data.update(address=address_data)
         client_data = dict(user=user_data)
 
-        serializer = ClientSerializer(data=client_data)
+        serializer = RevalidatingClientSerializer(data=client_data)
         assert serializer.is_valid(raise_exception=True)
 
         serializer.validated_data["user"]["address"].pop(
@@ -249,7 +368,7 @@ class TestNestedCreateUpdateMixin:
         user_data = dict(email="user@example.com", password="123456")
         user_data.update(address=address_data)
 
-        serializer = UserSerializer(user, data=user_data)
+        serializer = RevalidatingUserSerializer(user, data=user_data)
         assert serializer.is_valid(raise_exception=True)
 
         serializer.validated_data["address"].pop("zip_code")
@@ -277,7 +396,7 @@ class TestNestedCreateUpdateMixin:
         user_data.update(address=address_data)
         client_data = dict(user=user_data)
 
-        serializer = ClientSerializer(client, data=client_data)
+        serializer = RevalidatingClientSerializer(client, data=client_data)
         assert serializer.is_valid(raise_exception=True)
 
         serializer.validated_data["user"]["address"].pop("zip_code")
@@ -307,6 +426,65 @@ class TestNestedCreateUpdateMixin:
         }
         assert "zip_code" in address_keys
 
+    def test_nested_data_is_not_revalidated_by_default(self, tags):
+        tags_pk = [tag.pk for tag in tags]
+        address_data = dict(state="CA", zip_code="12345", tags=tags_pk)
+        user_data = dict(username="username", password="password")
+        user_data.update(address=address_data)
+
+        serializer = UserSerializer(data=user_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            user = serializer.save()
+
+        tag_selects = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "sample_app_tag"')
+            and 'WHERE "sample_app_tag"."id" = ' in query["sql"]
+        ]
+        assert not tag_selects
+        assert [*user.address.tags.all()] == tags
+
+    def test_nested_data_is_revalidated_with_meta_option(self, tags, monkeypatch):
+        tags_pk = [tag.pk for tag in tags]
+        address_data = dict(state="CA", zip_code="12345", tags=tags_pk)
+        user_data = dict(username="username", password="password")
+        user_data.update(address=address_data)
+
+        serializer = RevalidatingUserSerializer(data=user_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        validated = []
+
+        def validate(self, attrs):
+            validated.append(attrs)
+            return attrs
+
+        monkeypatch.setattr(AddressSerializer, "validate", validate, raising=False)
+
+        with CaptureQueriesContext(connection) as ctx:
+            user = serializer.save()
+
+        # Validated again, but the related objects are passed as the
+        # (validated) instances instead of being fetched again by PKs
+        assert len(validated) == 1
+        assert validated[0]["tags"] == tags
+        tag_selects = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "sample_app_tag"')
+            and 'WHERE "sample_app_tag"."id" = ' in query["sql"]
+        ]
+        assert not tag_selects
+        assert [*user.address.tags.all()] == tags
+
+        # Other instances of the serializer are not affected
+        serializer = AddressSerializer(data=dict(address_data, tags=tags))
+        assert not serializer.is_valid()
+        assert "tags" in serializer.errors
+
     def test_create_nested_object_when_does_not_exist(self, db):
         user = UserFactory.create()
         user.address = None
@@ -334,3 +512,682 @@ class TestNestedCreateUpdateMixin:
         with pytest.raises(ValidationError) as exc_info:
             serializer.save()
         assert exc_dict_has_keys(exc_info.value, "address")
+
+    def test_to_many_nested_pks_are_fetched_in_one_query(self, tags):
+        address = AddressFactory.create(tags=tags)
+
+        tags_data = [dict(_pk=tag.pk, name=f"tag_{tag.pk}") for tag in tags]
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            address = serializer.save()
+
+        tag_selects = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "sample_app_tag"')
+            and " IN (" in query["sql"]
+        ]
+        assert len(tag_selects) == 1
+        assert sorted(tag.name for tag in address.tags.all()) == sorted(
+            tag_data["name"] for tag_data in tags_data
+        )
+
+    def test_to_many_nested_pk_does_not_exist(self, tags):
+        address = AddressFactory.create(tags=tags)
+
+        tags_data = [dict(_pk=tag.pk, name="tag") for tag in tags[:2]]
+        tags_data.append(dict(_pk=0, name="tag"))
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.save()
+        assert exc_dict_has_keys(exc_info.value, "tags")
+        assert "No such Tag object with primary key 0 exists." in str(exc_info.value)
+
+    def test_to_many_nested_bulk_create(self, tag):
+        tags_data = [dict(name=f"tag_{num}") for num in range(5)]
+        tags_data.insert(2, dict(_pk=tag.pk, name="existing"))
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithBulkTagsSerializer(data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            address = serializer.save()
+
+        assert len(_get_insert_queries(ctx.captured_queries, "sample_app_tag")) == 1
+        assert [tag.name for tag in address.tags.order_by("pk")] == [
+            "existing",
+            *(f"tag_{num}" for num in range(5)),
+        ]
+
+    def test_to_many_nested_bulk_create_falls_back_with_signals(self, db):
+        def receiver(sender, **kwargs):
+            pass
+
+        post_save.connect(receiver, sender=Tag)
+        try:
+            tags_data = [dict(name=f"tag_{num}") for num in range(3)]
+            address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+            serializer = AddressWithBulkTagsSerializer(data=address_data)
+            assert serializer.is_valid(raise_exception=True)
+
+            with CaptureQueriesContext(connection) as ctx:
+                address = serializer.save()
+        finally:
+            post_save.disconnect(receiver, sender=Tag)
+
+        assert len(_get_insert_queries(ctx.captured_queries, "sample_app_tag")) == 3
+        assert address.tags.count() == 3
+
+    def test_nested_writes_are_rolled_back_on_error(self, tags):
+        address = AddressFactory.create(tags=tags, state="CA")
+        tag = tags[0]
+        tag_name = tag.name
+        tags_count = Tag.objects.count()
+
+        tags_data = [
+            dict(_pk=tag.pk, name="updated"),
+            dict(name="created"),
+            dict(_pk=0, name="tag"),
+        ]
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with pytest.raises(ValidationError):
+            serializer.save()
+
+        tag.refresh_from_db()
+        address.refresh_from_db()
+        assert tag.name == tag_name
+        assert Tag.objects.count() == tags_count
+        assert address.state == "CA"
+
+    def test_nested_write_plan_is_compiled_once_per_class(self, tags):
+        address_data = dict(state="NY", zip_code="12345", tags=[dict(name="tag")])
+
+        for _ in range(2):
+            serializer = AddressWithTagsSerializer(data=address_data)
+            assert serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        plans = AddressWithTagsSerializer.__dict__["_nested_write_plans"]
+        assert len(plans) == 1
+        plan = serializer._get_nested_write_plan()
+        assert plan is next(iter(plans.values()))
+        assert plan.has_nested
+        assert [relation.source for relation in plan.relations] == ["tags"]
+
+        relation = plan.relations[0]
+        assert relation.to_many
+        assert relation.related_model is Tag
+        assert relation.serializer_class is TagSerializer
+        with pytest.raises(AttributeError):
+            relation.to_many = False
+
+    def test_field_templates_are_built_once_per_class(self, tags, monkeypatch):
+        class CachedTagSerializer(TagSerializer):
+            class Meta(TagSerializer.Meta):
+                pass
+
+        class CachedAddressSerializer(AddressWithTagsSerializer):
+            tags = CachedTagSerializer(many=True, required=False)
+
+            class Meta(AddressWithTagsSerializer.Meta):
+                cache_field_templates = True
+
+        calls = []
+        get_fields_orig = serializers.ModelSerializer.get_fields
+
+        def get_fields(self):
+            calls.append(self.__class__.__name__)
+            return get_fields_orig(self)
+
+        monkeypatch.setattr(serializers.ModelSerializer, "get_fields", get_fields)
+
+        address_data = dict(state="NY", zip_code="12345", tags=[dict(name="tag")])
+        for _ in range(3):
+            serializer = CachedAddressSerializer(data=address_data)
+            assert serializer.is_valid(raise_exception=True)
+            address = serializer.save()
+
+        assert calls.count("CachedAddressSerializer") == 1
+        assert [tag.name for tag in address.tags.all()] == ["tag"]
+
+        # Each instance gets its own fields
+        fields = CachedAddressSerializer().fields
+        assert fields["tags"] is not serializer.fields["tags"]
+        assert fields["tags"].parent is not serializer
+        assert "_field_templates" not in AddressWithTagsSerializer.__dict__
+
+    def test_fast_representation(self, tags):
+        class UserRepresentationSerializer(UserSerializer):
+            address = AddressWithTagsSerializer(allow_null=True)
+            full_name = serializers.CharField(source="get_full_name")
+            is_staff = serializers.BooleanField()
+            date_joined = serializers.DateTimeField()
+            zip_code = serializers.CharField(source="address.zip_code", default="")
+            initials = serializers.SerializerMethodField()
+            missing = serializers.CharField(required=False)
+
+            class Meta(UserSerializer.Meta):
+                fields = UserSerializer.Meta.fields + (
+                    "full_name",
+                    "is_staff",
+                    "date_joined",
+                    "zip_code",
+                    "initials",
+                    "missing",
+                )
+
+            def get_initials(self, obj):
+                return obj.username[:1].upper()
+
+        class FastTagSerializer(TagSerializer):
+            class Meta(TagSerializer.Meta):
+                fast_representation = True
+
+        class FastAddressSerializer(AddressWithTagsSerializer):
+            tags = FastTagSerializer(many=True, required=False)
+
+            class Meta(AddressWithTagsSerializer.Meta):
+                fast_representation = True
+
+        class FastUserSerializer(UserRepresentationSerializer):
+            address = FastAddressSerializer(allow_null=True)
+
+            class Meta(UserRepresentationSerializer.Meta):
+                fast_representation = True
+
+        users = [UserFactory.create(), UserFactory.create(address=None)]
+        address = users[0].address
+        address.tags.set(tags[:2])
+
+        data = FastUserSerializer(users, many=True).data
+        assert data == UserRepresentationSerializer(users, many=True).data
+        assert "_pk" not in data[0]
+        assert "missing" not in data[0]
+        assert data[0]["zip_code"] == address.zip_code
+        assert len(data[0]["address"]["tags"]) == 2
+        assert data[1]["address"] is None
+        assert data[1]["zip_code"] is None
+
+        # Compiled once for the child serializer of the list
+        serializer = FastUserSerializer(users, many=True)
+        serializer.data
+        assert "_compiled_representation" in serializer.child.__dict__
+
+    def test_nested_write_plan_depends_on_fields(self, db):
+        class ContextUserSerializer(UserSerializer):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                if not self.context.get("with_address"):
+                    self.fields.pop("address")
+
+        serializer = ContextUserSerializer(data=dict(username="username_1"))
+        assert serializer.is_valid(raise_exception=True)
+        user = serializer.save()
+        assert not Address.objects.exists()
+
+        address_data = dict(state="CA", zip_code="12345")
+        serializer = ContextUserSerializer(
+            data=dict(username="username_2", address=address_data),
+            context=dict(with_address=True),
+        )
+        assert serializer.is_valid(raise_exception=True)
+        user = serializer.save()
+        assert user.address.zip_code == "12345"
+
+        assert len(ContextUserSerializer.__dict__["_nested_write_plans"]) == 2
+
+    def test_nested_save_does_not_build_fields_again(self, db, monkeypatch):
+        calls = []
+        get_fields_orig = serializers.ModelSerializer.get_fields
+
+        def get_fields(self):
+            calls.append(self.__class__.__name__)
+            return get_fields_orig(self)
+
+        monkeypatch.setattr(serializers.ModelSerializer, "get_fields", get_fields)
+
+        client_data = dict(
+            user=dict(username="username", address=dict(state="CA", zip_code="12345"))
+        )
+        serializer = ClientSerializer(data=client_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        # The bound nested serializers are used
+        calls.clear()
+        serializer.save()
+        assert not calls
+
+        client = ClientFactory()
+        client_data = dict(
+            user=dict(
+                _pk=client.user.pk,
+                username="new_username",
+                address=dict(_pk=client.user.address.pk, state="NY", zip_code="54321"),
+            )
+        )
+        serializer = ClientSerializer(client, data=client_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        calls.clear()
+        serializer.save()
+        assert not calls
+
+        client_data = dict(
+            user=dict(username="username_2", address=dict(state="CA", zip_code="12345"))
+        )
+        serializer = ClientSerializer(data=[client_data], many=True)
+        assert serializer.is_valid(raise_exception=True)
+
+        calls.clear()
+        serializer.save()
+        assert not calls
+
+    def test_flat_serializer_create_and_update(self, tags, monkeypatch):
+        class FlatAddressSerializer(
+            NestedCreateUpdateMixin, serializers.ModelSerializer
+        ):
+            class Meta:
+                model = Address
+                fields = ("pk", "state", "zip_code", "tags")
+
+        def _get_related_field_data(*args, **kwargs):
+            raise AssertionError("Not a nested serializer")
+
+        monkeypatch.setattr(
+            FlatAddressSerializer, "_get_related_field_data", _get_related_field_data
+        )
+
+        address_data = dict(state="NY", zip_code="12345", tags=[tags[0].pk])
+        serializer = FlatAddressSerializer(data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+        address = serializer.save()
+        assert [*address.tags.all()] == tags[:1]
+
+        serializer = FlatAddressSerializer(address, data=dict(state="CA"), partial=True)
+        assert serializer.is_valid(raise_exception=True)
+        address = serializer.save()
+        assert address.state == "CA"
+
+    def test_update_checks_related_objects_without_loading_them(self, db):
+        client = ClientFactory.create()
+        user = client.user
+        address_pk = user.address.pk
+
+        address_data = dict(_pk=address_pk, state="NJ", zip_code="34567")
+        user_data = dict(_pk=user.pk, username="spamegg", address=address_data)
+        client_data = dict(user=user_data)
+
+        client = Client.objects.get(pk=client.pk)
+        serializer = ClientSerializer(client, data=client_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            client = serializer.save()
+
+        selects = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        # The `user` is fetched only by its `_pk` (`in_bulk`), and
+        # the `address` ownership check only selects the PK
+        assert not [sql for sql in selects if 'WHERE "auth_user"."id" = ' in sql]
+        assert [
+            sql
+            for sql in selects
+            if sql.startswith(
+                'SELECT "sample_app_address"."id", "sample_app_address"."user_id" '
+            )
+        ]
+        assert client.user.address.state == "NJ"
+
+    def test_update_with_wrong_related_object_pk(self, db):
+        user = UserFactory.create()
+        other_address = AddressFactory.create()
+
+        address_data = dict(_pk=other_address.pk, state="NJ", zip_code="34567")
+        serializer = UserSerializer(user, data=dict(address=address_data))
+        assert serializer.is_valid(raise_exception=True)
+
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.save()
+        assert exc_dict_has_keys(exc_info.value, "address")
+        assert "No such Address object" in str(exc_info.value)
+
+    def test_to_many_nested_bulk_update(self, tags):
+        address = AddressFactory.create(tags=tags)
+
+        tags_data = [dict(_pk=tag.pk, name=f"tag_{tag.pk}") for tag in tags]
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithBulkTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            address = serializer.save()
+
+        assert len(_get_update_queries(ctx.captured_queries, "sample_app_tag")) == 1
+        assert [tag.name for tag in address.tags.order_by("pk")] == [
+            f"tag_{tag.pk}" for tag in tags
+        ]
+
+    def test_to_many_nested_bulk_update_with_auto_now_fields(self, tags, monkeypatch):
+        class AutoNowField:
+            # Like `auto_now` fields, set on `pre_save`
+            name = "name"
+
+            def pre_save(self, instance, add):
+                assert not add
+                instance.name = f"{instance.name}_saved"
+                return instance.name
+
+        monkeypatch.setattr(
+            "drf_ext.mixins._get_auto_now_fields",
+            lambda model: [AutoNowField()] if model is Tag else [],
+        )
+
+        address = AddressFactory.create(tags=tags)
+        tags_data = [dict(_pk=tags[0].pk, name="new")] + [
+            dict(_pk=tag.pk, name=tag.name) for tag in tags[1:]
+        ]
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithBulkTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        # Only on the changed objects
+        names = dict(Tag.objects.values_list("pk", "name"))
+        assert names[tags[0].pk] == "new_saved"
+        assert all(names[tag.pk] == tag.name for tag in tags[1:])
+
+    def test_to_many_nested_bulk_update_with_batch_size(self, tags):
+        address = AddressFactory.create(tags=tags)
+
+        tags_data = [dict(_pk=tag.pk, name=f"tag_{tag.pk}") for tag in tags]
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+
+        serializer = AddressWithBatchedBulkTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            address = serializer.save()
+
+        # 5 objects in batches of 2
+        assert len(_get_update_queries(ctx.captured_queries, "sample_app_tag")) == 3
+        assert [tag.name for tag in address.tags.order_by("pk")] == [
+            f"tag_{tag.pk}" for tag in tags
+        ]
+
+    def test_update_saves_only_changed_fields(self, db):
+        address = AddressFactory.create(state="CA", zip_code="12345")
+
+        address_data = dict(state="CA", zip_code="34567")
+        serializer = AddressWithTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+
+        updates = _get_update_queries(ctx.captured_queries, "sample_app_address")
+        assert len(updates) == 1
+        assert '"zip_code" = ' in updates[0]
+        assert '"state" = ' not in updates[0]
+        address.refresh_from_db()
+        assert (address.state, address.zip_code) == ("CA", "34567")
+
+    def test_unchanged_update_does_not_save(self, tags):
+        address = AddressFactory.create(state="CA", zip_code="12345", tags=tags)
+
+        tags_data = [dict(_pk=tag.pk, name=tag.name) for tag in tags]
+        address_data = dict(state="CA", zip_code="12345", tags=tags_data)
+
+        # Nested objects are updated by `TagSerializer`
+        serializer = AddressWithTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+        assert not [
+            query for query in ctx.captured_queries if query["sql"].startswith("UPDATE")
+        ]
+
+        # Nested objects are updated in bulk
+        serializer = AddressWithBulkTagsSerializer(address, data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+        assert not [
+            query for query in ctx.captured_queries if query["sql"].startswith("UPDATE")
+        ]
+
+    def test_unchanged_update_saves_with_post_save_receivers(self, tags):
+        address = AddressFactory.create(state="CA", zip_code="12345", tags=tags)
+
+        tags_data = [dict(_pk=tag.pk, name=tag.name) for tag in tags]
+        address_data = dict(state="CA", zip_code="12345", tags=tags_data)
+
+        saved = []
+
+        def _post_save(sender, instance, update_fields, **kwargs):
+            saved.append((instance.pk, update_fields))
+
+        post_save.connect(_post_save, sender=Tag)
+        try:
+            serializer = AddressWithTagsSerializer(address, data=address_data)
+            assert serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+            assert sorted(saved) == sorted((tag.pk, None) for tag in tags)
+
+            # The changed fields are passed as `update_fields`
+            saved.clear()
+            tags_data[0]["name"] = "new"
+            serializer = AddressWithTagsSerializer(address, data=address_data)
+            assert serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+            assert (tags[0].pk, frozenset(["name"])) in saved
+        finally:
+            post_save.disconnect(_post_save, sender=Tag)
+
+    def test_nested_pk_objects_are_fetched_with_needed_fields_only(self, db):
+        user = UserFactory.create()
+
+        address_data = dict(_pk=user.address.pk, state="NJ", zip_code="34567")
+        serializer = UserSerializer(user, data=dict(address=address_data))
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+
+        # The fields of `AddressSerializer` i.e. without `user`
+        assert [
+            query
+            for query in ctx.captured_queries
+            if query["sql"].startswith(
+                'SELECT "sample_app_address"."id", "sample_app_address"."state", '
+                '"sample_app_address"."zip_code" FROM'
+            )
+        ]
+        user.address.refresh_from_db()
+        assert (user.address.state, user.address.zip_code) == ("NJ", "34567")
+
+    def test_async_create_and_update(self, tags):
+        user_data = dict(
+            username="username",
+            password="password",
+            address=dict(state="CA", zip_code="12345", tags=[tags[0].pk]),
+        )
+
+        serializer = UserSerializer(data=user_data)
+        assert serializer.is_valid(raise_exception=True)
+        user = async_to_sync(serializer.asave)()
+        assert user.address.zip_code == "12345"
+        assert [*user.address.tags.all()] == tags[:1]
+
+        address_data = dict(_pk=user.address.pk, state="NJ", tags=[tags[1].pk])
+        serializer = UserSerializer(user, data=dict(address=address_data), partial=True)
+        assert serializer.is_valid(raise_exception=True)
+        user = async_to_sync(serializer.asave)()
+        user.address.refresh_from_db()
+        assert user.address.state == "NJ"
+        assert [*user.address.tags.all()] == tags[1:2]
+
+    def test_async_create_is_rolled_back_on_error(self, db):
+        address = AddressFactory.create()
+        user_data = dict(
+            username="username",
+            password="password",
+            address=dict(_pk=address.pk + 100, state="CA", zip_code="12345"),
+        )
+
+        serializer = UserSerializer(data=user_data)
+        assert serializer.is_valid(raise_exception=True)
+        with pytest.raises(ValidationError):
+            async_to_sync(serializer.acreate)(serializer.validated_data)
+        assert not User.objects.filter(username="username").exists()
+
+    def test_async_save_via_asgi_application(self, transactional_db, monkeypatch):
+        # The connections are handled in the threads of the writes
+        calls = []
+        close_old_connections_orig = drf_ext.mixins.close_old_connections
+
+        def close_old_connections():
+            calls.append((threading.get_ident(), connection.in_atomic_block))
+            close_old_connections_orig()
+
+        monkeypatch.setattr(
+            drf_ext.mixins, "close_old_connections", close_old_connections
+        )
+
+        status, content = async_to_sync(_post_via_asgi)(
+            "/clients/", dict(user=dict(username="username", password="password"))
+        )
+
+        assert status == 201
+        client = Client.objects.select_related("user").get(pk=json.loads(content)["pk"])
+        assert client.user.username == "username"
+
+        # Not in the main thread (`Meta.async_thread_sensitive = False`),
+        # and the transaction is done before the connections are handled
+        assert len(calls) == 2
+        assert calls[0][0] == calls[1][0] != threading.get_ident()
+        assert not any(in_atomic_block for _, in_atomic_block in calls)
+
+        # The user is updated before creating the client, which fails
+        # as the user has a client already
+        calls.clear()
+        status, _ = async_to_sync(_post_via_asgi)(
+            "/clients/",
+            dict(
+                user=dict(
+                    _pk=client.user.pk, username="new_username", password="password"
+                )
+            ),
+        )
+
+        assert status == 500
+        assert len(calls) == 2
+        assert not any(in_atomic_block for _, in_atomic_block in calls)
+        # Rolled back
+        client.user.refresh_from_db()
+        assert client.user.username == "username"
+        assert Client.objects.count() == 1
+
+    def test_nested_data_is_resolved_before_writes(self, tags):
+        user = UserFactory.create()
+        other_address = AddressFactory.create()
+
+        tags_data = [
+            dict(_pk=tags[0].pk, name="tag"),
+            dict(_pk=0, name="tag"),
+            dict(name="new"),
+            dict(_pk=-1, name="tag"),
+        ]
+        address_data = dict(state="NY", zip_code="12345", tags=tags_data)
+        serializer = AddressWithTagsSerializer(data=address_data)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            with pytest.raises(ValidationError) as exc_info:
+                serializer.save()
+
+        # All the errors, and nothing is written
+        detail = exc_info.value.detail["tags"]
+        assert not detail[0] and not detail[2]
+        assert "primary key 0" in str(detail[1])
+        assert "primary key -1" in str(detail[3])
+        assert all(query["sql"].startswith("SELECT") for query in ctx.captured_queries)
+
+        # Wrong related object at depth 2
+        client = ClientFactory.create(user=user)
+        user_data = dict(
+            _pk=user.pk,
+            address=dict(_pk=other_address.pk, state="NJ", zip_code="34567"),
+        )
+        serializer = ClientSerializer(client, data=dict(user=user_data))
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            with pytest.raises(ValidationError) as exc_info:
+                serializer.save()
+
+        assert "No such Address object" in str(exc_info.value.detail["user"])
+        assert all(query["sql"].startswith("SELECT") for query in ctx.captured_queries)
+
+    def test_objects_are_loaded_once_per_save(self, db):
+        class AddressWithUserSerializer(AddressSerializer):
+            class Meta(AddressSerializer.Meta):
+                fields = AddressSerializer.Meta.fields + ("user",)
+                # The `Address` is not known on validation
+                extra_kwargs = {"user": {"validators": []}}
+
+        class UserWithAddressSerializer(UserSerializer):
+            address = AddressWithUserSerializer()
+
+        class ClientWithAddressSerializer(ClientSerializer):
+            user = UserWithAddressSerializer()
+
+        client = ClientFactory.create()
+        user = client.user
+        user_data = dict(
+            _pk=user.pk,
+            username="new_username",
+            address=dict(_pk=user.address.pk, user=user.pk, state="NY"),
+        )
+        serializer = ClientWithAddressSerializer(
+            client, data=dict(user=user_data), partial=True
+        )
+        assert serializer.is_valid(raise_exception=True)
+        # Fetched by the related field on validation
+        validated_user = serializer.validated_data["user"]["address"]["user"]
+        assert validated_user is not user
+
+        with CaptureQueriesContext(connection) as ctx:
+            client = serializer.save()
+
+        # The `_pk` of the `User` refers to the same object, which is
+        # not fetched again
+        assert not [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "auth_user"')
+        ]
+        assert client.user is validated_user
+        assert validated_user.username == "new_username"
+        assert client.user.address.user is validated_user
+        assert User.objects.get(pk=user.pk).username == "new_username"
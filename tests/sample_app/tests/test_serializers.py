@@ -0,0 +1,504 @@
+"""Tests for stuffs inside drf_ext.serializers"""
+
+import pytest
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from drf_ext.metaclasses import NestedCreateUpdateMetaclass
+from drf_ext.mixins import NestedCreateUpdateMixin
+from drf_ext.serializers import NestedListSerializer
+
+from sample_app.models import Address, Client, Tag
+
+
+class TagSerializer(serializers.ModelSerializer):
+
+    _pk = serializers.IntegerField(write_only=True, required=False)
+
+    class Meta:
+        model = Tag
+        fields = ("pk", "_pk", "name")
+
+
+class AddressSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    tags = TagSerializer(many=True, required=False)
+
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+
+
+class UserSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    address = AddressSerializer()
+
+    class Meta:
+        model = User
+        fields = ("pk", "username", "password", "address")
+
+
+class ClientSerializer(
+    serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+):
+    user = UserSerializer()
+
+    class Meta:
+        model = Client
+        fields = ("pk", "user")
+
+
+class MixinTagSerializer(NestedCreateUpdateMixin, serializers.ModelSerializer):
+
+    _pk = serializers.IntegerField(write_only=True, required=False)
+
+    class Meta:
+        model = Tag
+        fields = ("pk", "_pk", "name")
+
+
+def _get_clients_data(count, tag):
+    return [
+        dict(
+            user=dict(
+                username=f"user_{num}",
+                password="password",
+                address=dict(
+                    state="CA",
+                    zip_code=f"{num:05}",
+                    tags=[
+                        dict(name=f"tag_{num}_1"),
+                        dict(name=f"tag_{num}_2"),
+                        dict(_pk=tag.pk, name="shared"),
+                    ],
+                ),
+            )
+        )
+        for num in range(count)
+    ]
+
+
+def _create_clients(data):
+    serializer = ClientSerializer(data=data, many=True)
+    assert serializer.is_valid(raise_exception=True)
+
+    with CaptureQueriesContext(connection) as ctx:
+        clients = serializer.save()
+
+    return clients, len(ctx.captured_queries)
+
+
+class TestNestedListSerializer:
+    def test_is_set_by_metaclass(self):
+        assert isinstance(ClientSerializer(many=True), NestedListSerializer)
+
+        class ListSerializer(serializers.ListSerializer):
+            pass
+
+        class Serializer(
+            serializers.ModelSerializer, metaclass=NestedCreateUpdateMetaclass
+        ):
+            class Meta:
+                model = Tag
+                fields = ("pk", "name")
+                list_serializer_class = ListSerializer
+
+        assert type(Serializer(many=True)) is ListSerializer
+
+    def test_create(self, tag):
+        clients, _ = _create_clients(_get_clients_data(3, tag))
+
+        assert len(clients) == Client.objects.count() == 3
+        for num, client in enumerate(Client.objects.order_by("pk")):
+            assert client.user.username == f"user_{num}"
+            assert client.user.address.zip_code == f"{num:05}"
+            assert sorted(tag.name for tag in client.user.address.tags.all()) == [
+                "shared",
+                f"tag_{num}_1",
+                f"tag_{num}_2",
+            ]
+
+        tag.refresh_from_db()
+        assert tag.name == "shared"
+
+    def test_create_queries_do_not_depend_on_items(self, tag):
+        # The shared tag is not changed, so not saved
+        tag.name = "shared"
+        tag.save()
+
+        def _create_addresses(count):
+            data = [
+                client_data["user"]["address"]
+                for client_data in _get_clients_data(count, tag)
+            ]
+            serializer = AddressSerializer(data=data, many=True)
+            assert serializer.is_valid(raise_exception=True)
+
+            with CaptureQueriesContext(connection) as ctx:
+                addresses = serializer.save()
+
+            assert len(addresses) == count
+            return len(ctx.captured_queries)
+
+        assert _create_addresses(2) == _create_addresses(10)
+
+        # `User`s are saved one by one as the model has a custom `save`
+        # method, but the rest are still created level by level
+        _, queries = _create_clients(_get_clients_data(2, tag))
+        _, more_queries = _create_clients(
+            [
+                dict(user={**data["user"], "username": f"other_{num}"})
+                for num, data in enumerate(_get_clients_data(10, tag))
+            ]
+        )
+        assert more_queries - queries == 8
+
+    def test_create_errors_are_positional(self, tag):
+        data = _get_clients_data(3, tag)
+        data[0]["user"]["address"]["tags"][2]["_pk"] = tag.pk + 100
+        data[2]["user"]["address"]["tags"][2]["_pk"] = tag.pk + 200
+
+        serializer = ClientSerializer(data=data, many=True)
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            with pytest.raises(ValidationError) as exc_info:
+                serializer.save()
+
+        # All the errors are found before writing anything
+        assert all(query["sql"].startswith("SELECT") for query in ctx.captured_queries)
+
+        detail = exc_info.value.detail
+        assert len(detail) == 3
+        assert not detail[1]
+        assert "No such Tag object" in str(
+            detail[0]["user"]["address"]["tags"][2]["__all__"]
+        )
+        assert "No such Tag object" in str(
+            detail[2]["user"]["address"]["tags"][2]["__all__"]
+        )
+        assert not Client.objects.exists()
+        assert not Address.objects.exists()
+
+    def test_create_falls_back_with_signals(self, tag):
+        saved = []
+
+        def _post_save(sender, instance, **kwargs):
+            saved.append(instance)
+
+        post_save.connect(_post_save, sender=Address)
+        try:
+            clients, _ = _create_clients(_get_clients_data(2, tag))
+        finally:
+            post_save.disconnect(_post_save, sender=Address)
+
+        # `Address`es are saved one by one, but still level by level
+        assert len(saved) == 2
+        assert [client.user.username for client in clients] == ["user_0", "user_1"]
+        assert Address.objects.filter(user__isnull=False).count() == 2
+
+    def test_create_calls_custom_nested_create(self, tag):
+        created = []
+
+        class CustomAddressSerializer(AddressSerializer):
+            def create(self, validated_data):
+                address = super().create(validated_data)
+                created.append(address)
+                return address
+
+            class Meta(AddressSerializer.Meta):
+                pass
+
+        class CustomUserSerializer(UserSerializer):
+            address = CustomAddressSerializer()
+
+            class Meta(UserSerializer.Meta):
+                pass
+
+        class CustomClientSerializer(ClientSerializer):
+            user = CustomUserSerializer()
+
+            class Meta(ClientSerializer.Meta):
+                pass
+
+        serializer = CustomClientSerializer(data=_get_clients_data(2, tag), many=True)
+        assert serializer.is_valid(raise_exception=True)
+        clients = serializer.save()
+
+        # Each `Address` is created by the custom `create`, the rest are
+        # still created level by level
+        assert [address.zip_code for address in created] == ["00000", "00001"]
+        assert [client.user.address for client in clients] == created
+        assert sorted(tag.name for tag in clients[0].user.address.tags.all()) == [
+            "shared",
+            "tag_0_1",
+            "tag_0_2",
+        ]
+
+        # Same for a single payload
+        serializer = CustomClientSerializer(data=_get_clients_data(3, tag)[2])
+        assert serializer.is_valid(raise_exception=True)
+        client = serializer.save()
+        assert created[2:] == [client.user.address]
+
+    def test_async_create(self, tag):
+        serializer = ClientSerializer(data=_get_clients_data(3, tag), many=True)
+        assert serializer.is_valid(raise_exception=True)
+
+        clients = async_to_sync(serializer.asave)()
+        assert [client.user.username for client in clients] == [
+            "user_0",
+            "user_1",
+            "user_2",
+        ]
+        assert Client.objects.count() == 3
+
+    def _get_update_data(self, clients):
+        return [
+            dict(
+                _pk=client.pk,
+                user=dict(
+                    _pk=client.user.pk,
+                    username=f"new_{client.user.username}",
+                    address=dict(
+                        _pk=client.user.address.pk,
+                        state="NY",
+                        tags=[dict(name=f"new_tag_{num}")],
+                    ),
+                ),
+            )
+            for num, client in enumerate(clients)
+        ]
+
+    def test_update(self, tag):
+        clients, _ = _create_clients(_get_clients_data(3, tag))
+
+        serializer = ClientSerializer(
+            Client.objects.all(),
+            data=self._get_update_data(clients),
+            many=True,
+            partial=True,
+        )
+        assert serializer.is_valid(raise_exception=True)
+        updated = serializer.save()
+
+        assert [client.pk for client in updated] == [client.pk for client in clients]
+        for num, client in enumerate(Client.objects.order_by("pk")):
+            assert client.user.username == f"new_user_{num}"
+            assert client.user.address.state == "NY"
+            assert client.user.address.zip_code == f"{num:05}"
+            assert [tag.name for tag in client.user.address.tags.all()] == [
+                f"new_tag_{num}"
+            ]
+
+        assert Client.objects.count() == 3
+        assert Address.objects.count() == 3
+
+    def test_update_queries_do_not_depend_on_items(self, tag):
+        def _update_addresses(count):
+            clients, _ = _create_clients(_get_clients_data(count, tag))
+            data = [
+                client_data["user"]["address"]
+                for client_data in self._get_update_data(clients)
+            ]
+            serializer = AddressSerializer(
+                Address.objects.all(), data=data, many=True, partial=True
+            )
+            assert serializer.is_valid(raise_exception=True)
+
+            with CaptureQueriesContext(connection) as ctx:
+                addresses = serializer.save()
+
+            assert len(addresses) == count
+            Client.objects.all().delete()
+            User.objects.all().delete()
+            return len(ctx.captured_queries)
+
+        assert _update_addresses(2) == _update_addresses(10)
+
+    def test_update_errors_are_positional(self, tag):
+        clients, _ = _create_clients(_get_clients_data(4, tag))
+        queryset = Client.objects.exclude(pk=clients[3].pk)
+
+        def _get_error_detail(data):
+            serializer = ClientSerializer(queryset, data=data, many=True, partial=True)
+            assert serializer.is_valid(raise_exception=True)
+
+            with pytest.raises(ValidationError) as exc_info:
+                serializer.save()
+
+            return exc_info.value.detail
+
+        # Not in the queryset, on validation
+        data = self._get_update_data(clients[:3])
+        data[1]["_pk"] = clients[3].pk
+
+        serializer = ClientSerializer(queryset, data=data, many=True, partial=True)
+        assert not serializer.is_valid()
+        assert len(serializer.errors) == 3
+        assert not serializer.errors[0] and not serializer.errors[2]
+        assert "No such Client object" in str(serializer.errors[1]["_pk"])
+
+        # Not related to the `User`
+        data = self._get_update_data(clients[:3])
+        data[2]["user"]["address"]["_pk"] = clients[0].user.address.pk
+
+        detail = _get_error_detail(data)
+        assert len(detail) == 3
+        assert not detail[0] and not detail[1]
+        assert "No such Address object" in str(detail[2]["user"]["address"])
+
+        assert not User.objects.filter(username__startswith="new_").exists()
+
+    def test_update_checks_related_objects_once(self, tag):
+        clients, _ = _create_clients(_get_clients_data(3, tag))
+        data = self._get_update_data(clients)
+        # Only the first item carries the (reverse) `address` relation
+        for item in data[1:]:
+            del item["user"]["address"]
+
+        serializer = ClientSerializer(
+            Client.objects.all(), data=data, many=True, partial=True
+        )
+        assert serializer.is_valid(raise_exception=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+
+        queries = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "sample_app_address"."id", ')
+            and '"user_id" IN' in query["sql"]
+        ]
+        assert len(queries) == 1
+        assert f'"user_id" IN ({clients[0].user.pk})' in queries[0]
+
+    def test_update_requires_pk(self, tag):
+        clients, _ = _create_clients(_get_clients_data(2, tag))
+        data = self._get_update_data(clients)
+        del data[1]["_pk"]
+
+        serializer = ClientSerializer(
+            Client.objects.all(), data=data, many=True, partial=True
+        )
+        assert not serializer.is_valid()
+        assert not serializer.errors[0]
+        assert "_pk" in serializer.errors[1]
+
+
+class TestSaveStream:
+    def test_save_stream(self, tag):
+        consumed = []
+
+        def _generate(count):
+            for data in _get_clients_data(count, tag):
+                consumed.append(data)
+                yield data
+
+        stream = ClientSerializer.save_stream(_generate(25), chunk_size=10)
+
+        # Only a chunk is consumed at a time
+        result = next(stream)
+        assert len(consumed) == 10
+        assert result == (0, 10, result.instances, [])
+        assert len(result.instances) == 10
+
+        results = [result, *stream]
+        assert [(result.offset, result.size) for result in results] == [
+            (0, 10),
+            (10, 10),
+            (20, 5),
+        ]
+        assert Client.objects.count() == 25
+
+    def test_save_stream_errors(self, tag):
+        data = _get_clients_data(6, tag)
+        data[4]["user"]["username"] = ""
+
+        results = list(ClientSerializer.save_stream(iter(data), chunk_size=3))
+
+        assert not results[0].errors
+        assert not results[1].instances
+        assert len(results[1].errors) == 3
+        assert "username" in results[1].errors[1]["user"]
+        assert list(
+            Client.objects.order_by("pk").values_list("user__username", flat=True)
+        ) == ["user_0", "user_1", "user_2"]
+
+    def test_save_stream_update(self, tag):
+        clients, _ = _create_clients(_get_clients_data(3, tag))
+        data = [
+            dict(_pk=client.pk, user=dict(_pk=client.user.pk)) for client in clients
+        ]
+        for num, item in enumerate(data):
+            item["user"]["username"] = f"new_{num}"
+
+        results = list(
+            ClientSerializer.save_stream(
+                data, chunk_size=2, instance=Client.objects.all(), partial=True
+            )
+        )
+
+        assert [len(result.instances) for result in results] == [2, 1]
+        assert sorted(User.objects.values_list("username", flat=True)) == [
+            "new_0",
+            "new_1",
+            "new_2",
+        ]
+
+    def test_save_stream_chunk_size(self):
+        for chunk_size in (0, -1):
+            with pytest.raises(ValueError):
+                ClientSerializer.save_stream([], chunk_size=chunk_size)
+
+    def test_save_stream_without_metaclass(self, db):
+        results = list(
+            MixinTagSerializer.save_stream(
+                [dict(name=f"tag_{num}") for num in range(3)], chunk_size=2
+            )
+        )
+
+        assert [len(result.instances) for result in results] == [2, 1]
+        tags = list(Tag.objects.order_by("pk"))
+        assert [tag.name for tag in tags] == ["tag_0", "tag_1", "tag_2"]
+
+        results = list(
+            MixinTagSerializer.save_stream(
+                [dict(_pk=tag.pk, name=f"new_{tag.name}") for tag in tags],
+                instance=Tag.objects.all(),
+                partial=True,
+            )
+        )
+
+        assert not results[0].errors
+        assert list(Tag.objects.order_by("pk").values_list("name", flat=True)) == [
+            "new_tag_0",
+            "new_tag_1",
+            "new_tag_2",
+        ]
+
+    def test_save_stream_chunk_errors(self, tag, monkeypatch):
+        def _create(self, validated_data):
+            raise ValidationError("Not now.")
+
+        monkeypatch.setattr(NestedListSerializer, "create", _create)
+
+        results = list(
+            ClientSerializer.save_stream(_get_clients_data(3, tag), chunk_size=2)
+        )
+
+        # Not copied to the items of the chunk
+        assert [result.errors for result in results] == [
+            {"__all__": ["Not now."]},
+            {"__all__": ["Not now."]},
+        ]
+        assert not Client.objects.exists()
@@ -2,15 +2,29 @@
 
 import pytest
 
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError as django_ValidationError
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.utils import model_meta
 
 from drf_ext.utils import (
     update_error_dict,
     exc_dict_has_keys,
     get_request_user_on_serializer,
+    get_field_info,
+    sync_many_to_many,
+    bulk_add_many_to_many,
+    bulk_sync_many_to_many,
+    optimize_queryset,
 )
 
+from sample_app.models import Address, Client, Tag
+from .factories import AddressFactory, ClientFactory
+
 
 def test_update_error_dict():
     errors = {"foo": []}
@@ -67,3 +81,207 @@ def test_get_request_user_on_serializer():
     serializer_instance = SerializerWithNoRequestInContext()
     with pytest.raises(ValueError):
         get_request_user_on_serializer(serializer_instance)
+
+
+def test_get_field_info(monkeypatch):
+    get_field_info.cache_clear()
+
+    calls = []
+    get_field_info_orig = model_meta.get_field_info
+
+    def _get_field_info(model):
+        calls.append(model)
+        return get_field_info_orig(model)
+
+    monkeypatch.setattr(model_meta, "get_field_info", _get_field_info)
+
+    info = get_field_info(Address)
+    assert "tags" in info.relations
+    assert get_field_info(Address) is info
+    assert calls == [Address]
+
+    get_field_info.cache_clear()
+    assert get_field_info(Address) is not info
+    assert calls == [Address, Address]
+
+
+def test_sync_many_to_many(tags):
+    address = AddressFactory.create(tags=tags[:3])
+
+    # Unchanged relations are not written
+    with CaptureQueriesContext(connection) as ctx:
+        sync_many_to_many(address, "tags", [tag.pk for tag in tags[:3]])
+    assert len(ctx.captured_queries) == 1
+
+    # Stale relations are deleted and the new ones are inserted, per chunk
+    with CaptureQueriesContext(connection) as ctx:
+        sync_many_to_many(address, "tags", tags[1:], chunk_size=2)
+    sqls = [query["sql"] for query in ctx.captured_queries]
+    assert len([sql for sql in sqls if sql.startswith("DELETE")]) == 1
+    assert len([sql for sql in sqls if sql.startswith("INSERT")]) == 1
+    assert set(address.tags.all()) == set(tags[1:])
+
+    # Nothing is read for newly created instances
+    address = AddressFactory.create()
+    with CaptureQueriesContext(connection) as ctx:
+        sync_many_to_many(address, "tags", tags, created=True)
+    assert len(ctx.captured_queries) == 1
+    assert set(address.tags.all()) == set(tags)
+
+
+def test_sync_many_to_many_prefetched(tags):
+    AddressFactory.create(tags=tags[:2])
+    address = Address.objects.prefetch_related("tags").get()
+
+    with CaptureQueriesContext(connection) as ctx:
+        sync_many_to_many(address, "tags", tags[:2])
+    assert len(ctx.captured_queries) == 0
+
+    sync_many_to_many(address, "tags", tags[2:])
+    # Prefetched objects are invalidated
+    assert "tags" not in address._prefetched_objects_cache
+    assert set(address.tags.all()) == set(tags[2:])
+
+
+def test_sync_many_to_many_m2m_changed(tags):
+    address = AddressFactory.create(tags=tags[:2])
+
+    actions = []
+
+    def _m2m_changed(sender, action, **kwargs):
+        actions.append(action)
+
+    m2m_changed.connect(_m2m_changed, sender=Address.tags.through)
+    try:
+        sync_many_to_many(address, "tags", tags[2:])
+    finally:
+        m2m_changed.disconnect(_m2m_changed, sender=Address.tags.through)
+
+    # Falls back to `set` so that the receivers are called
+    assert actions == ["pre_remove", "post_remove", "pre_add", "post_add"]
+    assert set(address.tags.all()) == set(tags[2:])
+
+
+def test_bulk_add_many_to_many(tags):
+    addresses = AddressFactory.create_batch(3)
+
+    with CaptureQueriesContext(connection) as ctx:
+        bulk_add_many_to_many(
+            addresses, "tags", [tags[:2], [tag.pk for tag in tags[2:]], []]
+        )
+    assert len(ctx.captured_queries) == 1
+
+    assert set(addresses[0].tags.all()) == set(tags[:2])
+    assert set(addresses[1].tags.all()) == set(tags[2:])
+    assert not addresses[2].tags.exists()
+
+
+def test_bulk_sync_many_to_many(tags):
+    addresses = AddressFactory.create_batch(3)
+    for address in addresses:
+        address.tags.set(tags[:2])
+
+    with CaptureQueriesContext(connection) as ctx:
+        bulk_sync_many_to_many(
+            addresses, "tags", [tags[:2], tags[1:], [tag.pk for tag in tags[2:]]]
+        )
+    # Existing relations, stale relations, new relations
+    assert len(ctx.captured_queries) == 3
+
+    assert set(addresses[0].tags.all()) == set(tags[:2])
+    assert set(addresses[1].tags.all()) == set(tags[1:])
+    assert set(addresses[2].tags.all()) == set(tags[2:])
+
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ("pk", "name")
+
+
+class AddressSerializer(serializers.ModelSerializer):
+    tags = TagSerializer(many=True)
+
+    class Meta:
+        model = Address
+        fields = ("pk", "state", "zip_code", "tags")
+
+
+class UserSerializer(serializers.ModelSerializer):
+    address = AddressSerializer()
+
+    class Meta:
+        model = User
+        fields = ("pk", "username", "address")
+
+
+class ClientSerializer(serializers.ModelSerializer):
+    user = UserSerializer()
+
+    class Meta:
+        model = Client
+        fields = ("pk", "user")
+
+
+def test_optimize_queryset(tags):
+    def _serialize(queryset):
+        with CaptureQueriesContext(connection) as ctx:
+            data = ClientSerializer(queryset, many=True).data
+        return data, len(ctx.captured_queries)
+
+    for _ in range(2):
+        ClientFactory.create().user.address.tags.set(tags[:2])
+
+    data, queries = _serialize(optimize_queryset(ClientSerializer))
+    # Clients (with users and addresses) and tags
+    assert queries == 2
+    assert data == _serialize(Client.objects.all())[0]
+
+    for _ in range(3):
+        ClientFactory.create().user.address.tags.set(tags[2:])
+
+    assert _serialize(optimize_queryset(ClientSerializer))[1] == queries
+
+    # Only the serialized fields are loaded
+    queryset = optimize_queryset(ClientSerializer, Client.objects.filter(pk__gt=0))
+    client = queryset.first()
+    assert client.user.get_deferred_fields() >= {"password", "email"}
+    assert not client.user.address.get_deferred_fields()
+
+
+def test_optimize_queryset_with_existing_lookups(tags):
+    class PkOnlyClientSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = Client
+            fields = ("pk",)
+
+    ClientFactory.create().user.address.tags.set(tags[:2])
+
+    # Joined relations are loaded
+    queryset = optimize_queryset(
+        PkOnlyClientSerializer, Client.objects.select_related("user__address")
+    )
+    client = queryset.get()
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.user.address.zip_code
+    assert not ctx.captured_queries
+
+    # Prefetched relations are not prefetched again
+    with CaptureQueriesContext(connection) as ctx:
+        data = AddressSerializer(
+            optimize_queryset(
+                AddressSerializer, Address.objects.prefetch_related("tags")
+            ),
+            many=True,
+        ).data
+    assert len(data[0]["tags"]) == 2
+    assert len(ctx.captured_queries) == 2
+
+    # Prefetched via a relation that is otherwise not loaded
+    queryset = optimize_queryset(
+        PkOnlyClientSerializer, Client.objects.prefetch_related("user__address__tags")
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        client = queryset.get()
+        assert len(client.user.address.tags.all()) == 2
+    assert len(ctx.captured_queries) == 4
@@ -0,0 +1,41 @@
+"""Tests for stuffs inside drf_ext.views"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import generics
+from rest_framework.test import APIRequestFactory
+
+from drf_ext.views import OptimizedQuerySetMixin
+
+from sample_app.models import Client
+from .factories import ClientFactory
+from .test_utils import ClientSerializer
+
+
+class ClientListView(OptimizedQuerySetMixin, generics.ListAPIView):
+    queryset = Client.objects.all()
+    serializer_class = ClientSerializer
+    authentication_classes = ()
+    permission_classes = ()
+
+
+class TestOptimizedQuerySetMixin:
+    def test_list_queries_do_not_depend_on_objects(self, tags):
+        view = ClientListView.as_view()
+
+        def _list():
+            request = APIRequestFactory().get("/clients/")
+            with CaptureQueriesContext(connection) as ctx:
+                response = view(request)
+            assert response.status_code == 200
+            return response.data, len(ctx.captured_queries)
+
+        ClientFactory.create().user.address.tags.set(tags[:2])
+        data, queries = _list()
+        assert len(data) == 1
+        assert len(data[0]["user"]["address"]["tags"]) == 2
+
+        ClientFactory.create_batch(5)
+        data, more_queries = _list()
+        assert len(data) == 6
+        assert more_queries == queries
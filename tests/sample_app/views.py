@@ -1,3 +1,20 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from .serializers import ClientSerializer
+
+
+async def create_client(request):
+    serializer = ClientSerializer(data=json.loads(request.body))
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    client = await serializer.asave()
+
+    return JsonResponse({"pk": client.pk, "user": client.user.pk}, status=201)
+
+
+# `csrf_exempt` does not support async views on Django < 5.0
+create_client.csrf_exempt = True
@@ -16,6 +16,9 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from sample_app import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('clients/', views.create_client),
 ]